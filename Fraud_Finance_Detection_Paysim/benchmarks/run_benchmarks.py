@@ -0,0 +1,249 @@
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import importlib.util
+from contextlib import redirect_stdout
+
+# Benchmark yang bisa diulang untuk setiap tahap pipeline fraud.
+# - Data: log PaySim sintetis (synthetic.py) pada skala 20k / 1m / 6.3m / 50m baris,
+#   di workspace terpisah (data/benchmarks/<skala>-seed<seed>/) lewat FRAUD_DATA_ROOT,
+#   jadi artefak proyek (Data_Processed/, models/) tidak tersentuh.
+# - Setiap tahap dijalankan di PROSES BARU -> puncak RSS per tahap bersih, tidak tercampur.
+# - Hasil: JSON (waktu median, semua run, baris/detik, puncak RSS, info mesin & commit).
+# - Dibandingkan dengan baseline; tahap yang lebih lambat / boros memori dari ambang -> REGRESSION (exit 1).
+#
+#   python benchmarks/run_benchmarks.py --scale 20k 1m
+#   python benchmarks/run_benchmarks.py --scale 1m --save-baseline
+#   python benchmarks/run_benchmarks.py --scale 1m --stages score dashboard --repeat 5
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+SRC_DIR = os.path.join(PROJECT_DIR, 'src')
+NOTEBOOK_DIR = os.path.join(PROJECT_DIR, 'notebooks')
+WORK_DIR = os.path.join(PROJECT_DIR, 'data', 'benchmarks')
+BASELINE_PATH = os.path.join(WORK_DIR, 'baseline.json')
+RESULT_MARKER = 'BENCH_RESULT '
+
+# Tahap -> (dependensi, sumber jumlah baris). Urutan dict = urutan eksekusi.
+STAGES = {
+    'clean': (['generate'], 'raw'),              # 1_Cleaning_Dataset.start_phase_1 (streaming + velocity)
+    'eda': (['generate'], 'raw'),                # stream_stats.compute_eda_stats (tanpa plot)
+    'features': (['clean'], 'sample'),           # 3_Feature_Engineering.run_feature_engineering
+    'full_features': (['generate'], 'raw'),      # 3_Feature_Engineering.run_full_feature_engineering
+    'train': (['features'], 'features'),         # 4_Model_Training.run_model_training (forest)
+    'train_full': (['full_features'], 'full'),   # 4_Model_Training.run_out_of_core_training (hist)
+    'score': (['train', 'full_features'], 'full'),      # transformer + scorer per batch
+    'dashboard': (['train', 'full_features'], 'full'),  # dashboard_cache.build_dashboard_cache
+    'batch_score': (['train', 'full_features'], 'full'),  # batch_scoring.run_batch_scoring (semua core)
+}
+DEFAULT_STAGES = [s for s in STAGES if s != 'train_full']
+
+# --- Sisi child: satu tahap, satu proses ---
+def _notebook(script):
+    spec = importlib.util.spec_from_file_location(os.path.splitext(script)[0], os.path.join(NOTEBOOK_DIR, script))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _score_all(batch_size=500_000):
+    from artifacts import iter_artifact_batches
+    from model_registry import load_scorer
+    from paths import FULL_FEATURES_PATH, MODEL_PATH
+
+    scorer, transformer = load_scorer(MODEL_PATH)
+    flagged = 0
+    for batch in iter_artifact_batches(FULL_FEATURES_PATH, columns=transformer.feature_names, batch_size=batch_size):
+        flagged += int((scorer.score(transformer.transform(batch))[1] == 1).sum())
+    return flagged
+
+def _stage_callable(stage):
+    from paths import RAW_DATA_PATH, FULL_FEATURES_PATH, MODEL_PATH, CACHE_DIR
+    return {
+        'clean': lambda: _notebook('1_Cleaning_Dataset.py').start_phase_1(20000, with_velocity=True),
+        'eda': lambda: __import__('stream_stats').compute_eda_stats(RAW_DATA_PATH),
+        'features': lambda: _notebook('3_Feature_Engineering.py').run_feature_engineering(),
+        'full_features': lambda: _notebook('3_Feature_Engineering.py').run_full_feature_engineering(),
+        'train': lambda: _notebook('4_Model_Training.py').run_model_training(),
+        'train_full': lambda: _notebook('4_Model_Training.py').run_model_training(mode='hist'),
+        'score': _score_all,
+        'dashboard': lambda: __import__('dashboard_cache').build_dashboard_cache(
+            FULL_FEATURES_PATH, MODEL_PATH, cache_dir=os.path.join(CACHE_DIR, 'bench')),
+        'batch_score': lambda: __import__('batch_scoring').run_batch_scoring(FULL_FEATURES_PATH, MODEL_PATH),
+    }[stage]
+
+def _row_count(source):
+    from artifacts import load_table, resolve_artifact
+    from paths import RAW_DATA_PATH, SAMPLE_PATH, FEATURES_PATH, FULL_FEATURES_PATH
+    if source == 'raw':
+        with open(RAW_DATA_PATH + '.json') as f:
+            return json.load(f)['n_rows']
+    path, fmt = resolve_artifact({'sample': SAMPLE_PATH, 'features': FEATURES_PATH, 'full': FULL_FEATURES_PATH}[source])
+    if fmt == 'csv':
+        with open(path, 'rb') as f:
+            return sum(1 for _ in f) - 1
+    return load_table(path, columns=[]).num_rows
+
+def run_child(stage):
+    sys.path.insert(0, SRC_DIR)
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    from resources import peak_rss_mb
+
+    func = _stage_callable(stage)
+    log = io.StringIO()
+    start = time.perf_counter()
+    with redirect_stdout(log):
+        func()
+    seconds = time.perf_counter() - start
+    # Tahap notebook melaporkan error lewat print lalu return: deteksi lewat penanda [ERROR]
+    if '[ERROR]' in log.getvalue():
+        sys.stderr.write(log.getvalue())
+        sys.exit(1)
+    result = {'seconds': seconds, 'peak_rss_mb': peak_rss_mb(), 'rows': _row_count(STAGES[stage][1])}
+    print(RESULT_MARKER + json.dumps(result))
+
+# --- Sisi parent ---
+def _with_dependencies(stages):
+    needed, todo = set(), list(stages)
+    while todo:
+        name = todo.pop()
+        if name not in needed and name != 'generate':
+            needed.add(name)
+            todo.extend(STAGES[name][0])
+    return [name for name in STAGES if name in needed]
+
+def _run_stage_process(stage, workspace):
+    env = dict(os.environ, FRAUD_DATA_ROOT=workspace)
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', stage],
+                          capture_output=True, text=True, env=env)
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    raise RuntimeError(f"Tahap '{stage}' gagal (exit {proc.returncode}):\n{(proc.stderr or proc.stdout)[-2000:]}")
+
+def prepare_workspace(scale, seed):
+    sys.path.insert(0, BENCH_DIR)
+    from synthetic import generate_paysim, parse_scale
+
+    n_rows = parse_scale(scale)
+    workspace = os.path.join(WORK_DIR, f'{scale}-seed{seed}')
+    # Nama file log mentah mengikuti paths.RAW_DATA_PATH, relatif terhadap akar data
+    raw_path = os.path.join(workspace, 'data', 'raw', 'PS_20174392719_1491204439457_log.csv')
+    start = time.perf_counter()
+    generate_paysim(raw_path, n_rows, seed=seed, verbose=False)
+    return workspace, n_rows, time.perf_counter() - start
+
+def environment_info():
+    def version(name):
+        try:
+            return __import__(name).__version__
+        except ImportError:
+            return None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'commit': commit,
+        'packages': {name: version(name) for name in ('numpy', 'pandas', 'pyarrow', 'sklearn', 'numba')},
+    }
+
+def run_suite(scales, stages, repeat=3, seed=0):
+    results = []
+    for scale in scales:
+        workspace, n_rows, gen_seconds = prepare_workspace(scale, seed)
+        print(f"[{scale}] {n_rows:,} baris sintetis siap ({gen_seconds:.1f}s) di: {workspace}")
+        for stage in _with_dependencies(stages):
+            runs = [_run_stage_process(stage, workspace) for _ in range(repeat)]
+            seconds = statistics.median(r['seconds'] for r in runs)
+            result = {
+                'scale': scale,
+                'stage': stage,
+                'rows': runs[0]['rows'],
+                'seconds': seconds,
+                'rows_per_second': runs[0]['rows'] / seconds if seconds > 0 else None,
+                'peak_rss_mb': statistics.median(r['peak_rss_mb'] for r in runs),
+                'runs': [{'seconds': r['seconds'], 'peak_rss_mb': r['peak_rss_mb']} for r in runs],
+            }
+            results.append(result)
+            print(f"  {stage:>14}: {seconds:8.2f}s | {result['rows_per_second'] or 0:>12,.0f} baris/s | "
+                  f"puncak RSS {result['peak_rss_mb']:,.0f} MB")
+    return {'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'seed': seed, 'repeat': repeat,
+            'environment': environment_info(), 'results': results}
+
+def compare(report, baseline, threshold=0.15):
+    # Rasio terhadap baseline untuk waktu & puncak RSS; > 1 + threshold -> regresi
+    previous = {(r['scale'], r['stage']): r for r in baseline['results']}
+    rows, regressions = [], []
+    for r in report['results']:
+        base = previous.get((r['scale'], r['stage']))
+        if base is None:
+            continue
+        time_ratio = r['seconds'] / base['seconds'] if base['seconds'] > 0 else float('nan')
+        rss_ratio = r['peak_rss_mb'] / base['peak_rss_mb'] if base['peak_rss_mb'] > 0 else float('nan')
+        flags = [name for name, ratio in (('time', time_ratio), ('memory', rss_ratio)) if ratio > 1 + threshold]
+        rows.append((r['scale'], r['stage'], time_ratio, rss_ratio, flags))
+        if flags:
+            regressions.append({'scale': r['scale'], 'stage': r['stage'], 'time_ratio': time_ratio,
+                                'rss_ratio': rss_ratio, 'flags': flags})
+    return rows, regressions
+
+def _write_json(data, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark tahap pipeline fraud dengan data PaySim sintetis")
+    parser.add_argument('--scale', nargs='+', default=['20k'], help="20k, 1m, 6.3m, 50m atau angka (mis. 250k)")
+    parser.add_argument('--stages', nargs='+', default=DEFAULT_STAGES, choices=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3, help="Jumlah run per tahap (median yang dilaporkan)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help="File JSON hasil (default: data/benchmarks/results/)")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="Simpan hasil run ini sebagai baseline")
+    parser.add_argument('--threshold', type=float, default=0.15, help="Toleransi regresi (0.15 = 15%% lebih lambat)")
+    parser.add_argument('--child', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    report = run_suite(args.scale, args.stages, args.repeat, args.seed)
+    output = args.output or os.path.join(WORK_DIR, 'results', time.strftime('%Y%m%d-%H%M%S') + '.json')
+    _write_json(report, output)
+    print("-" * 30)
+    print(f"[SUCCESS] Hasil disimpan di: {output}")
+
+    if args.save_baseline:
+        _write_json(report, args.baseline)
+        print(f"[SUCCESS] Baseline diperbarui: {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print("[WARNING] Belum ada baseline; jalankan dengan --save-baseline untuk membuatnya.")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows, regressions = compare(report, baseline, args.threshold)
+    print(f"Dibandingkan dengan baseline {baseline['created_at']} (commit {baseline['environment'].get('commit')}):")
+    for scale, stage, time_ratio, rss_ratio, flags in rows:
+        status = 'REGRESSION (' + ', '.join(flags) + ')' if flags else 'ok'
+        print(f"  [{scale}] {stage:>14}: waktu x{time_ratio:.2f} | RSS x{rss_ratio:.2f} | {status}")
+    if regressions:
+        print(f"[ERROR] {len(regressions)} regresi melewati ambang {args.threshold:.0%}")
+        sys.exit(1)
+    print("[SUCCESS] Tidak ada regresi.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+# Generator log transaksi sintetis berbentuk PaySim (kolom, dtype, urutan 'step', proporsi tipe,
+# tingkat fraud ~0.13% hanya di TRANSFER/CASH_OUT dengan pola "saldo dikuras") untuk benchmark.
+# Ditulis per chunk, jadi 50 juta baris pun tidak perlu muat di RAM.
+# Deterministik: (n_rows, seed, chunk_rows) yang sama -> file yang sama persis.
+
+GENERATOR_VERSION = 1
+
+SCALES = {
+    '20k': 20_000,
+    '1m': 1_000_000,
+    '6.3m': 6_362_620,   # ukuran log PaySim asli
+    '50m': 50_000_000,
+}
+
+N_STEPS = 743
+TYPES = np.array(['CASH_IN', 'CASH_OUT', 'DEBIT', 'PAYMENT', 'TRANSFER'])
+TYPE_PROBS = np.array([0.2199, 0.3517, 0.0065, 0.3381, 0.0838])
+FRAUD_RATE = 0.0013
+COLUMNS = ['step', 'type', 'amount', 'nameOrig', 'oldbalanceOrg', 'newbalanceOrig', 'nameDest',
+           'oldbalanceDest', 'newbalanceDest', 'isFraud', 'isFlaggedFraud']
+
+def parse_scale(scale):
+    # '1m' / '6.3m' / '20k' / '250000' -> jumlah baris
+    if scale in SCALES:
+        return SCALES[scale]
+    scale = scale.lower()
+    for suffix, factor in (('k', 1_000), ('m', 1_000_000)):
+        if scale.endswith(suffix):
+            return int(float(scale[:-1]) * factor)
+    return int(scale)
+
+def step_boundaries(n_rows, seed):
+    # Volume per jam mengikuti pola harian (sepi dini hari, ramai siang), lalu baris ke-i
+    # dipetakan ke step lewat batas kumulatif -> file terurut 'step' seperti log asli
+    hours = np.arange(N_STEPS) % 24
+    weights = 0.15 + np.clip(np.sin((hours - 6) / 24 * 2 * np.pi), 0, None)
+    counts = np.random.default_rng(seed).multinomial(n_rows, weights / weights.sum())
+    return np.cumsum(counts)
+
+def _account_names(prefix, ids):
+    return np.char.add(prefix, ids.astype(str))
+
+def generate_chunk(start, stop, n_rows, boundaries, seed):
+    rng = np.random.default_rng([seed, start])
+    n = stop - start
+    step = np.searchsorted(boundaries, np.arange(start, stop), side='right').astype(np.int16) + 1
+
+    type_idx = rng.choice(len(TYPES), size=n, p=TYPE_PROBS)
+    is_fraud = (rng.random(n) < FRAUD_RATE / (TYPE_PROBS[1] + TYPE_PROBS[4])) & np.isin(type_idx, (1, 4))
+
+    amount = np.round(rng.lognormal(10.5, 1.4, n), 2)
+    old_orig = np.round(np.where(rng.random(n) < 0.3, 0.0, rng.lognormal(10.5, 2.0, n)), 2)
+    old_dest = np.round(np.where(rng.random(n) < 0.4, 0.0, rng.lognormal(12.0, 2.0, n)), 2)
+
+    cash_in = type_idx == 0
+    payment = type_idx == 3
+    new_orig = np.where(cash_in, old_orig + amount, np.maximum(old_orig - amount, 0.0))
+    new_dest = np.where(cash_in, np.maximum(old_dest - amount, 0.0), old_dest + amount)
+    # Merchant (pembayaran) tidak punya saldo yang tercatat
+    old_dest = np.where(payment, 0.0, old_dest)
+    new_dest = np.where(payment, 0.0, new_dest)
+
+    # Fraud: saldo pengirim dikuras habis; pada TRANSFER saldo penerima tidak ikut berubah
+    amount = np.where(is_fraud, np.minimum(np.maximum(old_orig, amount), 10_000_000.0), amount)
+    new_orig = np.where(is_fraud, 0.0, new_orig)
+    fraud_transfer = is_fraud & (type_idx == 4)
+    old_dest = np.where(fraud_transfer, 0.0, old_dest)
+    new_dest = np.where(fraud_transfer, 0.0, new_dest)
+
+    name_orig = _account_names('C', rng.integers(1_000_000_000, 1_000_000_000 + n_rows, n))
+    dest_ids = rng.integers(1_000_000_000, 1_000_000_000 + max(n_rows // 3, 1), n)
+    name_dest = np.where(payment, _account_names('M', dest_ids), _account_names('C', dest_ids))
+
+    return pd.DataFrame({
+        'step': step,
+        'type': TYPES[type_idx],
+        'amount': amount,
+        'nameOrig': name_orig,
+        'oldbalanceOrg': old_orig,
+        'newbalanceOrig': np.round(new_orig, 2),
+        'nameDest': name_dest,
+        'oldbalanceDest': old_dest,
+        'newbalanceDest': np.round(new_dest, 2),
+        'isFraud': is_fraud.astype(np.int8),
+        'isFlaggedFraud': (fraud_transfer & (amount > 200_000)).astype(np.int8),
+    }, columns=COLUMNS)
+
+def generate_paysim(path, n_rows, seed=0, chunk_rows=1_000_000, verbose=True):
+    # Menulis CSV berformat log PaySim; file .json di sampingnya mencatat parameter generator
+    meta_path = path + '.json'
+    meta = {'generator_version': GENERATOR_VERSION, 'n_rows': n_rows, 'seed': seed, 'chunk_rows': chunk_rows}
+    if os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            if json.load(f) == meta:
+                return path  # sudah ada dengan parameter yang sama
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    boundaries = step_boundaries(n_rows, seed)
+    start_time = time.perf_counter()
+    tmp_path = path + '.tmp'
+    # pyarrow.csv ~10x lebih cepat dari DataFrame.to_csv; tanpa tanda kutip seperti file PaySim asli
+    options = pacsv.WriteOptions(include_header=False, quoting_style='none')
+    with open(tmp_path, 'wb') as f:
+        f.write((','.join(COLUMNS) + '\n').encode())
+        for start in range(0, n_rows, chunk_rows):
+            stop = min(start + chunk_rows, n_rows)
+            chunk = pa.Table.from_pandas(generate_chunk(start, stop, n_rows, boundaries, seed), preserve_index=False)
+            pacsv.write_csv(chunk, f, write_options=options)
+            if verbose:
+                print(f"  ...{stop:,}/{n_rows:,} rows ({time.perf_counter() - start_time:.0f}s)")
+    os.replace(tmp_path, path)
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generator log PaySim sintetis untuk benchmark")
+    parser.add_argument('scale', help=f"Jumlah baris: {', '.join(SCALES)} atau angka (mis. 250k)")
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    n_rows = parse_scale(args.scale)
+    generate_paysim(args.output, n_rows, args.seed, args.chunk_rows)
+    print(f"[SUCCESS] {n_rows:,} baris sintetis di: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,23 @@
-import pandas as pd
 import numpy as np
 import gc
 import os
+import sys
 
 # 1. Setup Path yang dinamis (Menyesuaikan otomatis dengan lokasi folder proyek)
 # Script ini akan mencari folder 'data/raw' dari folder utama proyek
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-RAW_DATA_PATH = os.path.join(BASE_DIR, 'data', 'raw', 'PS_20174392719_1491204439457_log.csv')
-PROCESSED_DATA_DIR = os.path.join(BASE_DIR, 'data', 'processed')
+
+# Modul bersama (artifacts, paths, dll.) berada di folder 'src'
+sys.path.append(os.path.join(BASE_DIR, 'src'))
+# Hasil sampling disimpan di 'Data_Processed/'; state velocity akhir dari full log
+# (models/velocity_state.pkl) dipakai lagi saat scoring online
+from paths import RAW_DATA_PATH, PROCESSED_DIR as PROCESSED_DATA_DIR, VELOCITY_STATE_PATH
+from artifacts import save_artifact
+from velocity import ACCOUNT_COLS, VelocityState, add_velocity_features
+from startup import lazy_import
+from instrumentation import instrumented_run, timer
+
+pd = lazy_import('pandas')
 
 # 2. Tipe data hemat RAM
 param_dtypes = {
@@ -24,7 +34,91 @@ param_dtypes = {
 cols_to_use = ['step', 'type', 'amount', 'oldbalanceOrg', 'newbalanceOrig', 
                'oldbalanceDest', 'newbalanceDest', 'isFraud']
 
-def start_phase_1(n_samples=20000):
+def reservoir_sample_by_class(chunks, label_col='isFraud', capacity=20000, seed=42):
+    # Reservoir per kelas dengan kunci acak (bottom-k): setiap baris diberi kunci
+    # uniform, dan tiap kelas hanya menyimpan `capacity` baris dengan kunci terkecil.
+    # Memori maksimum = 1 chunk + capacity baris per kelas, berapapun ukuran file.
+    rng = np.random.default_rng(seed)
+    reservoirs = {}
+    total_rows = 0
+
+    for chunk in chunks:
+        total_rows += len(chunk)
+        keys = rng.random(len(chunk))
+        labels = chunk[label_col].to_numpy()
+
+        for label in np.unique(labels):
+            mask = labels == label
+            part = chunk[mask]
+            part_keys = keys[mask]
+
+            if label in reservoirs:
+                kept, kept_keys = reservoirs[label]
+                part = pd.concat([kept, part], ignore_index=True)
+                part_keys = np.concatenate([kept_keys, part_keys])
+
+            if len(part) > capacity:
+                keep = np.argpartition(part_keys, capacity - 1)[:capacity]
+                part = part.iloc[keep].reset_index(drop=True)
+                part_keys = part_keys[keep]
+
+            reservoirs[label] = (part, part_keys)
+
+    return reservoirs, total_rows
+
+def _take_smallest_keys(reservoir, n):
+    # Subset dengan kunci terkecil dari reservoir bottom-k tetap merupakan sampel acak seragam
+    part, keys = reservoir
+    n = min(n, len(part))
+    order = np.argsort(keys, kind='stable')[:n]
+    return part.iloc[order]
+
+def build_balanced_sample_streaming(path, n_samples=20000, chunksize=500_000, seed=42, velocity_state=None):
+    # Membaca CSV mentah per potongan (chunk) dengan dtype hemat RAM yang sama
+    usecols = cols_to_use + ACCOUNT_COLS if velocity_state is not None else cols_to_use
+    chunks = pd.read_csv(path, dtype=param_dtypes, usecols=usecols, chunksize=chunksize)
+
+    if velocity_state is not None:
+        # Fitur velocity dihitung pada SELURUH log (sebelum sampling) dalam satu pass
+        # berurutan 'step'; ID akun dibuang setelahnya agar sampel tetap ringan
+        chunks = (c.drop(columns=ACCOUNT_COLS) for c in add_velocity_features(chunks, velocity_state))
+
+    reservoirs, total_rows = reservoir_sample_by_class(chunks, capacity=n_samples, seed=seed)
+    print(f"Total rows streamed: {total_rows:,}")
+
+    # Semua data Fraud disimpan (selama tidak melebihi n_samples), sisanya dari data Normal
+    fraud_df = _take_smallest_keys(reservoirs[1], n_samples) if 1 in reservoirs else pd.DataFrame()
+    needed_normal = n_samples - len(fraud_df)
+    normal_df = _take_smallest_keys(reservoirs[0], needed_normal) if 0 in reservoirs else pd.DataFrame()
+
+    balanced_df = pd.concat([fraud_df, normal_df]).sample(frac=1, random_state=seed).reset_index(drop=True)
+    # Kembalikan dtype 'type' ke category yang sama untuk semua chunk
+    balanced_df['type'] = balanced_df['type'].astype(str).astype('category')
+    return balanced_df
+
+def build_balanced_sample_in_memory(path, n_samples=20000, seed=42):
+    # Load data dengan efisiensi RAM tinggi
+    full_df = pd.read_csv(path, dtype=param_dtypes, usecols=cols_to_use)
+
+    print(f"Total rows found: {len(full_df):,}")
+
+    # Mengambil semua data Fraud (~8,213 baris)
+    fraud_df = full_df[full_df['isFraud'] == 1]
+
+    # Mengambil sisa sampel dari data Normal secara acak
+    needed_normal = n_samples - len(fraud_df)
+    normal_df = full_df[full_df['isFraud'] == 0].sample(n=needed_normal, random_state=seed)
+
+    # Gabungkan dan acak urutannya
+    balanced_df = pd.concat([fraud_df, normal_df]).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+    # Bersihkan RAM segera
+    del full_df, fraud_df, normal_df
+    gc.collect()
+    return balanced_df
+
+def start_phase_1(n_samples=20000, streaming=True, chunksize=500_000, seed=42, csv_export=False,
+                  with_velocity=False):
     print(f"Checking file at: {RAW_DATA_PATH}")
     
     if not os.path.exists(RAW_DATA_PATH):
@@ -32,31 +126,28 @@ def start_phase_1(n_samples=20000):
         return
 
     try:
-        print("Reading large dataset (Optimized)...")
-        # Load data dengan efisiensi RAM tinggi
-        full_df = pd.read_csv(RAW_DATA_PATH, dtype=param_dtypes, usecols=cols_to_use)
-        
-        print(f"Total rows found: {len(full_df):,}")
-        print("Creating a balanced sample (10k Fraud & 10k Normal)...")
-        
-        # Mengambil semua data Fraud (~8,213 baris)
-        fraud_df = full_df[full_df['isFraud'] == 1]
-        
-        # Mengambil sisa sampel dari data Normal secara acak
-        needed_normal = n_samples - len(fraud_df)
-        normal_df = full_df[full_df['isFraud'] == 0].sample(n=needed_normal, random_state=42)
-        
-        # Gabungkan dan acak urutannya
-        balanced_df = pd.concat([fraud_df, normal_df]).sample(frac=1, random_state=42).reset_index(drop=True)
-        
-        # Bersihkan RAM segera
-        del full_df, fraud_df, normal_df
-        gc.collect()
+        print(f"Creating a balanced sample ({n_samples:,} rows, all Fraud + random Normal)...")
+        if streaming:
+            # Mode streaming: RAM dibatasi oleh chunksize + n_samples, bukan ukuran file
+            print(f"Reading large dataset in chunks of {chunksize:,} rows (Streaming)...")
+            velocity_state = VelocityState() if with_velocity else None
+            with timer('clean.sample'):
+                balanced_df = build_balanced_sample_streaming(RAW_DATA_PATH, n_samples, chunksize, seed, velocity_state)
+            if velocity_state is not None:
+                with timer('clean.save_velocity'):
+                    velocity_state.save(VELOCITY_STATE_PATH)
+                print(f"Velocity state ({len(velocity_state.index):,} accounts) saved to: {VELOCITY_STATE_PATH}")
+        else:
+            print("Reading large dataset (Optimized)...")
+            with timer('clean.sample'):
+                balanced_df = build_balanced_sample_in_memory(RAW_DATA_PATH, n_samples, seed)
         
-        # Simpan hasil ke folder 'processed' agar tahap selanjutnya ringan (hanya 1-2 MB)
+        # Simpan hasil ke folder 'processed' dalam format kolumnar (dtype tetap terjaga)
+        # CSV hanya diekspor jika diminta (csv_export=True)
         os.makedirs(PROCESSED_DATA_DIR, exist_ok=True)
-        save_path = os.path.join(PROCESSED_DATA_DIR, 'balanced_sample_20k.csv')
-        balanced_df.to_csv(save_path, index=False)
+        with timer('clean.save'):
+            save_path = save_artifact(balanced_df, os.path.join(PROCESSED_DATA_DIR, 'balanced_sample_20k'),
+                                      csv_export=csv_export)
         
         print("-" * 30)
         print(f"[SUCCESS] Phase 1 Completed!")
@@ -71,4 +162,6 @@ def start_phase_1(n_samples=20000):
         print(f"[ERROR] An unexpected error occurred: {e}")
 
 if __name__ == "__main__":
-    start_phase_1(20000)
\ No newline at end of file
+    # FRAUD_INSTRUMENT=1 -> ringkasan waktu per bagian; FRAUD_PROFILE=<folder> -> stack folded
+    with instrumented_run('1_cleaning'):
+        start_phase_1(20000, with_velocity=True)
\ No newline at end of file
@@ -1,54 +1,82 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
+import sys
 
-# 1. Setup Path (Membaca data hasil sampling Tahap 1)
+# 1. Setup Path
+# Statistik dihitung dari SELURUH log mentah (proporsi fraud asli ~0.13%) secara streaming;
+# sampel seimbang Tahap 1 hanya dipakai bila log mentah tidak tersedia.
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DATA_PATH = os.path.join(BASE_DIR, 'data', 'processed', 'balanced_sample_20k.csv')
-SAVE_VIZ = os.path.join(BASE_DIR, 'visualizations')
+
+# Modul bersama (artifacts, paths, dll.) berada di folder 'src'
+sys.path.append(os.path.join(BASE_DIR, 'src'))
+from paths import RAW_DATA_PATH as RAW_PATH, SAMPLE_PATH as DATA_PATH, VIZ_DIR as SAVE_VIZ
+from artifacts import resolve_artifact
+from stream_stats import compute_eda_stats
+from instrumentation import instrumented_run, timer
 
 # Pastikan folder visualisasi tersedia
 os.makedirs(SAVE_VIZ, exist_ok=True)
 
-def run_strategic_eda():
-    print("Loading balanced dataset for EDA...")
-    df = pd.read_csv(DATA_PATH)
+def run_strategic_eda(chunksize=500_000, n_workers=1):
+    try:
+        source = RAW_PATH if os.path.exists(RAW_PATH) else resolve_artifact(DATA_PATH)[0]
+    except FileNotFoundError:
+        print(f"[ERROR] Data tidak ditemukan: {RAW_PATH} maupun {DATA_PATH}")
+        return
+    # Library plot baru di-import setelah data dipastikan ada
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    print(f"Computing streaming statistics over: {source}")
+    # Satu lintasan per chunk; statistik parsial digabung (bisa paralel dengan n_workers > 1)
+    with timer('eda.stats'):
+        stats = compute_eda_stats(source, chunksize=chunksize, n_workers=n_workers)
+    print(f"Statistik dihitung dari {stats.n_rows:,} transaksi.")
 
     # --- ANALISIS 1: Distribusi Fraud berdasarkan Tipe Transaksi ---
     plt.figure(figsize=(10, 6))
     # Melihat tipe transaksi apa yang paling sering disalahgunakan untuk Fraud
-    sns.countplot(data=df, x='type', hue='isFraud', palette='viridis')
+    counts = stats.type_counts.to_frame()
+    counts['isFraud'] = counts['isFraud'].map({0: 'Normal', 1: 'Fraud'})
+    sns.barplot(data=counts, x='type', y='count', hue='isFraud', hue_order=['Normal', 'Fraud'], palette='viridis')
+    plt.yscale('log') # Skala log: fraud hanya ~0.13% dari seluruh transaksi
     plt.title('Fraud vs Normal Transactions by Type')
     plt.xlabel('Transaction Type')
-    plt.ylabel('Count')
-    plt.legend(title='Is Fraud?', labels=['Normal', 'Fraud'])
+    plt.ylabel('Count (Log Scale)')
+    plt.legend(title='Is Fraud?')
     
     # Simpan grafik
-    plt.savefig(os.path.join(SAVE_VIZ, '1_fraud_by_type.png'))
+    with timer('eda.save_figure'):
+        plt.savefig(os.path.join(SAVE_VIZ, '1_fraud_by_type.png'))
     print("[SUCCESS] Grafik 1 disimpan: fraud_by_type.png")
     plt.show()
 
     # --- ANALISIS 2: Korelasi Antar Fitur (Heatmap) ---
     plt.figure(figsize=(12, 8))
-    # Hanya menghitung korelasi untuk kolom angka
-    numeric_df = df.select_dtypes(include=['float32', 'float64', 'int8', 'int16', 'int64'])
-    correlation = numeric_df.corr()
+    # Korelasi Pearson kolom angka dari kovarians streaming (populasi penuh)
+    correlation = stats.moments.correlation()
     sns.heatmap(correlation, annot=True, cmap='coolwarm', fmt='.2f')
     plt.title('Feature Correlation Heatmap')
     
-    plt.savefig(os.path.join(SAVE_VIZ, '2_correlation_heatmap.png'))
+    with timer('eda.save_figure'):
+        plt.savefig(os.path.join(SAVE_VIZ, '2_correlation_heatmap.png'))
     print("[SUCCESS] Grafik 2 disimpan: correlation_heatmap.png")
     plt.show()
 
     # --- ANALISIS 3: Boxplot Jumlah Transaksi (Amount) ---
-    plt.figure(figsize=(8, 6))
-    sns.boxplot(data=df, x='isFraud', y='amount', palette='Set2')
-    plt.yscale('log') # Gunakan skala log karena rentang angka 'amount' sangat besar
-    plt.title('Distribution of Transaction Amount (Log Scale)')
-    plt.xticks([0, 1], ['Normal', 'Fraud'])
+    fig, ax = plt.subplots(figsize=(8, 6))
+    # Kuartil & whisker dari quantile sketch (galat relatif 1%), outlier individual tidak disimpan
+    box_stats = [stats.amount_sketch[label].boxplot_stats(name)
+                 for label, name in ((0, 'Normal'), (1, 'Fraud')) if label in stats.amount_sketch]
+    boxes = ax.bxp(box_stats, showfliers=False, patch_artist=True)
+    for patch, color in zip(boxes['boxes'], sns.color_palette('Set2')):
+        patch.set_facecolor(color)
+    ax.set_yscale('log') # Gunakan skala log karena rentang angka 'amount' sangat besar
+    ax.set_title('Distribution of Transaction Amount (Log Scale)')
+    ax.set_xlabel('isFraud')
+    ax.set_ylabel('amount')
     
-    plt.savefig(os.path.join(SAVE_VIZ, '3_amount_distribution.png'))
+    with timer('eda.save_figure'):
+        plt.savefig(os.path.join(SAVE_VIZ, '3_amount_distribution.png'))
     print("[SUCCESS] Grafik 3 disimpan: amount_distribution.png")
     plt.show()
 
@@ -61,4 +89,5 @@ def run_strategic_eda():
     print("="*30)
 
 if __name__ == "__main__":
-    run_strategic_eda()
\ No newline at end of file
+    with instrumented_run('2_strategic_eda'):
+        run_strategic_eda()
\ No newline at end of file
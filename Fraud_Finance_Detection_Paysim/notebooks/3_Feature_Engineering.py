@@ -1,35 +1,77 @@
-import pandas as pd
 import os
+import sys
 
 # 1. Setup Path
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-INPUT_PATH = os.path.join(BASE_DIR, 'data', 'processed', 'balanced_sample_20k.csv')
-OUTPUT_PATH = os.path.join(BASE_DIR, 'data', 'processed', 'final_features_20k.csv')
 
-def run_feature_engineering():
-    print("Loading data for feature engineering...")
-    df = pd.read_csv(INPUT_PATH)
+# Modul bersama (artifacts, paths, dll.) berada di folder 'src'
+sys.path.append(os.path.join(BASE_DIR, 'src'))
+from paths import SAMPLE_PATH as INPUT_PATH, FEATURES_PATH as OUTPUT_PATH
+# Tabel fitur untuk seluruh log (training out-of-core di Tahap 4)
+from paths import RAW_DATA_PATH, FULL_FEATURES_PATH as FULL_OUTPUT_PATH
+from artifacts import save_artifact, load_artifact, resolve_artifact, ArtifactWriter, PAYSIM_DTYPES
+from features import add_engineered_columns
+from velocity import ACCOUNT_COLS, add_velocity_features
+from startup import lazy_import
+from instrumentation import instrumented_run, timed_iter, timer
+
+pd = lazy_import('pandas')
 
-    # 2. Membuat Fitur 'errorBalanceOrig'
-    # Detecting if the transaction amount matches the balance change
-    df['errorBalanceOrig'] = df['newbalanceOrig'] + df['amount'] - df['oldbalanceOrg']
+def run_feature_engineering(csv_export=False):
+    try:
+        resolve_artifact(INPUT_PATH)
+    except FileNotFoundError:
+        print(f"[ERROR] Sampel Tahap 1 tidak ditemukan di: {INPUT_PATH}")
+        return
 
-    # 3. Membuat Fitur 'errorBalanceDest'
-    # Detecting if the recipient's balance increased correctly
-    df['errorBalanceDest'] = df['oldbalanceDest'] + df['amount'] - df['newbalanceDest']
+    print("Loading data for feature engineering...")
+    # Membaca versi kolumnar (fallback ke CSV jika belum ada)
+    with timer('features.load'):
+        df = load_artifact(INPUT_PATH)
 
-    # 4. One-Hot Encoding for 'type'
-    # Converting text categories into numbers for the AI model
-    df = pd.get_dummies(df, columns=['type'], prefix='type')
+    # 2. Membuat Fitur 'errorBalanceOrig' dan 'errorBalanceDest'
+    # Detecting if the transaction amount matches the balance change (sender & recipient)
+    # 3. One-Hot Encoding for 'type' dengan kategori tetap
+    # Selalu menghasilkan 5 kolom type_* walaupun ada kategori yang tidak muncul di batch
+    with timer('features.engineer'):
+        df = add_engineered_columns(df)
 
     # 5. Save the final dataset
-    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-    df.to_csv(OUTPUT_PATH, index=False)
+    # Disimpan kolumnar: kolom one-hot tetap bool, bukan teks "True"/"False"
+    with timer('features.save'):
+        saved_path = save_artifact(df, OUTPUT_PATH, csv_export=csv_export)
     
     print("-" * 30)
     print(f"[SUCCESS] Feature Engineering Finished!")
-    print(f"Dataset stored at: {OUTPUT_PATH}")
+    print(f"Dataset stored at: {saved_path}")
+    print("-" * 30)
+
+def run_full_feature_engineering(chunksize=500_000, with_velocity=True):
+    # Versi streaming untuk seluruh log mentah: dibaca per chunk, fitur ditambahkan,
+    # lalu ditulis bertahap ke satu file kolumnar. RAM dibatasi oleh chunksize.
+    if not os.path.exists(RAW_DATA_PATH):
+        print(f"[ERROR] File log mentah tidak ditemukan di: {RAW_DATA_PATH}")
+        return
+
+    usecols = list(PAYSIM_DTYPES) + (ACCOUNT_COLS if with_velocity else [])
+    chunks = pd.read_csv(RAW_DATA_PATH, dtype=PAYSIM_DTYPES, usecols=usecols, chunksize=chunksize)
+    if with_velocity:
+        chunks = (c.drop(columns=ACCOUNT_COLS) for c in add_velocity_features(chunks))
+
+    print(f"Streaming raw log in chunks of {chunksize:,} rows...")
+    with ArtifactWriter(FULL_OUTPUT_PATH) as writer:
+        # read_chunk mencakup parsing CSV + fitur velocity (generator berantai)
+        for chunk in timed_iter('features.read_chunk', chunks):
+            with timer('features.engineer'):
+                chunk = add_engineered_columns(chunk)
+            with timer('features.write'):
+                writer.write(chunk)
+
+    print("-" * 30)
+    print(f"[SUCCESS] Full Feature Table Finished! ({writer.rows_written:,} rows)")
+    print(f"Dataset stored at: {writer.path}")
     print("-" * 30)
 
 if __name__ == "__main__":
-    run_feature_engineering()
\ No newline at end of file
+    with instrumented_run('3_feature_engineering'):
+        run_feature_engineering()
\ No newline at end of file
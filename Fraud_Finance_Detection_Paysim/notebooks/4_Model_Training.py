@@ -1,30 +1,165 @@
-import pandas as pd
+import numpy as np
 import os
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
-import joblib
+import sys
+import time
 
 # 1. Setup Path
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DATA_PATH = os.path.join(BASE_DIR, 'data', 'processed', 'final_features_20k.csv')
-MODEL_SAVE_PATH = os.path.join(BASE_DIR, 'models', 'fraud_model.pkl')
 
-def run_model_training():
-    if not os.path.exists(DATA_PATH):
+# Modul bersama (artifacts, paths, dll.) berada di folder 'src'
+sys.path.append(os.path.join(BASE_DIR, 'src'))
+from paths import FEATURES_PATH as DATA_PATH, MODEL_PATH as MODEL_SAVE_PATH
+# Mode out-of-core: tabel fitur seluruh log (dibuat oleh Tahap 3, run_full_feature_engineering)
+from paths import FULL_FEATURES_PATH as FULL_DATA_PATH, FULL_MODEL_PATH as FULL_MODEL_SAVE_PATH
+from artifacts import load_artifact, load_table, iter_artifact_batches, resolve_artifact
+from features import FraudFeatureTransformer, TARGET_COL, save_transformer
+from drift import build_reference
+from resources import peak_rss_mb
+from instrumentation import instrumented_run, timer
+# sklearn, joblib & registry di-import di dalam fungsi, setelah pengecekan file input
+
+def print_evaluation(y_test, y_pred, y_prob=None, elapsed=None):
+    from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, average_precision_score
+
+    print("\n" + "="*35)
+    print("HASIL EVALUASI KECERDASAN AI")
+    print("="*35)
+    print(f"Akurasi: {accuracy_score(y_test, y_pred)*100:.2f}%")
+    if y_prob is not None:
+        # PR-AUC lebih jujur dari akurasi untuk data fraud yang sangat tidak seimbang
+        print(f"PR-AUC (Average Precision): {average_precision_score(y_test, y_prob):.4f}")
+    if elapsed is not None:
+        print(f"Waktu training: {elapsed:.1f} detik | Puncak RAM (RSS): {peak_rss_mb():,.0f} MB")
+    print("\nConfusion Matrix (Benar vs Salah Tebak):")
+    print(confusion_matrix(y_test, y_pred))
+    print("\nLaporan Detail:")
+    print(classification_report(y_test, y_pred))
+    print("="*35)
+
+def evaluation_metrics(y_test, y_pred, y_prob=None):
+    from sklearn.metrics import accuracy_score, average_precision_score
+
+    metrics = {'accuracy': accuracy_score(y_test, y_pred)}
+    if y_prob is not None:
+        metrics['pr_auc'] = average_precision_score(y_test, y_prob)
+    return metrics
+
+def save_model(model, transformer, model_path, metrics=None, data_path=None, drift_reference=None):
+    import joblib
+    from model_registry import ModelRegistry
+
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    with timer('train.save'):
+        joblib.dump(model, model_path)
+    transformer_file = save_transformer(transformer, model_path)
+    print(f"\n[SUCCESS] Model AI berhasil disimpan di: {model_path}")
+    print(f"[SUCCESS] Transformer fitur disimpan di: {transformer_file}")
+
+    # Versi berversi + array forest untuk pemuatan mmap (dashboard, scoring service, Tahap 5)
+    registry = ModelRegistry()
+    name = os.path.splitext(os.path.basename(model_path))[0]
+    with timer('train.register'):
+        version = registry.register(model, transformer, name, metrics=metrics, data_path=data_path,
+                                    source_path=model_path,
+                                    drift_reference=drift_reference.to_dict() if drift_reference is not None else None)
+    print(f"[SUCCESS] Registry: {name} v{version} di {registry.version_dir(name, version)}")
+
+def load_feature_matrix(data_path, transformer, batch_size=1_000_000, max_rows=None, dtype=np.float64):
+    # Membaca tabel fitur per batch langsung ke satu matriks yang dialokasikan sekali.
+    # Tidak pernah ada DataFrame penuh di memori; hanya 1 batch + matriks akhir.
+    # float64 dipilih agar HistGradientBoosting tidak membuat salinan internal.
+    n_rows = load_table(data_path, columns=[TARGET_COL]).num_rows
+    if max_rows is not None:
+        n_rows = min(n_rows, max_rows)
+
+    X = np.empty((n_rows, transformer.n_features), dtype=dtype)
+    y = np.empty(n_rows, dtype=np.int8)
+    columns = list(transformer.feature_names) + [TARGET_COL]
+
+    filled = 0
+    for batch in iter_artifact_batches(data_path, columns=columns, batch_size=batch_size):
+        take = min(len(batch), n_rows - filled)
+        X[filled:filled + take] = transformer.transform(batch.iloc[:take])
+        y[filled:filled + take] = batch[TARGET_COL].to_numpy()[:take]
+        filled += take
+        print(f"  ...{filled:,}/{n_rows:,} rows loaded")
+        if filled >= n_rows:
+            break
+    return X, y
+
+def run_out_of_core_training(data_path=FULL_DATA_PATH, model_path=FULL_MODEL_SAVE_PATH,
+                             batch_size=1_000_000, max_rows=None, test_fraction=0.2,
+                             max_iter=200, learning_rate=0.1, max_leaf_nodes=31):
+    # Mode skala besar: seluruh log yang tidak seimbang (tanpa undersampling),
+    # gradient boosting berbasis histogram dengan pembobotan kelas.
+    try:
+        resolve_artifact(data_path)
+    except FileNotFoundError:
+        print(f"[ERROR] File tidak ditemukan di: {data_path}")
+        return
+    import pandas as pd
+    from sklearn.ensemble import HistGradientBoostingClassifier
+
+    start = time.perf_counter()
+    print("Streaming full feature table in batches...")
+    sample = next(iter_artifact_batches(data_path, batch_size=1000))
+    transformer = FraudFeatureTransformer().fit(sample)
+    with timer('train.load'):
+        X, y = load_feature_matrix(data_path, transformer, batch_size=batch_size, max_rows=max_rows)
+    print(f"Fitur yang digunakan: {transformer.feature_names}")
+    print(f"Rasio fraud: {y.mean()*100:.3f}% dari {len(y):,} transaksi")
+
+    # Split berdasarkan waktu: log PaySim berurutan 'step', jadi 20% baris terakhir
+    # adalah jam-jam paling akhir (tanpa kebocoran dari masa depan, tanpa salinan data)
+    cut = int(len(y) * (1 - test_fraction))
+    X_train, X_test, y_train, y_test = X[:cut], X[cut:], y[:cut], y[cut:]
+
+    print(f"Sedang melatih AI (HistGradientBoosting) dengan {len(X_train):,} data transaksi...")
+    model = HistGradientBoostingClassifier(max_iter=max_iter, learning_rate=learning_rate,
+                                           max_leaf_nodes=max_leaf_nodes, class_weight='balanced',
+                                           early_stopping=True, random_state=42)
+    with timer('train.fit'):
+        model.fit(X_train, y_train)
+
+    with timer('model.predict'):
+        y_prob = model.predict_proba(X_test)[:, 1]
+        y_pred = model.classes_.take((y_prob >= 0.5).astype(int))
+    print_evaluation(y_test, y_pred, y_prob, elapsed=time.perf_counter() - start)
+
+    # Referensi drift: histogram fitur data latih (per batch, tanpa DataFrame penuh) + skor data uji
+    with timer('train.drift_reference'):
+        batches = (pd.DataFrame(X_train[i:i + batch_size], columns=transformer.feature_names)
+                   for i in range(0, len(X_train), batch_size))
+        reference = build_reference(batches, y_prob)
+    save_model(model, transformer, model_path, evaluation_metrics(y_test, y_pred, y_prob), data_path, reference)
+    return model
+
+def run_model_training(mode='forest', n_estimators=50, max_depth=None, min_samples_leaf=1, **kwargs):
+    if mode == 'hist':
+        return run_out_of_core_training(**kwargs)
+
+    try:
+        resolve_artifact(DATA_PATH)
+    except FileNotFoundError:
         print(f"[ERROR] File tidak ditemukan di: {DATA_PATH}")
         return
+    from sklearn.model_selection import train_test_split
+    from sklearn.ensemble import RandomForestClassifier
+
+    start = time.perf_counter()
 
     print("Loading final features...")
-    df = pd.read_csv(DATA_PATH)
+    with timer('train.load'):
+        df = load_artifact(DATA_PATH)
 
-    # 2. Perbaikan Logika Pemilihan Fitur (X)
-    # Kita hanya mengambil kolom yang bertipe angka dan bukan kolom target 'isFraud'
-    # Cara ini jauh lebih aman dari error 'Column Not Found'
-    X = df.select_dtypes(include=['number']).drop(columns=['isFraud'], errors='ignore')
-    y = df['isFraud']
+    # 2. Pemilihan Fitur (X) lewat transformer dengan urutan kolom yang dibekukan
+    # Tidak lagi bergantung pada dtype hasil tebakan pandas (select_dtypes)
+    transformer = FraudFeatureTransformer().fit(df)
+    with timer('features.transform'):
+        X = transformer.transform(df)
+    y = df[TARGET_COL].to_numpy()
 
-    print(f"Fitur yang digunakan: {list(X.columns)}")
+    print(f"Fitur yang digunakan: {transformer.feature_names}")
 
     # 3. Split Data (80% Latihan, 20% Ujian)
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
@@ -32,27 +167,27 @@ def run_model_training():
     print(f"Sedang melatih AI dengan {len(X_train)} data transaksi...")
     
     # 4. Melatih Model (Random Forest)
-    # n_estimators=50 agar lebih cepat dan hemat RAM di laptop 4GB
-    model = RandomForestClassifier(n_estimators=50, random_state=42, n_jobs=-1)
-    model.fit(X_train, y_train)
+    # n_estimators=50 (default) agar lebih cepat dan hemat RAM di laptop 4GB
+    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth,
+                                   min_samples_leaf=min_samples_leaf, random_state=42, n_jobs=-1)
+    with timer('train.fit'):
+        model.fit(X_train, y_train)
 
     # 5. Evaluasi Hasil Ujian AI
-    y_pred = model.predict(X_test)
-    
-    print("\n" + "="*35)
-    print("HASIL EVALUASI KECERDASAN AI")
-    print("="*35)
-    print(f"Akurasi: {accuracy_score(y_test, y_pred)*100:.2f}%")
-    print("\nConfusion Matrix (Benar vs Salah Tebak):")
-    print(confusion_matrix(y_test, y_pred))
-    print("\nLaporan Detail:")
-    print(classification_report(y_test, y_pred))
-    print("="*35)
+    with timer('model.predict'):
+        y_prob = model.predict_proba(X_test)[:, 1]
+        y_pred = model.predict(X_test)
+    print_evaluation(y_test, y_pred, y_prob, elapsed=time.perf_counter() - start)
+
+    # 6. Referensi drift: histogram fitur sampel training + distribusi skor pada data uji
+    with timer('train.drift_reference'):
+        reference = build_reference(df, y_prob)
 
-    # 6. Simpan "Otak" AI ke folder models
-    os.makedirs(os.path.dirname(MODEL_SAVE_PATH), exist_ok=True)
-    joblib.dump(model, MODEL_SAVE_PATH)
-    print(f"\n[SUCCESS] Model AI berhasil disimpan di: {MODEL_SAVE_PATH}")
+    # 7. Simpan "Otak" AI ke folder models
+    save_model(model, transformer, MODEL_SAVE_PATH, evaluation_metrics(y_test, y_pred, y_prob), DATA_PATH, reference)
+    return model
 
 if __name__ == "__main__":
-    run_model_training()
\ No newline at end of file
+    # Gunakan run_model_training(mode='hist') untuk training di seluruh log (out-of-core)
+    with instrumented_run('4_model_training'):
+        run_model_training()
\ No newline at end of file
@@ -1,30 +1,47 @@
-import pandas as pd
-import joblib
 import os
+import sys
 
 # 1. Setup Path
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-MODEL_PATH = os.path.join(BASE_DIR, 'models', 'fraud_model.pkl')
+
+# Modul bersama (artifacts, paths, dll.) berada di folder 'src'
+sys.path.append(os.path.join(BASE_DIR, 'src'))
+from paths import MODEL_PATH
 # Kita gunakan data test yang sudah ada untuk simulasi
-DATA_PATH = os.path.join(BASE_DIR, 'data', 'processed', 'final_features_20k.csv')
+from paths import FEATURES_PATH as DATA_PATH
+from artifacts import load_artifact, resolve_artifact
+# Scorer dari registry (array forest memory-mapped) bila tersedia, selain itu joblib
+from model_registry import load_scorer
+from startup import lazy_import
+from instrumentation import instrumented_run, timer
+
+pd = lazy_import('pandas')
 
 def run_prediction_test():
     # Cek apakah model sudah ada
     if not os.path.exists(MODEL_PATH):
         print("[ERROR] Model AI tidak ditemukan! Jalankan Tahap 4 terlebih dahulu.")
         return
+    try:
+        resolve_artifact(DATA_PATH)
+    except FileNotFoundError:
+        print(f"[ERROR] Data simulasi tidak ditemukan di: {DATA_PATH}")
+        return
 
     print("Memuat model AI dan data simulasi...")
-    model = joblib.load(MODEL_PATH)
-    df = pd.read_csv(DATA_PATH).sample(10, random_state=7) # Ambil 10 sampel acak
+    with timer('test.load'):
+        scorer, transformer = load_scorer(MODEL_PATH)
+        df = load_artifact(DATA_PATH).sample(10, random_state=7) # Ambil 10 sampel acak
 
-    # 2. Siapkan data untuk prediksi (sama dengan fitur di Tahap 4)
-    # Kita hanya mengambil kolom fitur, tanpa kolom target 'isFraud'
-    X_test = df.select_dtypes(include=['number']).drop(columns=['isFraud'], errors='ignore')
+    # 2. Siapkan data untuk prediksi (transformer yang sama dengan Tahap 4)
+    # Urutan kolom dibekukan, target 'isFraud' tidak pernah ikut sebagai fitur
+    with timer('features.transform'):
+        X_test = transformer.transform(df)
     
     # 3. Melakukan Prediksi
-    predictions = model.predict(X_test)
-    probabilities = model.predict_proba(X_test)[:, 1] # Kemungkinan Fraud dalam persen
+    # Satu kali traversal forest untuk probabilitas dan label sekaligus
+    with timer('model.predict'):
+        probabilities, predictions = scorer.score(X_test) # Kemungkinan Fraud dalam persen
 
     # 4. Tampilkan Hasil
     results = pd.DataFrame({
@@ -42,4 +59,5 @@ def run_prediction_test():
     print("\nKeterangan: Confidence Score menunjukkan seberapa yakin AI bahwa itu adalah Fraud.")
 
 if __name__ == "__main__":
-    run_prediction_test()
\ No newline at end of file
+    with instrumented_run('5_model_testing'):
+        run_prediction_test()
\ No newline at end of file
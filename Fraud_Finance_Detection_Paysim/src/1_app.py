@@ -1,8 +1,17 @@
 import streamlit as st
-import pandas as pd
-import joblib
-import plotly.express as px
-import os
+from startup import StartupProfile, lazy_import, path_stamp, warm_up
+from instrumentation import METRICS, SamplingProfiler, collect, enable, timer
+
+# Hanya streamlit + stdlib yang di-import sebelum render pertama; plotly & modul data
+# (pandas, pyarrow, numba) dimuat saat pertama dipakai / di thread warm-up
+profile = StartupProfile()
+px = lazy_import('plotly.express')
+
+# Waktu per bagian (load, agregasi, render, query) untuk rerun ini -> panel "Performance";
+# profiler sampling hanya jalan bila dicentang di panel tersebut (berlaku mulai rerun berikutnya)
+enable()
+run_metrics = collect()
+profiler = SamplingProfiler().start() if st.session_state.get('profile_reruns') else None
 
 # --- 1. SETTING HALAMAN & TEMA (DESAIN MODERN) ---
 st.set_page_config(page_title="Financial Fraud Dashboard", layout="wide", initial_sidebar_state="expanded")
@@ -61,28 +70,55 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 # --- 2. LOGIKA PATH OTOMATIS (Penting agar tidak error) ---
-current_dir = os.path.dirname(os.path.abspath(__file__))
-data_path = os.path.join(current_dir, 'data', 'processed', 'final_features_20k.csv')
-model_path = os.path.join(current_dir, 'models', 'fraud_model.pkl')
+# Data & model dibaca dari folder proyek ('Data_Processed/', 'models/'), bukan dari 'src/'
+from paths import FEATURES_PATH as data_path, MODEL_PATH as model_path
+
+# --- 3. HEADER (dirender sebelum data & model selesai dimuat) ---
+st.title("Financial Fraud Analysis Dashboard")
+st.markdown("<p style='color:#A0A0A0;'>Real-time insights into suspicious financial transactions.</p>", unsafe_allow_html=True)
+profile.mark('first render')
+
+# --- 4. LOAD PREDIKSI & AGREGAT (Menggunakan cache untuk performa) ---
+# Scoring + groupby dikerjakan sekali per (data, model) oleh dashboard_cache;
+# rerun karena interaksi widget hanya membaca agregat kecil dari cache.
+@st.cache_resource
+def start_warm_up(stamp):
+    # Dimulai sekali per versi file data/model (stamp = os.stat saja, tanpa import berat)
+    # di thread latar; sesi berikutnya langsung mendapat hasil yang sudah jadi
+    def load():
+        from dashboard_cache import dashboard_key, load_dashboard_cache
+        return dashboard_key(data_path, model_path), load_dashboard_cache(data_path, model_path)
+    return warm_up(load)
+
+@st.cache_resource
+def load_explorer(cache_key, scored_path):
+    # Indeks explorer (bitmap tipe/fraud, indeks terurut step & amount) di-mmap sekali per cache
+    from explorer import TransactionExplorer
+    return TransactionExplorer(scored_path)
 
-# --- 3. LOAD DATA & MODEL (Menggunakan cache untuk performa) ---
 @st.cache_data
-def load_assets():
-    try:
-        df = pd.read_csv(data_path)
-        model = joblib.load(model_path)
-        return df, model
-    except FileNotFoundError as e:
-        st.error(f"Error loading file: {e}. Pastikan `app.py` ada di folder utama proyek dan jalur file sudah benar.")
-        st.stop() # Hentikan eksekusi jika file tidak ditemukan
-
-df, model = load_assets()
-
-# --- 4. PREDIKSI UNTUK DATA PADA DASHBOARD ---
-# Ini penting agar dashboard memiliki kolom 'prediction' dan 'probability'
-X_data = df.select_dtypes(include=['number']).drop(columns=['isFraud'], errors='ignore')
-df['prediction'] = model.predict(X_data)
-df['probability'] = model.predict_proba(X_data)[:, 1] # Probability of being fraud
+def run_window_query(cache_key, scored_path, window):
+    # Agregasi langsung di atas scored.feather (pushdown + multi-thread), hasilnya kecil
+    from query_engine import QueryEngine
+    engine = QueryEngine({'scored': scored_path})
+    return engine.fraud_amount_by_type_window('scored', window, label_col='prediction')
+
+try:
+    with st.spinner("Loading predictions..."), timer('app.load'):
+        cache_key, dashboard = start_warm_up(path_stamp(data_path, model_path)).result()
+except FileNotFoundError as e:
+    start_warm_up.clear() # Jangan simpan kegagalan: coba lagi di rerun berikutnya
+    st.error(f"Error loading file: {e}. Pastikan `app.py` ada di folder utama proyek dan jalur file sudah benar.")
+    if profiler is not None:
+        profiler.stop()
+    st.stop() # Hentikan eksekusi jika file tidak ditemukan
+profile.mark('data ready')
+
+from dashboard_cache import kpis
+from features import TYPE_CATEGORIES
+
+# Grafik sudah di-bin / di-downsample di server: hanya array kecil yang dikirim ke browser
+charts = dashboard['charts']
 
 # --- 5. SIDEBAR ---
 with st.sidebar:
@@ -97,24 +133,20 @@ with st.sidebar:
         index=1 # Default: Fraudulent Only
     )
     
-    if filter_type == "Fraudulent Only":
-        filtered_df = df[df['prediction'] == 1].copy()
-    else:
-        filtered_df = df.copy()
+    # Semua grafik hanya memakai transaksi fraud; filter memengaruhi KPI & tabel
+    with timer('app.aggregate'):
+        summary = kpis(dashboard, filter_type)
 
     st.markdown("---")
     st.info("Dashboard ini menampilkan deteksi fraud menggunakan model Random Forest.")
 
-# --- 6. HEADER & KPI (Sesuai Layout Google) ---
-st.title("Financial Fraud Analysis Dashboard")
-st.markdown("<p style='color:#A0A0A0;'>Real-time insights into suspicious financial transactions.</p>", unsafe_allow_html=True)
-
+# --- 6. KPI (Sesuai Layout Google) ---
 st.write("") # Spacer
 
-total_transactions = len(filtered_df)
-total_fraud = filtered_df[filtered_df['prediction'] == 1].shape[0]
-percentage_fraud = (total_fraud / total_transactions) * 100 if total_transactions > 0 else 0
-total_fraud_amount = filtered_df[filtered_df['prediction'] == 1]['amount'].sum()
+total_transactions = summary['total_transactions']
+total_fraud = summary['total_fraud']
+percentage_fraud = summary['percentage_fraud']
+total_fraud_amount = summary['total_fraud_amount']
 
 col1, col2, col3 = st.columns(3)
 with col1:
@@ -132,25 +164,22 @@ row_viz1_col1, row_viz1_col2 = st.columns(2)
 
 with row_viz1_col1:
     st.markdown("#### Fraud by Transaction Type")
-    # Membuat kolom 'type' kembali dari one-hot encoding
-    type_columns = [col for col in df.columns if col.startswith('type_')]
-    df_temp = filtered_df.copy()
-    df_temp['transaction_type'] = 'Unknown'
-    for col in type_columns:
-        df_temp.loc[df_temp[col] == 1, 'transaction_type'] = col.replace('type_', '')
-    
-    fraud_by_type = df_temp[df_temp['prediction'] == 1].groupby('transaction_type').size().reset_index(name='count')
-    fig_type = px.bar(fraud_by_type, y='transaction_type', x='count', 
-                      orientation='h', title='Fraudulent Transaction Types',
-                      color_discrete_sequence=['#00D1B2'], template="plotly_dark")
-    st.plotly_chart(fig_type, use_container_width=True)
+    with timer('app.aggregate'):
+        by_type = dashboard['by_type']
+        fraud_by_type = by_type[by_type['flagged'] > 0].rename(columns={'type': 'transaction_type', 'flagged': 'count'})
+    with timer('app.render.charts'):
+        fig_type = px.bar(fraud_by_type, y='transaction_type', x='count', 
+                          orientation='h', title='Fraudulent Transaction Types',
+                          color_discrete_sequence=['#00D1B2'], template="plotly_dark")
+        st.plotly_chart(fig_type, use_container_width=True)
 
 with row_viz1_col2:
     st.markdown("#### Fraudulent Trend Over Steps (Hours)")
-    fraud_trend = filtered_df[filtered_df['prediction'] == 1].groupby('step')['amount'].sum().reset_index()
-    fig_trend = px.line(fraud_trend, x='step', y='amount', title='Total Fraud Amount by Step',
-                        color_discrete_sequence=['#FFC107'], template="plotly_dark") # Amber color
-    st.plotly_chart(fig_trend, use_container_width=True)
+    with timer('app.render.charts'):
+        fraud_trend = charts['amount_trend'].rename(columns={'flagged_amount': 'amount'})
+        fig_trend = px.line(fraud_trend, x='step', y='amount', title='Total Fraud Amount by Step',
+                            color_discrete_sequence=['#FFC107'], template="plotly_dark") # Amber color
+        st.plotly_chart(fig_trend, use_container_width=True)
 
 st.write("") # Spacer
 
@@ -159,18 +188,23 @@ with row_viz2_col1:
     st.markdown("#### Distribution of Balance Errors in Fraud Cases")
     # Menggunakan errorBalanceOrig dan errorBalanceDest
     # Menunjukkan seberapa besar manipulasi saldo yang terjadi
-    fraud_errors = filtered_df[filtered_df['prediction'] == 1]
-    fig_error_orig = px.histogram(fraud_errors, x='errorBalanceOrig', nbins=50, 
-                                  title='Error in Sender Balance (Original)',
-                                  color_discrete_sequence=['#E91E63'], template="plotly_dark") # Pink color
-    st.plotly_chart(fig_error_orig, use_container_width=True)
+    with timer('app.render.charts'):
+        fig_error_orig = px.bar(charts['error_orig_hist'], x='bin_center', y='count',
+                                title='Error in Sender Balance (Original)',
+                                labels={'bin_center': 'errorBalanceOrig'},
+                                color_discrete_sequence=['#E91E63'], template="plotly_dark") # Pink color
+        fig_error_orig.update_layout(bargap=0)
+        st.plotly_chart(fig_error_orig, use_container_width=True)
     
 with row_viz2_col2:
     st.markdown("#### Fraud Probability Distribution")
-    fig_prob = px.histogram(filtered_df[filtered_df['prediction'] == 1], x='probability', nbins=20,
-                            title='AI Confidence in Fraud Detection',
-                            color_discrete_sequence=['#1E88E5'], template="plotly_dark") # Blue color
-    st.plotly_chart(fig_prob, use_container_width=True)
+    with timer('app.render.charts'):
+        fig_prob = px.bar(charts['probability_hist'], x='bin_center', y='count',
+                          title='AI Confidence in Fraud Detection',
+                          labels={'bin_center': 'probability'},
+                          color_discrete_sequence=['#1E88E5'], template="plotly_dark") # Blue color
+        fig_prob.update_layout(bargap=0)
+        st.plotly_chart(fig_prob, use_container_width=True)
 
 
 st.write("") # Spacer
@@ -179,21 +213,76 @@ st.write("") # Spacer
 st.subheader("Recent Suspicious Transactions")
 st.markdown("<p style='color:#A0A0A0;'>Details of transactions flagged by the AI model.</p>", unsafe_allow_html=True)
 
-# Menampilkan kolom-kolom yang relevan
-display_cols = ['step', 'type', 'amount', 'oldbalanceOrg', 'newbalanceOrig', 
-                'oldbalanceDest', 'newbalanceDest', 'errorBalanceOrig', 'errorBalanceDest', 
-                'prediction', 'probability']
-
-# Menyesuaikan 'type' agar muncul nama aslinya, bukan dummy
-df_for_display = filtered_df.copy()
-type_map = {
-    'type_CASH_IN': 'CASH_IN', 'type_CASH_OUT': 'CASH_OUT',
-    'type_DEBIT': 'DEBIT', 'type_PAYMENT': 'PAYMENT', 'type_TRANSFER': 'TRANSFER'
-}
-# Ini akan membuat kolom 'type' yang bisa dibaca manusia
-df_for_display['type'] = df_for_display[type_columns].idxmax(axis=1).map(type_map).fillna('UNKNOWN')
-
-st.dataframe(df_for_display[display_cols].sort_values(by='probability', ascending=False).head(20), use_container_width=True)
+# Explorer berindeks: filter + paginasi di server, hanya satu halaman yang diambil dari tabel
+explorer = load_explorer(cache_key, dashboard['scored_path'])
+steps = dashboard['by_step']['step']
+f1, f2, f3, f4 = st.columns([2, 2, 2, 1])
+with f1:
+    selected_types = st.multiselect("Type", TYPE_CATEGORIES)
+with f2:
+    step_range = st.slider("Step range", int(steps.min()), int(steps.max()), (int(steps.min()), int(steps.max())))
+with f3:
+    min_amount = st.number_input("Min amount", min_value=0.0, value=0.0, step=1000.0)
+    max_amount = st.number_input("Max amount (0 = no limit)", min_value=0.0, value=0.0, step=1000.0)
+with f4:
+    page_size = st.selectbox("Rows", (20, 50, 100))
+
+amount_range = (min_amount or None, max_amount or None)
+with timer('app.explorer.query'):
+    n_matches = explorer.count(selected_types, step_range, amount_range, flagged_only=filter_type == "Fraudulent Only")
+n_pages = max(1, -(-n_matches // page_size))
+page = st.number_input(f"Page (of {n_pages:,}, {n_matches:,} matches)", min_value=1, max_value=n_pages, value=1) - 1
+with timer('app.explorer.query'):
+    page_df, _ = explorer.query(selected_types, step_range, amount_range,
+                                flagged_only=filter_type == "Fraudulent Only", page=page, page_size=page_size)
+with timer('app.render.table'):
+    st.dataframe(page_df, use_container_width=True)
+
+with st.expander("Ad-hoc Query: Fraud Amount by Type per Step Window"):
+    window = st.slider("Window size (steps)", 1, 168, 24)
+    with timer('app.window_query'):
+        window_df = run_window_query(cache_key, dashboard['scored_path'], window)
+    st.dataframe(window_df, use_container_width=True)
+
+with st.expander("Data Drift vs Training Data"):
+    # PSI/KS terhadap referensi training model, dihitung dari histogram di cache (tanpa baris mentah)
+    drift = dashboard['drift']
+    if drift is None:
+        st.info("Model ini belum punya referensi drift. Latih ulang model (Tahap 4) untuk mengaktifkannya.")
+    else:
+        st.caption(f"Jendela terakhir = {drift['window_steps']} step mulai step "
+                   f"{drift['latest_window'] * drift['window_steps']}. PSI < 0.1 stabil, 0.1-0.25 bergeser, > 0.25 drift.")
+        d1, d2 = st.columns(2)
+        with d1:
+            st.markdown("**Latest window**")
+            st.dataframe(drift['window_report'].round(4), use_container_width=True)
+        with d2:
+            st.markdown("**All data**")
+            st.dataframe(drift['total_report'].round(4), use_container_width=True)
+        timeline = drift['timeline']
+        if timeline is not None and len(timeline) > 1:
+            with timer('app.render.charts'):
+                psi_long = timeline.melt(id_vars=['window', 'start_step', 'rows'], var_name='feature', value_name='psi')
+                fig_drift = px.line(psi_long, x='start_step', y='psi', color='feature', title='PSI per Step Window',
+                                    labels={'start_step': 'step'}, template="plotly_dark")
+                st.plotly_chart(fig_drift, use_container_width=True)
+
+profile.mark('page complete')
+with st.sidebar.expander("Startup profile"):
+    # Waktu sejak awal skrip (render pertama, data siap) + durasi import modul yang dimuat lazy
+    st.dataframe(profile.report(), use_container_width=True)
+
+with st.sidebar.expander("Performance (this rerun)"):
+    # Ke mana waktu rerun ini habis; build cache di thread warm-up tercatat di total proses
+    st.dataframe(run_metrics.report(), use_container_width=True)
+    st.checkbox("Sampling profiler", key='profile_reruns', help="Rekam stack Python setiap 5 ms mulai rerun berikutnya")
+    if profiler is not None:
+        profiler.stop()
+        st.dataframe(profiler.top(), use_container_width=True)
+        st.download_button("Download folded stacks", profiler.folded(), file_name='1_app.folded',
+                           help="Format flamegraph.pl / speedscope")
+    st.caption("Total proses (termasuk warm-up)")
+    st.dataframe(METRICS.report(), use_container_width=True)
 
 st.markdown("---")
 st.caption("AI Model developed by [Your Name] for Financial Fraud Detection.")
\ No newline at end of file
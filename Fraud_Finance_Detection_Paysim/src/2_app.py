@@ -1,8 +1,15 @@
 import streamlit as st
-import pandas as pd
-import joblib
-import plotly.express as px
-import os
+from startup import StartupProfile, lazy_import, path_stamp, warm_up
+from instrumentation import METRICS, SamplingProfiler, collect, enable, timer
+
+# plotly & modul data baru dimuat setelah header tampil (lihat startup.py)
+profile = StartupProfile()
+px = lazy_import('plotly.express')
+
+# Waktu per bagian untuk rerun ini (panel "Performance"), profiler sampling opsional
+enable()
+run_metrics = collect()
+profiler = SamplingProfiler().start() if st.session_state.get('profile_reruns') else None
 
 # --- 1. CONFIG HALAMAN ---
 st.set_page_config(page_title="Financial Fraud Dashboard", layout="wide")
@@ -67,42 +74,51 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 # --- 3. LOAD DATA & MODEL ---
-current_dir = os.path.dirname(os.path.abspath(__file__))
-data_path = os.path.join(current_dir, 'data', 'processed', 'final_features_20k.csv')
-model_path = os.path.join(current_dir, 'models', 'fraud_model.pkl')
-
-@st.cache_data
-def load_data():
-    df = pd.read_csv(data_path)
-    model = joblib.load(model_path)
-    # Re-map transaction type
-    type_cols = [c for c in df.columns if 'type_' in c]
-    df['Category'] = df[type_cols].idxmax(axis=1).str.replace('type_', '')
-    return df, model
-
-df, model = load_data()
-
-# --- 4. PREDIKSI ---
-X = df.select_dtypes(include=['number']).drop(columns=['isFraud'], errors='ignore')
-df['is_fraud_pred'] = model.predict(X)
-df['prob'] = model.predict_proba(X)[:, 1]
-
-# Ambil hanya data yang terdeteksi fraud untuk dashboard
-fraud_df = df[df['is_fraud_pred'] == 1].copy()
-
-# --- 5. HEADER ---
+# Data & model dibaca dari folder proyek ('Data_Processed/', 'models/'), bukan dari 'src/'
+from paths import FEATURES_PATH as data_path, MODEL_PATH as model_path
+
+# --- 4. HEADER (dirender sebelum data & model selesai dimuat) ---
 st.title("Dashboard for real time credit card fraud detection")
 st.write("This automated AI system assists in monitoring and preventing fraudulent financial activities effectively.")
+profile.mark('first render')
+
+# Prediksi + agregat dihitung sekali per (data, model) oleh dashboard_cache, di thread warm-up
+@st.cache_resource
+def start_warm_up(stamp):
+    def load():
+        from dashboard_cache import load_dashboard_cache
+        from explorer import TransactionExplorer
+        dashboard = load_dashboard_cache(data_path, model_path)
+        return dashboard, TransactionExplorer(dashboard['scored_path'], columns=['type', 'amount', 'step'])
+    return warm_up(load)
+
+# --- 5. PREDIKSI ---
+try:
+    with st.spinner("Loading predictions..."), timer('app.load'):
+        dashboard, explorer = start_warm_up(path_stamp(data_path, model_path)).result()
+except FileNotFoundError as e:
+    start_warm_up.clear() # Jangan simpan kegagalan: coba lagi di rerun berikutnya
+    st.error(f"Error loading file: {e}. Pastikan data (Tahap 3) dan model (Tahap 4) sudah dibuat.")
+    if profiler is not None:
+        profiler.stop()
+    st.stop()
+profile.mark('data ready')
+
+from dashboard_cache import kpis
+with timer('app.aggregate'):
+    summary = kpis(dashboard)
+# Grafik sudah di-bin / di-downsample di server: hanya array kecil yang dikirim ke browser
+charts = dashboard['charts']
 
 # --- 6. BARIS 1: KPI METRICS (3 Kolom) ---
 m1, m2, m3 = st.columns(3)
 with m1:
-    st.metric("Fraudulent transactions", f"{len(fraud_df)}")
+    st.metric("Fraudulent transactions", f"{summary['total_fraud']}")
 with m2:
-    perc = (len(fraud_df)/len(df))*100
+    perc = summary['percentage_fraud']
     st.metric("% Fraudulent transactions", f"{perc:.3f}%")
 with m3:
-    total_val = fraud_df['amount'].sum()
+    total_val = summary['total_fraud_amount']
     st.metric("Total fraud amount", f"${total_val/1000:,.1f}K")
 
 st.write("") # Spacer
@@ -113,27 +129,34 @@ c1, c2 = st.columns([1.3, 2])
 with c1:
     st.markdown("### Fraudulent transactions by location")
     # Ganti Map dengan Heatmap yang estetik
-    fig_map = px.density_heatmap(fraud_df, x="step", y="amount", 
-                                 color_continuous_scale='Viridis', template="plotly_dark")
-    fig_map.update_layout(margin=dict(l=0,r=0,t=20,b=0), height=350, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-    st.plotly_chart(fig_map, use_container_width=True)
+    with timer('app.render.charts'):
+        density = charts['step_amount_density']
+        fig_map = px.imshow(density['z'], x=density['x'], y=density['y'], origin='lower', aspect='auto',
+                            labels={'x': 'step', 'y': 'amount', 'color': 'count'},
+                            color_continuous_scale='Viridis', template="plotly_dark")
+        fig_map.update_layout(margin=dict(l=0,r=0,t=20,b=0), height=350, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        st.plotly_chart(fig_map, use_container_width=True)
 
 with c2:
     r2c1, r2c2 = st.columns(2)
     with r2c1:
         st.markdown("### Fraud by category")
-        cat_data = fraud_df.groupby('Category').size().reset_index(name='count')
-        fig_bar = px.bar(cat_data, x='count', y='Category', orientation='h', 
-                         color_discrete_sequence=['#00D1B2'], template="plotly_dark")
-        fig_bar.update_layout(margin=dict(l=0,r=10,t=20,b=0), height=350, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', xaxis_title=None, yaxis_title=None)
-        st.plotly_chart(fig_bar, use_container_width=True)
+        with timer('app.aggregate'):
+            by_type = dashboard['by_type']
+            cat_data = by_type[by_type['flagged'] > 0].rename(columns={'type': 'Category', 'flagged': 'count'})
+        with timer('app.render.charts'):
+            fig_bar = px.bar(cat_data, x='count', y='Category', orientation='h', 
+                             color_discrete_sequence=['#00D1B2'], template="plotly_dark")
+            fig_bar.update_layout(margin=dict(l=0,r=10,t=20,b=0), height=350, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', xaxis_title=None, yaxis_title=None)
+            st.plotly_chart(fig_bar, use_container_width=True)
     
     with r2c2:
         st.markdown("### Average fraud trend")
-        trend = fraud_df.groupby('step').size().reset_index(name='val')
-        fig_line = px.line(trend, x='step', y='val', color_discrete_sequence=['#00D1B2'], template="plotly_dark")
-        fig_line.update_layout(margin=dict(l=0,r=0,t=20,b=0), height=350, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', xaxis_title=None, yaxis_title=None)
-        st.plotly_chart(fig_line, use_container_width=True)
+        with timer('app.render.charts'):
+            trend = charts['count_trend'].rename(columns={'flagged': 'val'})
+            fig_line = px.line(trend, x='step', y='val', color_discrete_sequence=['#00D1B2'], template="plotly_dark")
+            fig_line.update_layout(margin=dict(l=0,r=0,t=20,b=0), height=350, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', xaxis_title=None, yaxis_title=None)
+            st.plotly_chart(fig_line, use_container_width=True)
 
 # --- 8. BARIS 3: RISK & TABLE ---
 st.write("")
@@ -141,18 +164,60 @@ c3_1, c3_2 = st.columns([1, 1])
 
 with c3_1:
     st.markdown("### Fraud percentage by risk")
-    fraud_df['risk'] = pd.cut(fraud_df['prob'], bins=[0, 0.4, 0.7, 1.0], labels=['Low', 'Medium', 'High'])
-    risk_plot = fraud_df.groupby('risk').size().reset_index(name='count')
-    fig_risk = px.bar(risk_plot, x='risk', y='count', color='risk',
-                      color_discrete_map={'Low':'#2ECC71', 'Medium':'#F1C40F', 'High':'#E74C3C'}, template="plotly_dark")
-    fig_risk.update_layout(margin=dict(l=0,r=0,t=20,b=0), height=300, showlegend=False, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-    st.plotly_chart(fig_risk, use_container_width=True)
+    # Bucket risiko (0-0.4, 0.4-0.7, 0.7-1.0) sudah dihitung di cache
+    with timer('app.render.charts'):
+        risk_plot = dashboard['risk']
+        fig_risk = px.bar(risk_plot, x='risk', y='count', color='risk',
+                          color_discrete_map={'Low':'#2ECC71', 'Medium':'#F1C40F', 'High':'#E74C3C'}, template="plotly_dark")
+        fig_risk.update_layout(margin=dict(l=0,r=0,t=20,b=0), height=300, showlegend=False, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        st.plotly_chart(fig_risk, use_container_width=True)
 
 with c3_2:
     st.markdown("### Fraudulent transactions list")
-    table_df = fraud_df[['Category', 'amount', 'step']].head(8)
+    # Hanya 8 baris fraud pertama yang diambil dari tabel lewat indeks explorer
+    with timer('app.explorer.query'):
+        table_df, _ = explorer.query(flagged_only=True, sort_by_probability=False, page_size=8)
     table_df.columns = ['Type', 'Amount ($)', 'Time Step']
     st.dataframe(table_df, use_container_width=True, height=260)
 
+with st.expander("Data drift vs training data"):
+    # PSI/KS terhadap referensi training model, dihitung dari histogram di cache (tanpa baris mentah)
+    drift = dashboard['drift']
+    if drift is None:
+        st.info("Model ini belum punya referensi drift. Latih ulang model (Tahap 4) untuk mengaktifkannya.")
+    else:
+        st.caption(f"Jendela terakhir = {drift['window_steps']} step mulai step "
+                   f"{drift['latest_window'] * drift['window_steps']}. PSI < 0.1 stabil, 0.1-0.25 bergeser, > 0.25 drift.")
+        d1, d2 = st.columns(2)
+        with d1:
+            st.markdown("**Latest window**")
+            st.dataframe(drift['window_report'].round(4), use_container_width=True)
+        with d2:
+            st.markdown("**All data**")
+            st.dataframe(drift['total_report'].round(4), use_container_width=True)
+        timeline = drift['timeline']
+        if timeline is not None and len(timeline) > 1:
+            with timer('app.render.charts'):
+                psi_long = timeline.melt(id_vars=['window', 'start_step', 'rows'], var_name='feature', value_name='psi')
+                fig_drift = px.line(psi_long, x='start_step', y='psi', color='feature', title='PSI per Step Window',
+                                    labels={'start_step': 'step'}, template="plotly_dark")
+                st.plotly_chart(fig_drift, use_container_width=True)
+
+profile.mark('page complete')
+with st.expander("Startup profile"):
+    st.dataframe(profile.report(), use_container_width=True)
+
+with st.expander("Performance (this rerun)"):
+    # Ke mana waktu rerun ini habis; build cache di thread warm-up tercatat di total proses
+    st.dataframe(run_metrics.report(), use_container_width=True)
+    st.checkbox("Sampling profiler", key='profile_reruns', help="Rekam stack Python setiap 5 ms mulai rerun berikutnya")
+    if profiler is not None:
+        profiler.stop()
+        st.dataframe(profiler.top(), use_container_width=True)
+        st.download_button("Download folded stacks", profiler.folded(), file_name='2_app.folded',
+                           help="Format flamegraph.pl / speedscope")
+    st.caption("Total proses (termasuk warm-up)")
+    st.dataframe(METRICS.report(), use_container_width=True)
+
 st.markdown("---")
 st.caption("AI Model developed for Financial Fraud Detection Portofolio")
\ No newline at end of file
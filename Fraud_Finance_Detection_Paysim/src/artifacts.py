@@ -0,0 +1,205 @@
+import os
+from features import TYPE_CATEGORIES
+from startup import lazy_import
+
+# pandas baru di-import saat pertama dipakai: pengecekan file yang gagal tidak menunggu import
+pd = lazy_import('pandas')
+
+# Lapisan artefak bersama untuk seluruh tahap pipeline fraud.
+# Format utama: Feather v2 (Arrow IPC) tanpa kompresi -> bisa di-memory-map dan
+# dibaca zero-copy, dtype hemat RAM (int16, float32, category, bool) tetap terjaga.
+# Parquet didukung untuk arsip (lebih kecil, tapi harus di-decode). CSV hanya ekspor opsional.
+
+FORMAT_EXTENSIONS = {
+    'feather': '.feather',
+    'parquet': '.parquet',
+    'csv': '.csv',
+}
+
+# Urutan pencarian saat membaca: format kolumnar dulu, CSV sebagai cadangan
+READ_ORDER = ('feather', 'parquet', 'csv')
+
+# Skema kolom PaySim, dipakai untuk memulihkan dtype saat terpaksa membaca CSV
+PAYSIM_DTYPES = {
+    'step': 'int16',
+    'type': 'category',
+    'amount': 'float32',
+    'oldbalanceOrg': 'float32',
+    'newbalanceOrig': 'float32',
+    'oldbalanceDest': 'float32',
+    'newbalanceDest': 'float32',
+    'isFraud': 'int8',
+}
+
+# Kategori yang sudah diketahui sebelum batch pertama: urutan kamusnya tetap di setiap file
+KNOWN_CATEGORIES = {
+    'type': TYPE_CATEGORIES,
+}
+
+def artifact_stem(path):
+    # 'Data_Processed/final_features_20k.csv' -> 'Data_Processed/final_features_20k'
+    root, ext = os.path.splitext(path)
+    return root if ext.lower() in FORMAT_EXTENSIONS.values() else path
+
+def resolve_artifact(path):
+    # Cari file artefak yang tersedia, prioritas ke format kolumnar
+    stem = artifact_stem(path)
+    for fmt in READ_ORDER:
+        candidate = stem + FORMAT_EXTENSIONS[fmt]
+        if os.path.exists(candidate):
+            return candidate, fmt
+    raise FileNotFoundError(f"Artefak tidak ditemukan untuk: {stem} (.feather/.parquet/.csv)")
+
+def _restore_csv_dtypes(df):
+    # CSV kehilangan skema: kembalikan dtype PaySim dan kolom one-hot 'type_*' ke bool
+    for col, dtype in PAYSIM_DTYPES.items():
+        if col in df.columns:
+            df[col] = df[col].astype(dtype)
+    for col in df.columns:
+        if col.startswith('type_') and df[col].dtype != bool:
+            df[col] = df[col].astype(str).str.lower().map({'true': True, '1': True, '1.0': True}).fillna(False).astype(bool)
+    return df
+
+def save_artifact(df, path, fmt='feather', csv_export=False):
+    # Simpan DataFrame dalam format kolumnar bertipe (default: Feather tanpa kompresi)
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    stem = artifact_stem(path)
+    os.makedirs(os.path.dirname(stem) or '.', exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    out_path = stem + FORMAT_EXTENSIONS[fmt]
+    if fmt == 'feather':
+        # Tanpa kompresi agar bisa di-memory-map (zero-copy saat dibaca)
+        _write_atomic(out_path, lambda tmp: feather.write_feather(table, tmp, compression='uncompressed'))
+    elif fmt == 'parquet':
+        _write_atomic(out_path, lambda tmp: pq.write_table(table, tmp, compression='zstd'))
+    elif fmt == 'csv':
+        _write_atomic(out_path, lambda tmp: df.to_csv(tmp, index=False))
+    else:
+        raise ValueError(f"Format tidak dikenal: {fmt}")
+
+    if csv_export and fmt != 'csv':
+        _write_atomic(stem + FORMAT_EXTENSIONS['csv'], lambda tmp: df.to_csv(tmp, index=False))
+
+    return out_path
+
+def _write_atomic(path, write):
+    # Tulis ke <path>.tmp lalu os.replace: pembaca (termasuk mmap yang masih terbuka) tidak pernah
+    # melihat file setengah jadi, dan kegagalan di tengah tidak merusak artefak lama
+    tmp_path = path + '.tmp'
+    try:
+        write(tmp_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+def load_table(path, columns=None, memory_map=True):
+    # Baca artefak sebagai pyarrow.Table dengan proyeksi kolom (hanya kolom yang diminta)
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    resolved, fmt = resolve_artifact(path)
+    if fmt == 'feather':
+        return feather.read_table(resolved, columns=columns, memory_map=memory_map)
+    if fmt == 'parquet':
+        return pq.read_table(resolved, columns=columns, memory_map=memory_map)
+    return pa.Table.from_pandas(load_artifact(resolved, columns=columns), preserve_index=False)
+
+def load_artifact(path, columns=None, memory_map=True):
+    # Baca artefak sebagai DataFrame. Feather di-memory-map lalu dikonversi zero-copy
+    # (split_blocks) sehingga kolom numerik tidak disalin ke RAM proses.
+    resolved, fmt = resolve_artifact(path)
+    if fmt == 'csv':
+        df = pd.read_csv(resolved, usecols=columns)
+        return _restore_csv_dtypes(df)
+
+    table = load_table(resolved, columns=columns, memory_map=memory_map)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+def iter_artifact_batches(path, columns=None, batch_size=1_000_000):
+    # Baca artefak besar per batch (out-of-core); RAM dibatasi oleh batch_size
+    resolved, fmt = resolve_artifact(path)
+    if fmt == 'csv':
+        for chunk in pd.read_csv(resolved, usecols=columns, chunksize=batch_size):
+            yield _restore_csv_dtypes(chunk)
+        return
+
+    table = load_table(resolved, columns=columns, memory_map=True)
+    for batch in table.to_batches(max_chunksize=batch_size):
+        yield batch.to_pandas()
+
+class ArtifactWriter:
+    # Menulis artefak kolumnar secara bertahap (batch demi batch) tanpa menahan
+    # seluruh tabel di memori. Dipakai oleh tahap streaming (full log).
+    def __init__(self, path, fmt='feather', categories=None):
+        self.stem = artifact_stem(path)
+        self.fmt = fmt
+        self.path = self.stem + FORMAT_EXTENSIONS[fmt]
+        # Ditulis ke <path>.tmp, baru dipindah ke self.path saat close() (seperti save_artifact)
+        self._tmp_path = self.path + '.tmp'
+        self._writer = None
+        self._schema = None
+        # Kamus kategori per kolom, dimulai dari kategori yang sudah diketahui (KNOWN_CATEGORIES)
+        self._categories = {col: pd.Index(values) for col, values in (categories or KNOWN_CATEGORIES).items()}
+        self.rows_written = 0
+        os.makedirs(os.path.dirname(self.stem) or '.', exist_ok=True)
+
+    def _unify_categories(self, df):
+        # Satu kamus untuk semua batch: kategori baru DITAMBAHKAN di ujung kamus (kode lama tidak
+        # berubah), sehingga file IPC cukup menulis delta kamus dan tidak ada nilai yang hilang
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                known = self._categories.get(col, pd.Index([], dtype=df[col].cat.categories.dtype))
+                new = df[col].cat.categories.difference(known, sort=False)
+                self._categories[col] = known.append(new) if len(new) else known
+                if not df[col].cat.categories.equals(self._categories[col]):
+                    df = df.assign(**{col: df[col].cat.set_categories(self._categories[col])})
+        return df
+
+    def write(self, df):
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+        import pyarrow.parquet as pq
+
+        df = self._unify_categories(df)
+        table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        if self._writer is None:
+            self._schema = table.schema
+            if self.fmt == 'feather':
+                options = ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+                self._writer = ipc.new_file(self._tmp_path, self._schema, options=options)
+            elif self.fmt == 'parquet':
+                self._writer = pq.ParquetWriter(self._tmp_path, self._schema, compression='zstd')
+            else:
+                raise ValueError(f"Format streaming tidak didukung: {self.fmt}")
+        self._writer.write_table(table)
+        self.rows_written += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        # Gagal di tengah jalan: buang file sementara, artefak lama tetap utuh
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,264 @@
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from artifacts import ArtifactWriter, PAYSIM_DTYPES, load_table, resolve_artifact
+from drift import NUMERIC_FEATURES, DriftMonitor, load_reference
+from features import TYPE_CATEGORIES, TYPE_FEATURES, decode_types
+from velocity import ACCOUNT_COLS, VELOCITY_FEATURES
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+
+# Batch scoring (malam hari) untuk seluruh log PaySim, memakai semua core.
+# - Input dibagi menjadi shard: rentang baris untuk Feather (di-memory-map, tanpa salinan),
+#   kelompok row group untuk Parquet, rentang byte yang disejajarkan ke akhir baris untuk CSV mentah.
+# - Process pool: model dimuat SEKALI per worker (forest dari registry di-mmap, jadi semua worker
+#   berbagi satu salinan fisik); numba & sklearn dibatasi ke core jatah worker agar tidak oversubscribe.
+# - Setiap shard dibaca per batch dan langsung ditulis ke part-NNNNN.feather -> RAM per worker
+#   dibatasi oleh ukuran batch, berapapun ukuran lognya. Urutan part = urutan baris input.
+# - Histogram drift per shard (drift.py) digabung di proses utama -> metrik drift di manifest.
+#
+#   python src/batch_scoring.py --input Data_Processed/full_features --workers 8
+#   python src/batch_scoring.py --input data/raw/PS_20174392719_1491204439457_log.csv
+
+from paths import FULL_FEATURES_PATH, MODEL_PATH, PROCESSED_DIR
+
+OUTPUT_DIR = os.path.join(PROCESSED_DIR, 'scored_full')
+# Kolom yang ikut disalin ke output selain probability & prediction (bila ada di input)
+PASSTHROUGH_COLUMNS = ['step', 'type', 'amount'] + ACCOUNT_COLS + ['isFraud']
+
+# --- Perencanaan shard ---
+def plan_shards(path, shard_rows=1_000_000):
+    # -> (path, fmt, shards); shard = (start, stop) dalam baris (Feather), row group (Parquet) atau byte (CSV)
+    resolved, fmt = resolve_artifact(path)
+    if fmt == 'feather':
+        n_rows = load_table(resolved).num_rows
+        return resolved, fmt, [(start, min(start + shard_rows, n_rows)) for start in range(0, n_rows, shard_rows)]
+    if fmt == 'parquet':
+        # Parquet tidak bisa di-slice tanpa dekompresi: shard = kelompok row group (start, stop)
+        import pyarrow.parquet as pq
+        metadata = pq.ParquetFile(resolved).metadata
+        shards, first, rows = [], 0, 0
+        for i in range(metadata.num_row_groups):
+            rows += metadata.row_group(i).num_rows
+            if rows >= shard_rows:
+                shards.append((first, i + 1))
+                first, rows = i + 1, 0
+        if first < metadata.num_row_groups:
+            shards.append((first, metadata.num_row_groups))
+        return resolved, fmt, shards
+
+    # CSV: ukuran shard dalam byte diperkirakan dari panjang rata-rata 1000 baris pertama,
+    # lalu setiap batas digeser ke awal baris berikutnya
+    size = os.path.getsize(resolved)
+    with open(resolved, 'rb') as f:
+        f.readline()
+        data_start = f.tell()
+        sample = [len(line) for _, line in zip(range(1000), f)]
+        shard_bytes = max(1, int(shard_rows * sum(sample) / max(len(sample), 1)))
+        bounds = [data_start]
+        while bounds[-1] + shard_bytes < size:
+            f.seek(bounds[-1] + shard_bytes)
+            f.readline()
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    bounds.append(size)
+    return resolved, fmt, [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+def input_columns(path, fmt):
+    if fmt == 'csv':
+        return list(pd.read_csv(path, nrows=0).columns)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).schema_arrow.names
+    return load_table(path).schema.names
+
+# --- Worker: model dimuat sekali per proses ---
+_WORKER = {}
+
+def _init_worker(model_path, threads):
+    from model_registry import load_scorer
+    from fast_forest import HAS_NUMBA
+    from startup import warm_up_scorer
+
+    if HAS_NUMBA:
+        import numba
+        numba.set_num_threads(max(1, min(threads, numba.config.NUMBA_NUM_THREADS)))
+    _WORKER['scorer'], _WORKER['transformer'] = load_scorer(model_path)
+    if hasattr(_WORKER['scorer'], 'n_jobs'):
+        # Batch besar lewat predict_proba sklearn: thread-nya juga dibatasi jatah worker
+        _WORKER['scorer'].n_jobs = threads
+    warm_up_scorer(_WORKER['scorer'], _WORKER['transformer'])
+
+def _worker_ready():
+    # Tugas kosong yang cukup lama agar tiap worker mengambil satu (dan selesai init)
+    time.sleep(0.1)
+    return os.getpid()
+
+def _iter_shard(path, fmt, start, stop, columns, batch_size):
+    if fmt == 'feather':
+        table = load_table(path, columns=columns, memory_map=True).slice(start, stop - start)
+        for batch in table.to_batches(max_chunksize=batch_size):
+            yield batch.to_pandas()
+        return
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(path).iter_batches(batch_size, row_groups=range(start, stop), columns=columns)
+        for batch in batches:
+            yield batch.to_pandas()
+        return
+    with open(path, 'rb') as f:
+        header = f.readline()
+        f.seek(start)
+        data = f.read(stop - start)
+    # 'type' dengan kategori tetap: kamus sama di setiap chunk, tidak ditebak dari isi chunk
+    dtypes = {c: t for c, t in PAYSIM_DTYPES.items() if c in columns}
+    if 'type' in dtypes:
+        dtypes['type'] = pd.CategoricalDtype(TYPE_CATEGORIES)
+    yield from pd.read_csv(io.BytesIO(header + data), usecols=columns, dtype=dtypes, chunksize=batch_size)
+
+def score_shard(shard_id, path, fmt, start, stop, output_dir, batch_size=250_000):
+    scorer, transformer = _WORKER['scorer'], _WORKER['transformer']
+    available = _WORKER.setdefault('columns', input_columns(path, fmt))
+    passthrough = [c for c in PASSTHROUGH_COLUMNS if c in available]
+    # Kolom 'type' di output: dari kolom mentah, atau di-decode dari one-hot tabel fitur
+    type_columns = [] if 'type' in available else [c for c in TYPE_FEATURES if c in available]
+    columns = list(dict.fromkeys(passthrough + type_columns + [c for c in transformer.feature_names if c in available]
+                                 + [c for c in NUMERIC_FEATURES if c in available]
+                                 + [c for c in PAYSIM_DTYPES if c in available and fmt == 'csv']))
+    drift = DriftMonitor()
+
+    began, cpu_began = time.perf_counter(), time.process_time()
+    rows = flagged = 0
+    with ArtifactWriter(os.path.join(output_dir, f'part-{shard_id:05d}')) as writer:
+        for batch in _iter_shard(path, fmt, start, stop, columns, batch_size):
+            probability, prediction = scorer.score(transformer.transform(batch))
+            out = batch[passthrough].copy()
+            if type_columns:
+                out.insert(1, 'type', pd.Categorical.from_codes(decode_types(batch), categories=TYPE_CATEGORIES))
+            out['probability'] = probability
+            out['prediction'] = prediction.astype('int8')
+            writer.write(out)
+            drift.observe(batch, probability)
+            rows += len(out)
+            flagged += int((prediction == 1).sum())
+    return {'shard': shard_id, 'rows': rows, 'flagged': flagged, 'seconds': time.perf_counter() - began,
+            'cpu_seconds': time.process_time() - cpu_began, 'path': os.path.basename(writer.path), 'pid': os.getpid(),
+            'drift': drift.to_dict()}
+
+# --- Orkestrasi ---
+def run_batch_scoring(input_path=FULL_FEATURES_PATH, model_path=MODEL_PATH, output_dir=OUTPUT_DIR,
+                      workers=None, shard_rows=1_000_000, batch_size=250_000):
+    try:
+        path, fmt, shards = plan_shards(input_path, shard_rows)
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e}")
+        return None
+    if not os.path.exists(model_path):
+        print(f"[ERROR] Model tidak ditemukan di: {model_path}")
+        return None
+
+    # Fitur velocity butuh lintasan berurutan atas seluruh log (state per akun), tidak bisa
+    # dihitung per shard: pakai tabel fitur lengkap dari Tahap 3 (run_full_feature_engineering)
+    from model_registry import load_scorer
+    _, transformer = load_scorer(model_path)
+    available = input_columns(path, fmt)
+    missing_velocity = [f for f in transformer.feature_names if f in VELOCITY_FEATURES and f not in available]
+    if missing_velocity:
+        print(f"[ERROR] Model memakai fitur velocity {missing_velocity} yang tidak ada di {path}. "
+              f"Jalankan Tahap 3 (run_full_feature_engineering) lalu score tabel fitur lengkapnya.")
+        return None
+
+    drift = DriftMonitor(load_reference(model_path))
+    workers = workers or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    tmp_dir = output_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    print(f"Scoring {path} ({fmt}) -> {len(shards)} shard, {workers} worker x {threads} thread")
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path, threads)) as pool:
+            # Semua worker memuat model (dan kompilasi JIT) sebelum jam mulai berjalan
+            ready = time.perf_counter()
+            for future in [pool.submit(_worker_ready) for _ in range(workers)]:
+                future.result()
+            print(f"Worker siap dalam {time.perf_counter() - ready:.2f}s")
+
+            start = time.perf_counter()
+            futures = [pool.submit(score_shard, i, path, fmt, a, b, tmp_dir, batch_size) for i, (a, b) in enumerate(shards)]
+            results = []
+            for future in as_completed(futures):
+                result = future.result()
+                drift.merge(DriftMonitor.from_dict(result.pop('drift')))
+                results.append(result)
+                print(f"  ...shard {result['shard']:>4}: {result['rows']:>10,} baris "
+                      f"({result['rows'] / result['seconds']:,.0f} baris/s) [{len(results)}/{len(shards)}]")
+            wall = time.perf_counter() - start
+    except BaseException:
+        # Shard yang gagal membatalkan seluruh run; output lama tetap utuh
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    results.sort(key=lambda r: r['shard'])
+    rows = sum(r['rows'] for r in results)
+    cpu = sum(r['cpu_seconds'] for r in results)
+    summary = {
+        'input': path,
+        'model': os.path.basename(model_path),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'rows': rows,
+        'flagged': sum(r['flagged'] for r in results),
+        'workers': workers,
+        'wall_seconds': wall,
+        'rows_per_second': rows / wall if wall > 0 else None,
+        'rows_per_second_per_core': rows / wall / workers if wall > 0 else None,
+        # Throughput satu core (baris per detik CPU worker); efisiensi = throughput total /
+        # (workers x angka ini): ~100% berarti skala linear, turun bila worker > core atau I/O jadi batas
+        'single_core_rows_per_second': rows / cpu if cpu > 0 else None,
+        'parallel_efficiency': cpu / (wall * workers) if wall > 0 else None,
+        # PSI/KS terhadap referensi training model (None bila model belum punya referensi)
+        'drift': drift.metrics() if drift.reference is not None else None,
+        'shards': results,
+    }
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+    # Output lama diganti hanya setelah semua shard selesai
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+
+    print("-" * 30)
+    print(f"[SUCCESS] {rows:,} transaksi di-score dalam {wall:.1f}s "
+          f"({summary['rows_per_second']:,.0f} baris/s, {summary['rows_per_second_per_core']:,.0f} baris/s per core, "
+          f"efisiensi paralel {summary['parallel_efficiency']:.0%})")
+    print(f"Ditandai fraud: {summary['flagged']:,} | Output: {output_dir}")
+    if summary['drift'] is not None:
+        report = drift.report('total')
+        drifted = report.loc[report['status'] == 'drift', 'feature'].tolist()
+        print(f"Drift (PSI maks {summary['drift']['drift_psi_total_max']:.3f}): "
+              f"{', '.join(drifted) if drifted else 'tidak ada fitur yang drift'}")
+    print("-" * 30)
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch scoring multi-core untuk seluruh log PaySim")
+    parser.add_argument('--input', default=FULL_FEATURES_PATH, help="Tabel fitur (feather/parquet) atau CSV mentah")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--output', default=OUTPUT_DIR, help="Folder part-NNNNN.feather + manifest.json")
+    parser.add_argument('--workers', type=int, default=None, help="Default: jumlah core")
+    parser.add_argument('--shard-rows', type=int, default=1_000_000)
+    parser.add_argument('--batch-size', type=int, default=250_000, help="Baris per batch di dalam worker (batas RAM)")
+    args = parser.parse_args(argv)
+
+    if run_batch_scoring(args.input, args.model, args.output, args.workers, args.shard_rows, args.batch_size) is None:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
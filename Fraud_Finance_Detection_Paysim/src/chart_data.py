@@ -0,0 +1,84 @@
+import numpy as np
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+
+# Lapisan data grafik untuk dashboard: semua reduksi dikerjakan di server dengan NumPy,
+# browser hanya menerima array kecil yang sudah jadi.
+# - histogram / histogram_2d : bin tetap -> ukuran payload = jumlah bin, bukan jumlah baris
+# - lttb                      : downsampling deret waktu yang menjaga bentuk (puncak/lembah)
+#   (Largest-Triangle-Three-Buckets, Steinarsson 2013)
+
+MAX_LINE_POINTS = 500
+
+def histogram(values, bins=50, value_range=None):
+    # Pengganti px.histogram: hasilnya (bin_left, bin_right, bin_center, count) untuk px.bar
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if value_range is None and len(values) == 0:
+        value_range = (0.0, 1.0)
+    counts, edges = np.histogram(values, bins=bins, range=value_range)
+    return pd.DataFrame({
+        'bin_left': edges[:-1],
+        'bin_right': edges[1:],
+        'bin_center': (edges[:-1] + edges[1:]) / 2,
+        'count': counts,
+    })
+
+def histogram_2d(x, y, bins=(50, 40)):
+    # Pengganti px.density_heatmap: matriks hitungan (y x x) + pusat bin untuk px.imshow
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) == 0:
+        counts, x_edges, y_edges = np.histogram2d([], [], bins=bins, range=[[0, 1], [0, 1]])
+    else:
+        counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    return {
+        'x': (x_edges[:-1] + x_edges[1:]) / 2,
+        'y': (y_edges[:-1] + y_edges[1:]) / 2,
+        'z': counts.T.astype(np.int64),
+    }
+
+def lttb(x, y, n_out=MAX_LINE_POINTS):
+    # Largest-Triangle-Three-Buckets: titik pertama & terakhir dipertahankan, lalu dari setiap
+    # bucket dipilih titik yang membentuk segitiga terbesar dengan titik terpilih sebelumnya
+    # dan rata-rata bucket berikutnya. Mengembalikan indeks titik yang dipertahankan.
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    bounds = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, stop = bounds[i], bounds[i + 1]
+        nxt_start, nxt_stop = bounds[i + 1], (bounds[i + 2] if i + 2 < len(bounds) else n)
+        avg_x = x[nxt_start:nxt_stop].mean()
+        avg_y = y[nxt_start:nxt_stop].mean()
+        area = np.abs((x[prev] - avg_x) * (y[start:stop] - y[prev])
+                      - (x[prev] - x[start:stop]) * (avg_y - y[prev]))
+        prev = start + int(np.argmax(area))
+        keep[i + 1] = prev
+    return keep
+
+def downsample_line(df, x, y, n_out=MAX_LINE_POINTS):
+    # Potong DataFrame deret waktu menjadi paling banyak n_out titik (urut menurut x)
+    if len(df) <= n_out:
+        return df
+    df = df.sort_values(x)
+    return df.iloc[lttb(df[x].to_numpy(), df[y].to_numpy(), n_out)]
+
+def chart_payload_bytes(*arrays):
+    # Perkiraan ukuran data yang dikirim ke Plotly (untuk memantau batas payload)
+    total = 0
+    for arr in arrays:
+        if isinstance(arr, pd.DataFrame):
+            total += int(arr.memory_usage(index=False, deep=True).sum())
+        elif isinstance(arr, dict):
+            total += chart_payload_bytes(*arr.values())
+        else:
+            total += np.asarray(arr).nbytes
+    return total
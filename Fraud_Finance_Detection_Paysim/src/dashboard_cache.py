@@ -0,0 +1,223 @@
+import os
+import shutil
+import hashlib
+import numpy as np
+
+from artifacts import ArtifactWriter, iter_artifact_batches, load_artifact, resolve_artifact
+from chart_data import downsample_line, histogram, histogram_2d
+from drift import DriftMonitor, load_reference
+from explorer import build_index
+from features import TYPE_CATEGORIES, decode_types, transformer_path
+from instrumentation import count, timed_iter, timer
+from model_registry import load_scorer
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+joblib = lazy_import('joblib')
+
+# Cache prediksi + agregat untuk kedua dashboard Streamlit.
+# Data di-score SEKALI per kombinasi (file data, model); hasilnya disimpan di folder
+# yang namanya adalah fingerprint keduanya. Dashboard hanya membaca agregat kecil
+# (per step, per tipe, per bucket risiko) sehingga interaksi widget tidak
+# lagi memicu scoring / groupby ulang, berapapun jumlah baris datanya.
+#
+# Isi satu entri cache:
+#   aggregates.pkl   -> dict agregat (lihat build_dashboard_cache), termasuk ringkasan drift
+#   scored.feather   -> data + kolom 'probability' & 'prediction'
+#   flagged.feather  -> subset transaksi yang ditandai fraud (kolom untuk grafik)
+#   scored_index/    -> indeks explorer tabel transaksi (explorer.py)
+# Grafik ikut disimpan dalam bentuk ter-bin / ter-downsample (chart_data), jadi ukuran
+# data yang dikirim ke Plotly tidak bergantung pada jumlah transaksi fraud.
+
+from paths import CACHE_DIR, FEATURES_PATH, MODEL_PATH
+# Naikkan bila isi aggregates.pkl berubah, agar entri cache lama tidak dipakai
+CACHE_VERSION = 4
+# Jumlah entri yang disimpan (LRU): setiap data/model baru menambah satu salinan scored.feather penuh
+CACHE_KEEP = 3
+
+RISK_EDGES = (0.0, 0.4, 0.7, 1.0)
+RISK_LABELS = ('Low', 'Medium', 'High')
+FLAGGED_COLUMNS = ['step', 'type', 'amount', 'errorBalanceOrig', 'probability']
+
+def file_fingerprint(path):
+    # Murah dan cukup untuk invalidasi: nama, ukuran dan waktu modifikasi file
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+def dashboard_key(data_path, model_path):
+    # Kunci cache = fingerprint data + model + transformer (bila ada)
+    resolved, _ = resolve_artifact(data_path)
+    parts = [str(CACHE_VERSION), file_fingerprint(resolved), file_fingerprint(model_path)]
+    features_path = transformer_path(model_path)
+    if os.path.exists(features_path):
+        parts.append(file_fingerprint(features_path))
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:16]
+
+def _grow(arr, size):
+    # Array per step tumbuh bila batch berikutnya membawa step yang lebih besar
+    if len(arr) >= size:
+        return arr
+    out = np.zeros(size, dtype=arr.dtype)
+    out[:len(arr)] = arr
+    return out
+
+def build_charts(flagged_path, by_step):
+    # Histogram & heatmap di-bin di server, garis tren di-downsample dengan LTTB
+    flagged = load_artifact(flagged_path, columns=['step', 'amount', 'errorBalanceOrig', 'probability'])
+    trend = by_step[by_step['flagged'] > 0]
+    return {
+        'error_orig_hist': histogram(flagged['errorBalanceOrig'], bins=50),
+        'probability_hist': histogram(flagged['probability'], bins=20, value_range=(0.0, 1.0)),
+        'step_amount_density': histogram_2d(flagged['step'], flagged['amount'], bins=(50, 40)),
+        'amount_trend': downsample_line(trend[['step', 'flagged_amount']], 'step', 'flagged_amount'),
+        'count_trend': downsample_line(trend[['step', 'flagged']], 'step', 'flagged'),
+    }
+
+def _touch(entry_dir):
+    # mtime folder entri = waktu terakhir dipakai (dasar urutan LRU)
+    try:
+        os.utime(entry_dir)
+    except OSError:
+        pass
+
+def prune_cache(cache_dir=CACHE_DIR, keep=CACHE_KEEP, current=None):
+    # Hapus entri yang paling lama tidak dipakai, sisakan 'keep' entri (entri 'current' selalu disimpan).
+    # Folder .tmp milik build yang sedang berjalan tidak disentuh. Dashboard lain yang masih
+    # me-memory-map scored.feather entri terhapus tetap aman: file baru benar-benar hilang saat mmap ditutup.
+    if not os.path.isdir(cache_dir):
+        return []
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.endswith('.tmp') or not os.path.exists(os.path.join(path, 'aggregates.pkl')):
+            continue
+        entries.append((name == current, os.path.getmtime(path), name))
+    removed = []
+    for _, _, name in sorted(entries, reverse=True)[max(keep, 1):]:
+        shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+        removed.append(name)
+    return removed
+
+def build_dashboard_cache(data_path, model_path, cache_dir=CACHE_DIR, batch_size=500_000):
+    key = dashboard_key(data_path, model_path)
+    entry_dir = os.path.join(cache_dir, key)
+    tmp_dir = entry_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    with timer('dashboard.load_model'):
+        scorer, transformer = load_scorer(model_path)
+    # Drift terhadap referensi training model (None bila model belum punya referensi)
+    drift = DriftMonitor(load_reference(model_path))
+
+    n_rows = n_flagged = 0
+    flagged_amount = 0.0
+    step_total = np.zeros(0, dtype=np.int64)
+    step_flagged = np.zeros(0, dtype=np.int64)
+    step_amount = np.zeros(0, dtype=np.float64)
+    type_flagged = np.zeros(len(TYPE_CATEGORIES), dtype=np.int64)
+    type_amount = np.zeros(len(TYPE_CATEGORIES), dtype=np.float64)
+    risk_counts = np.zeros(len(RISK_LABELS), dtype=np.int64)
+
+    scored_writer = ArtifactWriter(os.path.join(tmp_dir, 'scored'))
+    flagged_writer = ArtifactWriter(os.path.join(tmp_dir, 'flagged'))
+    with scored_writer, flagged_writer:
+        for batch in timed_iter('dashboard.read_batch', iter_artifact_batches(data_path, batch_size=batch_size)):
+            with timer('features.transform'):
+                X = transformer.transform(batch)
+            with timer('model.predict'):
+                batch['probability'], batch['prediction'] = scorer.score(X)
+            count('dashboard.rows_scored', len(batch))
+            codes = decode_types(batch)
+            if 'type' not in batch.columns:
+                batch['type'] = pd.Categorical.from_codes(codes, categories=TYPE_CATEGORIES)
+            with timer('dashboard.write_scored'):
+                scored_writer.write(batch)
+
+            with timer('dashboard.aggregate'):
+                steps = batch['step'].to_numpy(dtype=np.int64)
+                flagged = batch['prediction'].to_numpy() == 1
+                amount = batch['amount'].to_numpy(dtype=np.float64)
+                length = max(int(steps.max()) + 1 if len(steps) else 0, len(step_total))
+                step_total, step_flagged, step_amount = (_grow(a, length) for a in (step_total, step_flagged, step_amount))
+
+                n_rows += len(batch)
+                n_flagged += int(flagged.sum())
+                flagged_amount += float(amount[flagged].sum())
+                step_total += np.bincount(steps, minlength=length)
+                step_flagged += np.bincount(steps[flagged], minlength=length)
+                step_amount += np.bincount(steps[flagged], weights=amount[flagged], minlength=length)
+                type_flagged += np.bincount(codes[flagged], minlength=len(TYPE_CATEGORIES))
+                type_amount += np.bincount(codes[flagged], weights=amount[flagged], minlength=len(TYPE_CATEGORIES))
+
+                # Bucket risiko sama dengan pd.cut(bins=[0, 0.4, 0.7, 1.0]): interval (a, b]
+                bucket = np.searchsorted(RISK_EDGES, batch['probability'].to_numpy()[flagged], side='left')
+                risk_counts += np.bincount(bucket, minlength=len(RISK_EDGES))[1:]
+
+            with timer('dashboard.write_flagged'):
+                flagged_writer.write(batch.loc[flagged, FLAGGED_COLUMNS])
+            with timer('dashboard.drift'):
+                drift.observe(batch, batch['probability'].to_numpy())
+
+    by_step = pd.DataFrame({'step': np.arange(len(step_total)), 'transactions': step_total,
+                            'flagged': step_flagged, 'flagged_amount': step_amount})
+    aggregates = {
+        'key': key,
+        'n_rows': n_rows,
+        'n_flagged': n_flagged,
+        'flagged_amount': flagged_amount,
+        'by_step': by_step[by_step['transactions'] > 0].reset_index(drop=True),
+        'by_type': pd.DataFrame({'type': TYPE_CATEGORIES, 'flagged': type_flagged, 'flagged_amount': type_amount}),
+        'risk': pd.DataFrame({'risk': RISK_LABELS, 'count': risk_counts}),
+        'drift': drift.summary() if drift.reference is not None else None,
+    }
+    with timer('dashboard.charts'):
+        aggregates['charts'] = build_charts(os.path.join(tmp_dir, 'flagged.feather'), aggregates['by_step'])
+    with timer('dashboard.build_index'):
+        build_index(os.path.join(tmp_dir, 'scored.feather'))
+    joblib.dump(aggregates, os.path.join(tmp_dir, 'aggregates.pkl'))
+
+    # Entri baru baru terlihat setelah lengkap (rename atomik)
+    shutil.rmtree(entry_dir, ignore_errors=True)
+    os.replace(tmp_dir, entry_dir)
+    removed = prune_cache(cache_dir, current=key)
+    if removed:
+        print(f"Removed {len(removed)} old dashboard cache entr{'y' if len(removed) == 1 else 'ies'}: {', '.join(removed)}")
+    return aggregates
+
+def load_dashboard_cache(data_path, model_path, cache_dir=CACHE_DIR):
+    # Baca agregat dari cache; bangun ulang bila data/model berubah (fingerprint berbeda)
+    key = dashboard_key(data_path, model_path)
+    entry_dir = os.path.join(cache_dir, key)
+    aggregates_path = os.path.join(entry_dir, 'aggregates.pkl')
+    if os.path.exists(aggregates_path):
+        with timer('dashboard.load_cache'):
+            aggregates = joblib.load(aggregates_path)
+        _touch(entry_dir)
+    else:
+        print(f"Building dashboard cache {key} from: {data_path}")
+        aggregates = build_dashboard_cache(data_path, model_path, cache_dir)
+    aggregates['scored_path'] = os.path.join(entry_dir, 'scored.feather')
+    aggregates['flagged_path'] = os.path.join(entry_dir, 'flagged.feather')
+    return aggregates
+
+def kpis(aggregates, filter_type='All'):
+    # KPI kartu dashboard untuk filter "All" / "Fraudulent Only"
+    total = aggregates['n_rows'] if filter_type == 'All' else aggregates['n_flagged']
+    return {
+        'total_transactions': total,
+        'total_fraud': aggregates['n_flagged'],
+        'percentage_fraud': aggregates['n_flagged'] / total * 100 if total > 0 else 0,
+        'total_fraud_amount': aggregates['flagged_amount'],
+    }
+
+if __name__ == "__main__":
+    # Bangun cache di muka (mis. setelah Tahap 4), agar dashboard langsung cepat
+    import sys
+    data_path = sys.argv[1] if len(sys.argv) > 1 else FEATURES_PATH
+    model_path = sys.argv[2] if len(sys.argv) > 2 else MODEL_PATH
+    aggregates = build_dashboard_cache(data_path, model_path)
+    print("-" * 30)
+    print(f"[SUCCESS] Dashboard cache {aggregates['key']} siap: "
+          f"{aggregates['n_rows']:,} baris, {aggregates['n_flagged']:,} ditandai fraud.")
+    print("-" * 30)
@@ -0,0 +1,321 @@
+import sys
+import json
+import argparse
+import numpy as np
+
+from features import TYPE_CATEGORIES, TYPE_FEATURES, balance_errors, decode_types
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+
+# Monitor drift fitur & skor: apakah transaksi yang masuk masih mirip data training model?
+# - DriftSketch : histogram BIN TETAP per fitur (bin sama untuk semua sketsa), jadi sketsa dari
+#                 batch, shard atau worker mana pun bisa dijumlah (merge) tanpa menyimpan baris.
+#                 Nominal & saldo memakai bin log bertanda (sign * log10(1 + |x|), lebar 0.1),
+#                 'type' per kategori, probability 20 bin di [0, 1].
+# - Referensi   : dibuat sekali saat training (Tahap 4) dan disimpan di registry model.
+# - DriftMonitor: sketsa per jendela step (default 24 step = 1 hari) + total kumulatif; hanya
+#                 max_windows jendela terakhir disimpan -> memori konstan berapapun trafiknya.
+# - Skor        : PSI (Population Stability Index) dan KS (jarak CDF maksimum, resolusi bin).
+#
+#   python src/drift.py --input Data_Processed/full_features --output drift_metrics.json
+
+from paths import MODEL_PATH
+
+NUMERIC_FEATURES = ['amount', 'oldbalanceOrg', 'newbalanceOrig', 'oldbalanceDest', 'newbalanceDest',
+                    'errorBalanceOrig', 'errorBalanceDest']
+DRIFT_FEATURES = NUMERIC_FEATURES + ['type', 'probability']
+
+# Bin log bertanda: [-10, 10] dalam log10 (sampai 1e10 unit), + bin underflow/overflow di kedua ujung
+LOG_LIMIT = 10.0
+LOG_WIDTH = 0.1
+N_VALUE_BINS = int(round(2 * LOG_LIMIT / LOG_WIDTH)) + 2
+N_PROBABILITY_BINS = 20
+
+# PSI < 0.1 stabil, 0.1-0.25 bergeser, > 0.25 drift signifikan (ambang yang umum dipakai)
+PSI_THRESHOLDS = (0.1, 0.25)
+PSI_EPSILON = 1e-4
+
+def value_bins(values):
+    # Indeks bin tetap untuk nominal/saldo; NaN -> -1 (dihitung sebagai missing)
+    values = np.asarray(values, dtype=np.float64)
+    scaled = np.sign(values) * np.log10(1.0 + np.abs(values))
+    with np.errstate(invalid='ignore'):
+        bins = np.clip(np.floor((scaled + LOG_LIMIT) / LOG_WIDTH) + 1, 0, N_VALUE_BINS - 1)
+    return np.where(np.isnan(bins), -1, bins).astype(np.int64)
+
+def probability_bins(probability):
+    probability = np.asarray(probability, dtype=np.float64)
+    return np.clip((probability * N_PROBABILITY_BINS).astype(np.int64), 0, N_PROBABILITY_BINS - 1)
+
+def _numeric_columns(df):
+    # Kolom error dihitung dari saldo mentah bila tabelnya belum punya (sama seperti transformer)
+    errors = None
+    for name in NUMERIC_FEATURES:
+        if name in df.columns:
+            yield name, df[name].to_numpy(dtype=np.float64)
+        elif name.startswith('errorBalance'):
+            errors = errors if errors is not None else balance_errors(df)
+            yield name, errors[0 if name == 'errorBalanceOrig' else 1]
+
+class DriftSketch:
+    def __init__(self):
+        self.values = np.zeros((len(NUMERIC_FEATURES), N_VALUE_BINS), dtype=np.int64)
+        self.missing = np.zeros(len(NUMERIC_FEATURES), dtype=np.int64)
+        self.types = np.zeros(len(TYPE_CATEGORIES), dtype=np.int64)
+        self.probability = np.zeros(N_PROBABILITY_BINS, dtype=np.int64)
+        self.rows = 0
+
+    def update(self, df, probability=None):
+        for name, values in _numeric_columns(df):
+            i = NUMERIC_FEATURES.index(name)
+            bins = value_bins(values)
+            self.values[i] += np.bincount(bins[bins >= 0], minlength=N_VALUE_BINS)
+            self.missing[i] += int((bins < 0).sum())
+        if 'type' in df.columns or all(col in df.columns for col in TYPE_FEATURES):
+            self.types += np.bincount(decode_types(df), minlength=len(TYPE_CATEGORIES))
+        if probability is not None:
+            self.update_probability(probability)
+        self.rows += len(df)
+        return self
+
+    def update_probability(self, probability):
+        self.probability += np.bincount(probability_bins(probability), minlength=N_PROBABILITY_BINS)
+        return self
+
+    def merge(self, other):
+        self.values += other.values
+        self.missing += other.missing
+        self.types += other.types
+        self.probability += other.probability
+        self.rows += other.rows
+        return self
+
+    def histogram(self, feature):
+        if feature == 'type':
+            return self.types
+        if feature == 'probability':
+            return self.probability
+        return self.values[NUMERIC_FEATURES.index(feature)]
+
+    def to_dict(self):
+        return {'rows': self.rows, 'values': self.values.tolist(), 'missing': self.missing.tolist(),
+                'types': self.types.tolist(), 'probability': self.probability.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls()
+        sketch.rows = int(data['rows'])
+        for name in ('values', 'missing', 'types', 'probability'):
+            setattr(sketch, name, np.asarray(data[name], dtype=np.int64))
+        return sketch
+
+# --- Skor drift dari dua histogram dengan bin yang sama ---
+def _proportions(counts):
+    counts = np.asarray(counts, dtype=np.float64)
+    total = counts.sum()
+    return counts / total if total > 0 else None
+
+def psi(expected, actual, epsilon=PSI_EPSILON):
+    p, q = _proportions(expected), _proportions(actual)
+    if p is None or q is None:
+        return float('nan')
+    # Bin kosong diberi proporsi kecil agar log tidak tak-hingga
+    p, q = np.maximum(p, epsilon), np.maximum(q, epsilon)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+def ks(expected, actual):
+    p, q = _proportions(expected), _proportions(actual)
+    if p is None or q is None:
+        return float('nan')
+    return float(np.abs(np.cumsum(p) - np.cumsum(q)).max())
+
+def drift_status(value):
+    if np.isnan(value):
+        return 'n/a'
+    return 'stable' if value < PSI_THRESHOLDS[0] else 'shift' if value < PSI_THRESHOLDS[1] else 'drift'
+
+def compare(reference, current):
+    rows = []
+    for feature in DRIFT_FEATURES:
+        expected, actual = reference.histogram(feature), current.histogram(feature)
+        value = psi(expected, actual)
+        rows.append({
+            'feature': feature,
+            'psi': value,
+            # 'type' tidak berurutan: KS tidak bermakna
+            'ks': ks(expected, actual) if feature != 'type' else float('nan'),
+            'reference_rows': int(expected.sum()),
+            'current_rows': int(actual.sum()),
+            'status': drift_status(value),
+        })
+    return pd.DataFrame(rows)
+
+def report_records(report):
+    # Laporan -> list dict siap JSON (NaN -> None)
+    return [{k: (None if isinstance(v, float) and np.isnan(v) else v) for k, v in row.items()}
+            for row in report.to_dict(orient='records')]
+
+class DriftMonitor:
+    def __init__(self, reference=None, window_steps=24, max_windows=30):
+        self.reference = reference
+        self.window_steps = window_steps
+        self.max_windows = max_windows
+        self.windows = {}
+        self.total = DriftSketch()
+
+    def _window(self, window):
+        if window not in self.windows:
+            if len(self.windows) >= self.max_windows and window < min(self.windows):
+                return None  # Lebih tua dari semua jendela yang disimpan: hanya masuk total
+            self.windows[window] = DriftSketch()
+            while len(self.windows) > self.max_windows:
+                del self.windows[min(self.windows)]
+        return self.windows[window]
+
+    def observe(self, df, probability=None):
+        # Satu batch hasil scoring; baris dikelompokkan ke jendela step masing-masing
+        if len(df) == 0:
+            return self
+        self.total.update(df, probability)
+        window_ids = df['step'].to_numpy(dtype=np.int64) // self.window_steps
+        for window in np.unique(window_ids).tolist():
+            mask = window_ids == window
+            sketch = self._window(window)
+            if sketch is not None:
+                part = df if mask.all() else df[mask]
+                sketch.update(part, None if probability is None else np.asarray(probability)[mask])
+        return self
+
+    def merge(self, other):
+        # Gabungkan monitor dari worker / shard lain (jendela dengan id sama dijumlah)
+        self.total.merge(other.total)
+        for window, sketch in sorted(other.windows.items()):
+            mine = self._window(window)
+            if mine is not None:
+                mine.merge(sketch)
+        return self
+
+    @property
+    def latest_window(self):
+        return max(self.windows) if self.windows else None
+
+    def report(self, window=None):
+        # window: None -> jendela terakhir, 'total' -> semua trafik yang pernah dilihat
+        if self.reference is None:
+            return None
+        if window == 'total':
+            return compare(self.reference, self.total)
+        window = self.latest_window if window is None else window
+        return compare(self.reference, self.windows.get(window, DriftSketch()))
+
+    def timeline(self):
+        # PSI per fitur untuk setiap jendela yang disimpan (tabel lebar, untuk grafik dashboard)
+        if self.reference is None or not self.windows:
+            return None
+        rows = []
+        for window, sketch in sorted(self.windows.items()):
+            row = {'window': window, 'start_step': window * self.window_steps, 'rows': sketch.rows}
+            for feature in DRIFT_FEATURES:
+                row[feature] = psi(self.reference.histogram(feature), sketch.histogram(feature))
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def metrics(self):
+        # Metrik datar untuk /metrics scoring service, manifest batch scoring & ekspor JSON
+        out = {'drift_window': self.latest_window, 'drift_window_steps': self.window_steps,
+               'drift_rows_total': self.total.rows}
+        for scope in ('window', 'total'):
+            report = self.report(None if scope == 'window' else 'total')
+            if report is None:
+                continue
+            for row in report.itertuples():
+                out[f'drift_psi_{scope}_{row.feature}'] = None if np.isnan(row.psi) else round(row.psi, 6)
+                if row.feature != 'type':
+                    out[f'drift_ks_{scope}_{row.feature}'] = None if np.isnan(row.ks) else round(row.ks, 6)
+            out[f'drift_psi_{scope}_max'] = None if report['psi'].isna().all() else round(float(report['psi'].max()), 6)
+        return out
+
+    def summary(self):
+        # Ringkasan kecil untuk cache dashboard
+        return {'window_steps': self.window_steps, 'latest_window': self.latest_window,
+                'rows': self.total.rows, 'window_report': self.report(), 'total_report': self.report('total'),
+                'timeline': self.timeline()}
+
+    def to_dict(self):
+        return {'window_steps': self.window_steps, 'max_windows': self.max_windows, 'total': self.total.to_dict(),
+                'windows': {str(w): s.to_dict() for w, s in self.windows.items()}}
+
+    @classmethod
+    def from_dict(cls, data, reference=None):
+        monitor = cls(reference, data['window_steps'], data['max_windows'])
+        monitor.total = DriftSketch.from_dict(data['total'])
+        monitor.windows = {int(w): DriftSketch.from_dict(s) for w, s in data['windows'].items()}
+        return monitor
+
+# --- Referensi training ---
+def build_reference(batches, probability=None):
+    # batches: DataFrame atau iterable DataFrame data training; probability: skor model
+    # pada data yang tidak dipakai fit (split uji), karena skor pada data latih terlalu yakin
+    sketch = DriftSketch()
+    for batch in [batches] if hasattr(batches, 'columns') else batches:
+        sketch.update(batch)
+    if probability is not None:
+        sketch.update_probability(probability)
+    return sketch
+
+def load_reference(model_path, registry=None):
+    # Referensi milik versi registry yang sesuai dengan file model (None bila belum ada)
+    from model_registry import ModelRegistry
+    registry = registry or ModelRegistry()
+    match = registry.find_source(model_path)
+    data = registry.drift_reference(*match) if match is not None else None
+    return DriftSketch.from_dict(data) if data is not None else None
+
+def monitor_file(input_path, model_path=MODEL_PATH, window_steps=24, max_windows=30, batch_size=500_000):
+    # Drift sebuah log mentah / tabel fitur terhadap referensi model.
+    # Kolom 'probability' dipakai bila ada; bila tidak, data di-score dulu.
+    from artifacts import iter_artifact_batches
+    reference = load_reference(model_path)
+    if reference is None:
+        raise FileNotFoundError(f"Referensi drift untuk {model_path} tidak ada di registry; latih ulang model (Tahap 4).")
+
+    scorer = transformer = None
+    monitor = DriftMonitor(reference, window_steps, max_windows)
+    for batch in iter_artifact_batches(input_path, batch_size=batch_size):
+        if 'probability' in batch.columns:
+            probability = batch['probability'].to_numpy()
+        else:
+            if scorer is None:
+                from model_registry import load_scorer
+                scorer, transformer = load_scorer(model_path)
+            probability, _ = scorer.score(transformer.transform(batch))
+        monitor.observe(batch, probability)
+    return monitor
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drift fitur & skor terhadap referensi training model")
+    parser.add_argument('--input', required=True, help="Log mentah atau tabel fitur (feather/parquet/csv)")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--window-steps', type=int, default=24)
+    parser.add_argument('--output', default=None, help="File JSON untuk metrik drift")
+    args = parser.parse_args(argv)
+
+    try:
+        monitor = monitor_file(args.input, args.model, args.window_steps)
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+    pd.set_option('display.width', 120)
+    print(f"--- Drift jendela terakhir (step {monitor.latest_window * args.window_steps}+) ---")
+    print(monitor.report().round(4).to_string(index=False))
+    print(f"--- Drift seluruh input ({monitor.total.rows:,} baris) ---")
+    print(monitor.report('total').round(4).to_string(index=False))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(monitor.metrics(), f, indent=2)
+        print(f"[SUCCESS] Metrik drift disimpan di: {args.output}")
+
+if __name__ == "__main__":
+    main()
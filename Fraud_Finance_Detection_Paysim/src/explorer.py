@@ -0,0 +1,126 @@
+import os
+import shutil
+import numpy as np
+
+from artifacts import load_artifact, load_table, resolve_artifact
+from features import TYPE_CATEGORIES, decode_types
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+
+# Explorer transaksi mencurigakan dengan indeks yang dibangun sekali di samping
+# scored.feather (dashboard_cache). Query tidak menyalin / mengurutkan seluruh frame:
+# - filter tipe & status fraud   -> bitmap (np.packbits, 1 bit per baris)
+# - filter rentang step & amount -> indeks terurut + searchsorted
+# - urutan berdasarkan probabilitas -> seleksi parsial (np.partition) sebanyak halaman yang diminta
+# - hanya baris di halaman yang diambil dari tabel (memory-mapped)
+
+INDEX_SUFFIX = '_index'
+EXPLORER_COLUMNS = ['step', 'type', 'amount', 'oldbalanceOrg', 'newbalanceOrig',
+                    'oldbalanceDest', 'newbalanceDest', 'errorBalanceOrig', 'errorBalanceDest',
+                    'prediction', 'probability']
+
+def index_dir(scored_path):
+    # 'data/cache/<key>/scored.feather' -> 'data/cache/<key>/scored_index/'
+    resolved, _ = resolve_artifact(scored_path)
+    return os.path.splitext(resolved)[0] + INDEX_SUFFIX
+
+def build_index(scored_path):
+    df = load_artifact(scored_path, columns=['step', 'type', 'amount', 'probability', 'prediction'])
+    out_dir = index_dir(scored_path)
+    tmp_dir = out_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    steps = df['step'].to_numpy()
+    amount = df['amount'].to_numpy()
+    codes = decode_types(df)
+    arrays = {
+        'step_order': np.argsort(steps, kind='stable').astype(np.int64),
+        'amount_order': np.argsort(amount, kind='stable').astype(np.int64),
+        'flagged_bits': np.packbits(df['prediction'].to_numpy() == 1),
+        'type_bits': np.stack([np.packbits(codes == i) for i in range(len(TYPE_CATEGORIES))]),
+        'probability': df['probability'].to_numpy(dtype=np.float64),
+    }
+    arrays['steps_sorted'] = steps[arrays['step_order']]
+    arrays['amount_sorted'] = amount[arrays['amount_order']]
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), arr)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return out_dir
+
+class TransactionExplorer:
+    def __init__(self, scored_path, columns=None):
+        self.scored_path, _ = resolve_artifact(scored_path)
+        self.columns = list(columns or EXPLORER_COLUMNS)
+        path = index_dir(self.scored_path)
+        if not os.path.isdir(path) or os.path.getmtime(path) < os.path.getmtime(self.scored_path):
+            build_index(self.scored_path)
+        # Semua array indeks di-mmap: proses dashboard tidak menyalinnya ke RAM
+        self.index = {name[:-4]: np.load(os.path.join(path, name), mmap_mode='r')
+                      for name in os.listdir(path) if name.endswith('.npy')}
+        self.n_rows = len(self.index['probability'])
+        self._table = load_table(self.scored_path, columns=self.columns)
+
+    def _bits(self, packed):
+        return np.unpackbits(packed, count=self.n_rows).view(bool)
+
+    def _range_mask(self, sorted_values, order, low, high):
+        # Rentang inklusif [low, high] lewat searchsorted pada kolom yang sudah terurut
+        mask = np.zeros(self.n_rows, dtype=bool)
+        start = 0 if low is None else np.searchsorted(sorted_values, low, side='left')
+        stop = self.n_rows if high is None else np.searchsorted(sorted_values, high, side='right')
+        mask[order[start:stop]] = True
+        return mask
+
+    def match(self, types=None, step_range=None, amount_range=None, flagged_only=True):
+        # Mask boolean baris yang memenuhi semua filter
+        mask = self._bits(self.index['flagged_bits']) if flagged_only else np.ones(self.n_rows, dtype=bool)
+        if types:
+            type_mask = np.zeros(self.n_rows, dtype=bool)
+            for t in types:
+                type_mask |= self._bits(self.index['type_bits'][TYPE_CATEGORIES.index(t)])
+            mask &= type_mask
+        if step_range is not None:
+            mask &= self._range_mask(self.index['steps_sorted'], self.index['step_order'], *step_range)
+        if amount_range is not None:
+            mask &= self._range_mask(self.index['amount_sorted'], self.index['amount_order'], *amount_range)
+        return mask
+
+    def count(self, types=None, step_range=None, amount_range=None, flagged_only=True):
+        return int(self.match(types, step_range, amount_range, flagged_only).sum())
+
+    def query(self, types=None, step_range=None, amount_range=None, flagged_only=True,
+              sort_by_probability=True, page=0, page_size=20):
+        # Mengembalikan (DataFrame satu halaman, jumlah total baris yang cocok)
+        rows = np.flatnonzero(self.match(types, step_range, amount_range, flagged_only))
+        total = len(rows)
+        start, stop = page * page_size, min((page + 1) * page_size, total)
+        if start >= stop:
+            return pd.DataFrame(columns=self.columns), total
+
+        if sort_by_probability:
+            # Top-(stop) via seleksi parsial, lalu hanya potongan itu yang diurutkan.
+            # Nilai seri di batas diambil menurut urutan baris, jadi halaman-halaman
+            # berikutnya konsisten (urutan total: probabilitas turun, lalu nomor baris).
+            neg_prob = -self.index['probability'][rows]
+            if stop < total:
+                kth = np.partition(neg_prob, stop - 1)[stop - 1]
+                better = np.flatnonzero(neg_prob < kth)
+                ties = np.flatnonzero(neg_prob == kth)[:stop - len(better)]
+                top = np.concatenate([better, ties])
+            else:
+                top = np.arange(total)
+            top = top[np.lexsort((top, neg_prob[top]))]
+            page_rows = rows[top[start:stop]]
+        else:
+            page_rows = rows[start:stop]
+
+        page_df = self._table.take(page_rows).to_pandas()
+        page_df.index = page_rows
+        return page_df, total
+
+    def top_k(self, k=20, flagged_only=False):
+        return self.query(flagged_only=flagged_only, page_size=k)[0]
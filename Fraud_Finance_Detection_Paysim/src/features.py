@@ -0,0 +1,139 @@
+import os
+import numpy as np
+from velocity import VELOCITY_FEATURES
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+joblib = lazy_import('joblib')
+
+# Transformer fitur bersama untuk training, testing dan kedua dashboard.
+# Urutan kolom dibekukan saat fit dan disimpan di samping fraud_model.pkl,
+# sehingga scoring tidak lagi bergantung pada dtype yang ditebak pandas.
+
+TYPE_CATEGORIES = ('CASH_IN', 'CASH_OUT', 'DEBIT', 'PAYMENT', 'TRANSFER')
+
+BASE_FEATURES = ['step', 'amount', 'oldbalanceOrg', 'newbalanceOrig', 'oldbalanceDest', 'newbalanceDest']
+ERROR_FEATURES = ['errorBalanceOrig', 'errorBalanceDest']
+TYPE_FEATURES = [f'type_{t}' for t in TYPE_CATEGORIES]
+DEFAULT_FEATURES = BASE_FEATURES + ERROR_FEATURES + TYPE_FEATURES
+# Fitur velocity per akun (velocity.py) ikut dibekukan bila ada di data training
+
+TARGET_COL = 'isFraud'
+TRANSFORMER_SUFFIX = '_features.pkl'
+
+def balance_errors(df):
+    # errorBalanceOrig: apakah perubahan saldo pengirim sesuai dengan nominal transaksi
+    # errorBalanceDest: apakah saldo penerima bertambah dengan benar
+    # Dihitung dalam float64 agar selisih kecil tidak hilang karena pembulatan float32
+    amount = df['amount'].to_numpy(dtype=np.float64)
+    error_orig = df['newbalanceOrig'].to_numpy(dtype=np.float64) + amount - df['oldbalanceOrg'].to_numpy(dtype=np.float64)
+    error_dest = df['oldbalanceDest'].to_numpy(dtype=np.float64) + amount - df['newbalanceDest'].to_numpy(dtype=np.float64)
+    return error_orig, error_dest
+
+def type_codes(types):
+    # Kode integer tetap untuk 'type' (urutan TYPE_CATEGORIES); kategori asing -> ValueError
+    codes = pd.Categorical(types, categories=TYPE_CATEGORIES).codes
+    if (codes < 0).any():
+        unknown = sorted(set(pd.Series(types)[codes < 0].astype(str)))
+        raise ValueError(f"Tipe transaksi tidak dikenal: {unknown}")
+    return codes
+
+def decode_types(df):
+    # Kebalikan one-hot: kode 'type' dari kolom 'type' mentah atau dari kolom 'type_*'
+    if 'type' in df.columns:
+        return type_codes(df['type'])
+    onehot = np.column_stack([df[col].to_numpy(dtype=bool) for col in TYPE_FEATURES])
+    return onehot.argmax(axis=1).astype(np.int8)
+
+def add_engineered_columns(df):
+    # Dipakai oleh 3_Feature_Engineering: tambah kolom error + one-hot 'type' dengan
+    # kategori tetap (selalu 5 kolom type_*, berapapun kategori yang muncul di batch)
+    df['errorBalanceOrig'], df['errorBalanceDest'] = balance_errors(df)
+    if 'type' in df.columns:
+        codes = type_codes(df['type'])
+        for i, col in enumerate(TYPE_FEATURES):
+            df[col] = codes == i
+        df = df.drop(columns=['type'])
+    return df
+
+class FraudFeatureTransformer:
+    # Menghasilkan matriks float32 contiguous dengan urutan kolom yang dibekukan.
+    # Input boleh data mentah (kolom 'type') atau tabel fitur (kolom 'type_*');
+    # kolom turunan dihitung bila tidak ada. Kolom wajib yang hilang -> KeyError,
+    # bukan diam-diam menggeser posisi fitur.
+    def __init__(self, feature_names=None):
+        self.feature_names = list(feature_names) if feature_names is not None else None
+
+    def fit(self, df=None):
+        if self.feature_names is None:
+            self.feature_names = list(DEFAULT_FEATURES)
+            if df is not None and all(col in df.columns for col in VELOCITY_FEATURES):
+                self.feature_names += VELOCITY_FEATURES
+        if df is not None:
+            # Validasi awal: semua fitur bisa dibentuk dari data training
+            self.transform(df.head(1))
+        return self
+
+    @property
+    def n_features(self):
+        return len(self.feature_names)
+
+    @classmethod
+    def from_model(cls, model):
+        # Untuk model lama yang dilatih langsung dari DataFrame (punya feature_names_in_)
+        names = getattr(model, 'feature_names_in_', None)
+        if names is None:
+            raise ValueError("Model tidak menyimpan nama fitur; transformer harus disimpan saat training.")
+        return cls(feature_names=names)
+
+    def transform(self, df):
+        if self.feature_names is None:
+            raise RuntimeError("Transformer belum di-fit.")
+
+        n_rows = len(df)
+        X = np.empty((n_rows, self.n_features), dtype=np.float32, order='C')
+        errors = None
+        codes = None
+
+        for j, name in enumerate(self.feature_names):
+            if name in df.columns:
+                X[:, j] = df[name].to_numpy()
+            elif name in ERROR_FEATURES:
+                if errors is None:
+                    errors = balance_errors(df)
+                X[:, j] = errors[ERROR_FEATURES.index(name)]
+            elif name in TYPE_FEATURES and 'type' in df.columns:
+                if codes is None:
+                    codes = type_codes(df['type'])
+                X[:, j] = codes == TYPE_FEATURES.index(name)
+            else:
+                raise KeyError(f"Kolom fitur '{name}' tidak ada di data input.")
+        return X
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+def transformer_path(model_path):
+    # Transformer disimpan di samping modelnya: fraud_model.pkl -> fraud_model_features.pkl
+    # (satu file per model, sehingga beberapa model bisa berbagi folder 'models')
+    return os.path.splitext(model_path)[0] + TRANSFORMER_SUFFIX
+
+def save_transformer(transformer, model_path):
+    path = transformer_path(model_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    joblib.dump(transformer, path)
+    return path
+
+def load_transformer(model_path, model=None):
+    path = transformer_path(model_path)
+    if os.path.exists(path):
+        transformer = joblib.load(path)
+    else:
+        # Fallback untuk model yang dilatih sebelum transformer ini ada
+        transformer = FraudFeatureTransformer.from_model(model)
+
+    n_model = getattr(model, 'n_features_in_', None)
+    if n_model is not None and n_model != transformer.n_features:
+        raise ValueError(f"Model butuh {n_model} fitur, transformer menghasilkan {transformer.n_features}. "
+                         "Latih ulang model (Tahap 4) agar keduanya sinkron.")
+    return transformer
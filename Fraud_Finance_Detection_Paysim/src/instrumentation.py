@@ -0,0 +1,361 @@
+import os
+import sys
+import math
+import time
+import runpy
+import argparse
+import functools
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+
+# Instrumentasi ringan untuk hot path (scoring, groupby, render dashboard, tahap 1-5).
+# - timer('nama')      : context manager -> histogram durasi per bagian
+# - timed('nama')      : decorator yang mengecek status enabled saat dipanggil
+# - timed_iter('nama') : durasi setiap next() (baca batch dari disk, dsb.)
+# - count / observe    : penghitung & histogram nilai bebas (baris per batch, dsb.)
+# - SamplingProfiler   : sampel stack thread berkala -> format "folded" (flamegraph.pl, speedscope)
+#
+# Mati secara default: timer() mengembalikan satu objek no-op bersama, count/observe langsung return.
+# Aktif lewat enable() atau env FRAUD_INSTRUMENT=1; FRAUD_PROFILE=<folder> menyalakan profiler sampling
+# untuk instrumented_run (skrip tahap). Hanya standard library agar murah di-import.
+#
+#   python src/instrumentation.py profile -o train.folded notebooks/4_Model_Training.py
+
+_STATE = {'enabled': os.environ.get('FRAUD_INSTRUMENT', '') not in ('', '0')}
+
+def enable():
+    _STATE['enabled'] = True
+
+def disable():
+    _STATE['enabled'] = False
+
+def is_enabled():
+    return _STATE['enabled']
+
+class Histogram:
+    # Bucket logaritmik (basis 2): memori konstan, persentil dengan galat relatif <= 2x
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.buckets = Counter()
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.buckets[math.frexp(value)[1] if value > 0 else None] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.buckets.update(other.buckets)
+
+    def quantile(self, q):
+        # Batas atas bucket yang memuat kuantil q, dijepit ke [min, max]
+        if not self.count:
+            return float('nan')
+        target, seen = q * self.count, 0
+        for exponent in sorted(self.buckets, key=lambda e: -math.inf if e is None else e):
+            seen += self.buckets[exponent]
+            if seen >= target:
+                upper = 0.0 if exponent is None else math.ldexp(1.0, exponent)
+                return min(max(upper, self.min), self.max)
+        return self.max
+
+    def summary(self):
+        return {'count': self.count, 'total': self.total, 'mean': self.total / self.count if self.count else 0.0,
+                'p50': self.quantile(0.5), 'p99': self.quantile(0.99),
+                'min': self.min if self.count else 0.0, 'max': self.max if self.count else 0.0}
+
+class Metrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timers = {}
+        self.counters = Counter()
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            hist = self.timers.get(name)
+            if hist is None:
+                hist = self.timers[name] = Histogram()
+            hist.add(seconds)
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def observe(self, name, value):
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            hist.add(value)
+
+    def reset(self):
+        with self._lock:
+            self.started = time.perf_counter()
+            self.timers.clear()
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'elapsed_s': time.perf_counter() - self.started,
+                'timers': {name: h.summary() for name, h in self.timers.items()},
+                'counters': dict(self.counters),
+                'histograms': {name: h.summary() for name, h in self.histograms.items()},
+            }
+
+    def report(self):
+        # Satu baris per bagian, diurutkan dari total waktu terbesar (untuk tabel dashboard / CLI)
+        snap = self.snapshot()
+        elapsed = snap['elapsed_s'] or 1.0
+        rows = [{'section': name, 'calls': s['count'], 'total_ms': round(s['total'] * 1000, 2),
+                 'share_%': round(100 * s['total'] / elapsed, 1), 'mean_ms': round(s['mean'] * 1000, 3),
+                 'p99_ms': round(s['p99'] * 1000, 3), 'max_ms': round(s['max'] * 1000, 3)}
+                for name, s in snap['timers'].items()]
+        return sorted(rows, key=lambda r: -r['total_ms'])
+
+    def print_report(self, title='Instrumentation'):
+        snap = self.snapshot()
+        print("-" * 30)
+        print(f"{title} ({snap['elapsed_s']:.2f}s)")
+        for row in self.report():
+            print(f"{row['section']:>32}: {row['total_ms']:10.1f} ms | {row['calls']:>6} x | "
+                  f"p99 {row['p99_ms']:.2f} ms | {row['share_%']:5.1f}%")
+        for name, value in sorted(snap['counters'].items()):
+            print(f"{name:>32}: {value:,}")
+        for name, s in sorted(snap['histograms'].items()):
+            print(f"{name:>32}: n={s['count']:,} mean={s['mean']:,.1f} p50~{s['p50']:,.0f} max={s['max']:,.0f}")
+        print("-" * 30)
+
+# Metrik seumur proses; collect() memasang Metrics tambahan untuk konteks (thread) saat ini,
+# mis. satu rerun Streamlit. Semua rekaman selalu masuk ke METRICS, dan juga ke koleksi aktif.
+METRICS = Metrics()
+_CURRENT = contextvars.ContextVar('fraud_metrics', default=None)
+
+def collect():
+    metrics = Metrics()
+    _CURRENT.set(metrics)
+    return metrics
+
+def _record(name, seconds):
+    METRICS.record(name, seconds)
+    current = _CURRENT.get()
+    if current is not None:
+        current.record(name, seconds)
+
+def count(name, n=1):
+    if not _STATE['enabled']:
+        return
+    METRICS.incr(name, n)
+    current = _CURRENT.get()
+    if current is not None:
+        current.incr(name, n)
+
+def observe(name, value):
+    if not _STATE['enabled']:
+        return
+    METRICS.observe(name, value)
+    current = _CURRENT.get()
+    if current is not None:
+        current.observe(name, value)
+
+class _Timer:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, time.perf_counter() - self.start)
+        return False
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+def timer(name):
+    # `with timer('predict'):` -- saat nonaktif hanya satu pengecekan dict + objek no-op bersama
+    return _Timer(name) if _STATE['enabled'] else _NULL_TIMER
+
+def timed(name=None):
+    # Decorator; status enabled dicek per panggilan (bukan saat modul di-import)
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _STATE['enabled']:
+                return func(*args, **kwargs)
+            with _Timer(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def timed_iter(name, iterable):
+    # Waktu produksi setiap item (mis. baca + decode satu batch); nonaktif -> iterable apa adanya
+    if not _STATE['enabled']:
+        return iterable
+    return _timed_iter(name, iter(iterable))
+
+def _timed_iter(name, iterator):
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        _record(name, time.perf_counter() - start)
+        yield item
+
+# --- Profiler sampling (stack thread diambil tiap interval, tanpa sys.setprofile) ---
+def _frame_label(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+class SamplingProfiler:
+    def __init__(self, interval=0.005, thread_ids=None):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.samples = Counter()
+        self.n_samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.thread_ids is None:
+            self.thread_ids = [threading.get_ident()]
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            targets = self.thread_ids if self.thread_ids else [t for t in frames if t != own]
+            for tid in targets:
+                frame = frames.get(tid)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    self.samples[';'.join(reversed(stack))] += 1
+                    self.n_samples += 1
+
+    def folded(self):
+        # Satu baris per stack unik: "root;...;leaf <jumlah sampel>"
+        return ''.join(f"{stack} {n}\n" for stack, n in self.samples.most_common())
+
+    def write(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(self.folded())
+        return path
+
+    def top(self, n=15):
+        # Fungsi dengan waktu "self" terbanyak (frame paling dalam pada sampel)
+        leaves = Counter()
+        for stack, k in self.samples.items():
+            leaves[stack.rsplit(';', 1)[-1]] += k
+        total = self.n_samples or 1
+        return [{'function': name, 'samples': k, 'share_%': round(100 * k / total, 1)}
+                for name, k in leaves.most_common(n)]
+
+@contextmanager
+def instrumented_run(name, profile_dir=None, interval=0.005):
+    # Untuk blok __main__ skrip tahap: laporan metrik di akhir bila aktif,
+    # dan stack folded ke <profile_dir>/<name>.folded bila FRAUD_PROFILE / profile_dir diisi
+    profile_dir = profile_dir or os.environ.get('FRAUD_PROFILE') or None
+    if profile_dir:
+        enable()
+    profiler = SamplingProfiler(interval).start() if profile_dir else None
+    run = collect() if _STATE['enabled'] else None
+    try:
+        yield run
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            path = profiler.write(os.path.join(profile_dir, f'{name}.folded'))
+            print(f"[SUCCESS] Profil sampling ({profiler.n_samples:,} sampel) disimpan di: {path}")
+        if run is not None:
+            run.print_report(name)
+
+def profile_script(path, output=None, interval=0.005, args=()):
+    # Menjalankan skrip (blok __main__) dengan metrik + profiler sampling aktif.
+    # Dilaporkan dari METRICS (seumur proses) karena skrip bisa memasang collect() sendiri
+    enable()
+    METRICS.reset()
+    sys.argv = [path, *args]
+    with SamplingProfiler(interval) as profiler:
+        try:
+            runpy.run_path(path, run_name='__main__')
+        except SystemExit:
+            pass
+    if output:
+        profiler.write(output)
+    return METRICS, profiler
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profil hot path: metrik bagian + profiler sampling")
+    sub = parser.add_subparsers(dest='command', required=True)
+    # Opsi profiler ditulis sebelum skrip; semua argumen setelah skrip diteruskan ke skrip tsb.
+    prof = sub.add_parser('profile', help="Jalankan skrip dengan instrumentasi & profiler sampling")
+    prof.add_argument('script')
+    prof.add_argument('args', nargs=argparse.REMAINDER, help="Argumen untuk skrip")
+    prof.add_argument('-o', '--output', default=None, help="File stack folded (flamegraph.pl / speedscope)")
+    prof.add_argument('--interval', type=float, default=0.005, help="Jeda antar sampel (detik)")
+    prof.add_argument('--top', type=int, default=15)
+    args = parser.parse_args(argv)
+
+    # Lewat modul 'instrumentation' (bukan __main__), agar timer di skrip tercatat di METRICS yang sama
+    import instrumentation
+    run, profiler = instrumentation.profile_script(args.script, args.output, args.interval, args.args)
+    run.print_report(os.path.basename(args.script))
+    print(f"Self time teratas ({profiler.n_samples:,} sampel):")
+    for row in profiler.top(args.top):
+        print(f"{row['share_%']:6.1f}%  {row['function']}")
+    if args.output:
+        print(f"[SUCCESS] Stack folded disimpan di: {args.output}")
+
+if __name__ == "__main__":
+    main()
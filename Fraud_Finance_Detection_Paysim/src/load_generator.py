@@ -0,0 +1,222 @@
+import sys
+import json
+import time
+import asyncio
+import argparse
+import numpy as np
+
+from artifacts import iter_artifact_batches, resolve_artifact
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+
+# Load generator untuk scoring_service.py: memutar ulang log transaksi berurutan 'step'
+# lewat beberapa koneksi HTTP keep-alive secara bersamaan, lalu melaporkan
+# throughput dan latensi p50/p99 dibandingkan target SLA.
+# Sumber default = log mentah PaySim: berurutan 'step' dan menyimpan nameOrig/nameDest,
+# jadi juga bisa dipakai untuk model dengan fitur velocity (balanced sample tidak bisa:
+# ID akun dibuang dan urutannya diacak). Field yang dibutuhkan model dibaca dari /health.
+
+from paths import RAW_DATA_PATH as SOURCE_PATH
+
+def load_records(path=SOURCE_PATH, limit=200_000):
+    # Hanya 'limit' baris pertama yang dibaca (per batch, tidak seluruh log 470MB)
+    frames, rows = [], 0
+    for batch in iter_artifact_batches(path, batch_size=limit or 1_000_000):
+        frames.append(batch)
+        rows += len(batch)
+        if limit is not None and rows >= limit:
+            break
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if limit is not None:
+        df = df.head(limit)
+    df = df.drop(columns=['isFraud', 'isFlaggedFraud'], errors='ignore')
+    if 'type' in df.columns:
+        df['type'] = df['type'].astype(str)
+    # Konversi ke tipe JSON (int/float Python) sekali di awal, bukan per request
+    return json.loads(df.to_json(orient='records'))
+
+async def _request(reader, writer, host, path, payload, method='POST'):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\n\r\n").encode() + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':', 1)[1])
+    return status, await reader.readexactly(length)
+
+async def fetch_health(host, port):
+    # Kebutuhan model yang sedang dilayani: field wajib & step terakhir state velocity
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        status, body = await _request(reader, writer, host, '/health', None, method='GET')
+    finally:
+        writer.close()
+    return json.loads(body) if status == 200 else {}
+
+class StepGate:
+    # Model velocity menolak step yang lebih awal dari step terakhir state-nya. Dengan banyak
+    # client bersamaan, potongan yang memuat step baru baru dikirim setelah semua potongan
+    # sebelumnya (urutan ambil) yang masih berisi step lebih awal selesai; dalam satu step
+    # request tetap paralel.
+    def __init__(self):
+        self.pending = {}
+        self.done = asyncio.Condition()
+
+    def take(self, seq, first_step):
+        # Dipanggil tepat saat potongan diambil (tanpa await), jadi urutan 'seq' = urutan sumber
+        self.pending[seq] = first_step
+
+    async def wait(self, seq, last_step):
+        def blocked():
+            return any(s < seq and first < last_step for s, first in self.pending.items())
+        if blocked():
+            async with self.done:
+                await self.done.wait_for(lambda: not blocked())
+
+    async def release(self, seq):
+        del self.pending[seq]
+        async with self.done:
+            self.done.notify_all()
+
+def _take(records, index, shift):
+    # Record ke-'index' (berputar). shift = (offset, span): step digeser agar tidak lebih awal
+    # dari state velocity service dan terus naik di setiap putaran ulang sumber
+    lap, pos = divmod(index, len(records))
+    if shift is None:
+        return records[pos]
+    offset, span = shift
+    return dict(records[pos], step=records[pos]['step'] + offset + lap * span)
+
+async def _client(host, port, records, cursor, deadline, batch_size, latencies, counters, shift, gate):
+    reader, writer = await asyncio.open_connection(host, port)
+    path = '/score' if batch_size == 1 else '/score/batch'
+    try:
+        while time.perf_counter() < deadline:
+            # Setiap client mengambil potongan berikutnya dari sumber (berputar)
+            start = cursor[0]
+            cursor[0] += batch_size
+            chunk = [_take(records, start + i, shift) for i in range(batch_size)]
+            payload = chunk[0] if batch_size == 1 else {'transactions': chunk}
+
+            if gate is not None:
+                gate.take(start, chunk[0]['step'])
+            try:
+                if gate is not None:
+                    await gate.wait(start, chunk[-1]['step'])
+                sent = time.perf_counter()
+                status, body = await _request(reader, writer, host, path, payload)
+            finally:
+                if gate is not None:
+                    await gate.release(start)
+            counters['requests'] += 1
+            if status == 200:
+                # Latensi hanya dari request yang berhasil di-score
+                latencies.append((time.perf_counter() - sent) * 1000)
+                counters['rows'] += batch_size
+            else:
+                counters['errors'] += 1
+                counters.setdefault('first_error', f"{status} {body.decode(errors='replace')}")
+    finally:
+        writer.close()
+
+async def run_load(host='127.0.0.1', port=8000, concurrency=32, duration_s=10.0,
+                   batch_size=1, sla_p99_ms=50.0, source_path=SOURCE_PATH, limit=200_000):
+    try:
+        health = await fetch_health(host, port)
+    except OSError as e:
+        print(f"[ERROR] Scoring service tidak bisa dihubungi di http://{host}:{port}: {e}")
+        return None
+    records = load_records(source_path, limit)
+    if not records:
+        print(f"[ERROR] Sumber kosong: {source_path}")
+        return None
+
+    # Tolak sebelum mengirim: tanpa field ini semua request hanya akan dijawab 400
+    missing = [f for f in health.get('required_fields', []) if f not in records[0]]
+    if missing:
+        print(f"[ERROR] Model di service membutuhkan field {missing} yang tidak ada di {source_path}. "
+              f"Gunakan sumber berurutan 'step' yang menyimpan ID akun (mis. log mentah PaySim).")
+        return None
+    shift, gate = None, None
+    if health.get('velocity'):
+        steps = np.array([r['step'] for r in records])
+        if (np.diff(steps) < 0).any():
+            print(f"[ERROR] Model memakai fitur velocity, tetapi {source_path} tidak berurutan 'step'.")
+            return None
+        current = health.get('velocity_step')
+        offset = max(0, current - int(steps[0])) if current is not None else 0
+        shift, gate = (offset, int(steps[-1] - steps[0]) + 1), StepGate()
+
+    latencies, counters, cursor = [], {'requests': 0, 'rows': 0, 'errors': 0}, [0]
+    print(f"Replaying {len(records):,} transactions: {concurrency} clients x {duration_s:.0f}s "
+          f"(batch_size={batch_size}) -> http://{host}:{port}")
+    if shift is not None and shift[0]:
+        print(f"Step sumber digeser +{shift[0]} agar melanjutkan state velocity service (step {current}).")
+
+    start = time.perf_counter()
+    deadline = start + duration_s
+    await asyncio.gather(*(
+        _client(host, port, records, cursor, deadline, batch_size, latencies, counters, shift, gate)
+        for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    if counters['rows'] == 0:
+        print(f"[ERROR] Tidak ada transaksi yang berhasil di-score ({counters['errors']:,} request gagal). "
+              f"Contoh error: {counters.get('first_error')}")
+        return None
+
+    lat = np.asarray(latencies)
+    report = {
+        'requests': counters['requests'],
+        'rows': counters['rows'],
+        'errors': counters['errors'],
+        'requests_per_s': round(counters['requests'] / elapsed, 1),
+        'rows_per_s': round(counters['rows'] / elapsed, 1),
+        'latency_ms_p50': round(float(np.percentile(lat, 50)), 2),
+        'latency_ms_p99': round(float(np.percentile(lat, 99)), 2),
+        'sla_p99_ms': sla_p99_ms,
+    }
+    report['sla_met'] = report['latency_ms_p99'] <= sla_p99_ms and counters['errors'] == 0
+
+    print("-" * 30)
+    for key, value in report.items():
+        print(f"{key:>16}: {value}")
+    print("-" * 30)
+    if counters['errors']:
+        print(f"[WARNING] {counters['errors']:,} request gagal (contoh: {counters['first_error']}).")
+    print("[SUCCESS] SLA terpenuhi." if report['sla_met'] else "[WARNING] SLA tidak terpenuhi.")
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator untuk scoring service fraud")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--batch-size', type=int, default=1, help="1 = /score, >1 = /score/batch")
+    parser.add_argument('--sla-p99-ms', type=float, default=50.0)
+    parser.add_argument('--source', default=SOURCE_PATH, help="Log berurutan 'step' (default: log mentah PaySim)")
+    parser.add_argument('--limit', type=int, default=200_000, help="Jumlah baris pertama sumber yang diputar ulang")
+    args = parser.parse_args(argv)
+
+    try:
+        resolve_artifact(args.source)
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    report = asyncio.run(run_load(args.host, args.port, args.concurrency, args.duration, args.batch_size,
+                                  args.sla_p99_ms, args.source, args.limit))
+    if report is None:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
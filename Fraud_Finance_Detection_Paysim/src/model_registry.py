@@ -0,0 +1,348 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import numpy as np
+
+from artifacts import resolve_artifact
+from features import FraudFeatureTransformer, load_transformer, save_transformer
+from fast_forest import CompiledForest, compile_model
+from resources import rss_breakdown_mb
+from paths import BASE_DIR, MODEL_PATH, REGISTRY_DIR
+
+# Registry model berversi: models/registry/<nama>/v0003/
+#   metadata.json  -> skema fitur, metrik, parameter, fingerprint data training, info penyimpanan
+#   model.pkl      -> objek sklearn asli (joblib, kompresi opsional) untuk analisis / training lanjutan
+#   forest/*.npy   -> array CompiledForest tanpa kompresi: dimuat dengan mmap, sehingga semua
+#                     worker Streamlit / scoring berbagi SATU salinan fisik lewat page cache
+#                     (forest/forest.npz bila didaftarkan dengan kompresi: kecil di disk, disalin ke RAM)
+#   drift_reference.json -> histogram referensi data training untuk monitor drift (drift.py)
+#   metadata 'lineage' -> asal versi hasil refresh inkremental (refresh.py): versi induk,
+#                     step terakhir yang dilatih, dan blok pohon per jendela step
+#   CURRENT        -> versi yang dipromosikan (default: versi terbaru)
+#
+# Scorer forest dimuat tanpa unpickle sklearn sama sekali; model non-forest tetap lewat joblib.
+#
+#   python model_registry.py register --model ../models/fraud_model.pkl
+#   python model_registry.py list
+#   python model_registry.py bench fraud_model      -> waktu muat & RSS per metode, di proses baru
+
+METADATA_FILE = 'metadata.json'
+DRIFT_REFERENCE_FILE = 'drift_reference.json'
+CURRENT_FILE = 'CURRENT'
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def data_fingerprint(data_path):
+    # Fingerprint isi data training (file artefak yang benar-benar dibaca)
+    try:
+        resolved, fmt = resolve_artifact(data_path)
+    except FileNotFoundError:
+        return None
+    return {'path': os.path.relpath(resolved, BASE_DIR), 'format': fmt,
+            'bytes': os.path.getsize(resolved), 'sha256': file_sha256(resolved)}
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def _json_params(model):
+    # Hanya parameter yang bisa ditulis ke JSON (None, angka, string, bool)
+    params = model.get_params() if hasattr(model, 'get_params') else {}
+    return {k: v for k, v in params.items() if v is None or isinstance(v, (bool, int, float, str))}
+
+def _dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+class LoadedModel:
+    def __init__(self, scorer, transformer, metadata, stats):
+        self.scorer = scorer
+        self.transformer = transformer
+        self.metadata = metadata
+        self.stats = stats
+
+class ModelRegistry:
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+
+    # --- Navigasi ---
+    def names(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(n for n in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, n)))
+
+    def versions(self, name):
+        path = os.path.join(self.root, name)
+        if not os.path.isdir(path):
+            return []
+        return sorted(int(d[1:]) for d in os.listdir(path) if d.startswith('v') and d[1:].isdigit())
+
+    def version_dir(self, name, version):
+        return os.path.join(self.root, name, f'v{version:04d}')
+
+    def current(self, name):
+        pointer = os.path.join(self.root, name, CURRENT_FILE)
+        if os.path.exists(pointer):
+            with open(pointer) as f:
+                return int(f.read().strip())
+        versions = self.versions(name)
+        if not versions:
+            raise KeyError(f"Model '{name}' belum ada di registry {self.root}")
+        return versions[-1]
+
+    def metadata(self, name, version=None):
+        version = self.current(name) if version is None else version
+        with open(os.path.join(self.version_dir(name, version), METADATA_FILE)) as f:
+            return json.load(f)
+
+    def drift_reference(self, name, version=None):
+        version = self.current(name) if version is None else version
+        path = os.path.join(self.version_dir(name, version), DRIFT_REFERENCE_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def find_source(self, model_path):
+        # Versi registry yang ditulis bersamaan dengan file model 'lama' (mis. models/fraud_model.pkl).
+        # Dicocokkan lewat ukuran + mtime: bila file model diganti di luar registry, tidak ada yang cocok.
+        if not os.path.exists(model_path):
+            return None
+        stamp = _file_stamp(model_path)
+        name = os.path.splitext(os.path.basename(model_path))[0]
+        for version in reversed(self.versions(name)):
+            if self.metadata(name, version).get('source_file') == stamp:
+                return name, version
+        return None
+
+    # --- Menulis ---
+    def register(self, model, transformer, name, metrics=None, data_path=None, params=None,
+                 compress=0, source_path=None, promote=True, drift_reference=None, lineage=None):
+        # compress: level kompresi joblib untuk model.pkl dan .npz untuk array forest (0 = tanpa kompresi, bisa mmap)
+        versions = self.versions(name)
+        version = (versions[-1] + 1) if versions else 1
+        out_dir = self.version_dir(name, version)
+        tmp_dir = out_dir + '.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        import joblib
+        joblib.dump(model, os.path.join(tmp_dir, 'model.pkl'), compress=compress)
+        scorer = compile_model(model)
+        forest_format = None
+        if isinstance(scorer, CompiledForest):
+            scorer.save(os.path.join(tmp_dir, 'forest'), compress=bool(compress))
+            forest_format = 'npz' if compress else 'npy'
+
+        metadata = {
+            'name': name,
+            'version': version,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'model_class': type(model).__name__,
+            'params': params if params is not None else _json_params(model),
+            'feature_schema': {'names': list(transformer.feature_names), 'dtype': 'float32',
+                               'n_features': transformer.n_features},
+            'metrics': {k: float(v) for k, v in (metrics or {}).items()},
+            'training_data': data_fingerprint(data_path) if data_path else None,
+            'storage': {'compress': compress, 'forest_format': forest_format,
+                        'n_trees': getattr(scorer, 'n_trees', None),
+                        'bytes': _dir_bytes(tmp_dir)},
+            'source_file': _file_stamp(source_path) if source_path else None,
+            'lineage': lineage,
+        }
+        self._write_metadata(tmp_dir, metadata)
+        if drift_reference is not None:
+            # drift_reference: DriftSketch.to_dict() dari data training
+            with open(os.path.join(tmp_dir, DRIFT_REFERENCE_FILE), 'w') as f:
+                json.dump(drift_reference, f)
+
+        os.replace(tmp_dir, out_dir)
+        if promote:
+            self.promote(name, version)
+        return version
+
+    def promote(self, name, version):
+        if version not in self.versions(name):
+            raise KeyError(f"Versi {version} dari '{name}' tidak ada")
+        pointer = os.path.join(self.root, name, CURRENT_FILE)
+        with open(pointer + '.tmp', 'w') as f:
+            f.write(f'{version}\n')
+        os.replace(pointer + '.tmp', pointer)
+
+    def publish(self, name, version, model_path):
+        # Salin model.pkl versi ini ke file model 'lama' (mis. models/fraud_model.pkl) + transformernya,
+        # lalu catat stempel file tersebut agar load_scorer(model_path) memuat array mmap versi ini
+        version_dir = self.version_dir(name, version)
+        meta = self.metadata(name, version)
+        os.makedirs(os.path.dirname(os.path.abspath(model_path)), exist_ok=True)
+        shutil.copyfile(os.path.join(version_dir, 'model.pkl'), model_path + '.tmp')
+        os.replace(model_path + '.tmp', model_path)
+        save_transformer(FraudFeatureTransformer(feature_names=meta['feature_schema']['names']), model_path)
+        meta['source_file'] = _file_stamp(model_path)
+        self._write_metadata(version_dir, meta)
+
+    def _write_metadata(self, directory, metadata):
+        path = os.path.join(directory, METADATA_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+    # --- Memuat ---
+    def load_model(self, name, version=None):
+        # Objek sklearn asli; tanpa kompresi array numpy di dalam pickle di-mmap oleh joblib
+        import joblib
+        version = self.current(name) if version is None else version
+        meta = self.metadata(name, version)
+        path = os.path.join(self.version_dir(name, version), 'model.pkl')
+        return joblib.load(path, mmap_mode=None if meta['storage']['compress'] else 'r')
+
+    def load(self, name, version=None, mmap=True, engine='auto'):
+        version = self.current(name) if version is None else version
+        before = rss_breakdown_mb()
+        start = time.perf_counter()
+
+        meta = self.metadata(name, version)
+        transformer = FraudFeatureTransformer(feature_names=meta['feature_schema']['names'])
+        # Array forest di-mmap (dibagi antar proses). Batch di atas batas engine memakai model
+        # sklearn asal (fast_forest.NUMBA_MAX_ROWS / NUMPY_MAX_ROWS): model.pkl baru di-unpickle saat
+        # batch besar pertama, jadi salinan privat itu hanya ada di proses yang memang butuh
+        if meta['storage']['forest_format']:
+            fallback = (lambda: self.load_model(name, version)) if engine == 'auto' else None
+            scorer = CompiledForest.load(os.path.join(self.version_dir(name, version), 'forest'),
+                                         mmap=mmap, engine=engine, fallback=fallback)
+        else:
+            scorer = compile_model(self.load_model(name, version), engine=engine)
+
+        after = rss_breakdown_mb()
+        stats = {
+            'load_seconds': time.perf_counter() - start,
+            'rss_delta_mb': after['rss'] - before['rss'],
+            'private_delta_mb': after['private'] - before['private'],
+            'model_mb': getattr(scorer, 'nbytes', 0) / 1024**2,
+            'mmap': bool(mmap and isinstance(scorer, CompiledForest) and meta['storage']['forest_format'] == 'npy'),
+        }
+        return LoadedModel(scorer, transformer, meta, stats)
+
+def load_scorer(model_path, registry=None, mmap=True):
+    # Titik masuk untuk dashboard, scoring service, replay & Tahap 5: (scorer, transformer).
+    # Pakai versi registry yang sesuai dengan file model bila ada (mmap, tanpa unpickle);
+    # bila tidak (model lama / diganti manual) kembali ke joblib.load + compile_model.
+    registry = registry or ModelRegistry()
+    match = registry.find_source(model_path)
+    if match is not None:
+        loaded = registry.load(*match, mmap=mmap)
+        return loaded.scorer, loaded.transformer
+
+    import joblib
+    model = joblib.load(model_path)
+    return compile_model(model), load_transformer(model_path, model)
+
+# --- Benchmark waktu muat & memori, masing-masing di proses baru (cold start) ---
+def _warm_engine():
+    # Kompilasi kernel numba dengan forest satu-daun agar JIT tidak ikut terhitung sebagai memori model
+    forest = CompiledForest(np.array([-1], np.int32), np.zeros(1, np.float32), np.zeros((1, 2), np.int32),
+                            np.array([[1.0, 0.0]]), np.zeros(1, np.int32), np.array([0, 1]))
+    forest.score(np.zeros((1, 1), dtype=np.float32))
+
+def _measure(method, name, version, model_path, root):
+    from resources import rss_breakdown_mb as breakdown
+    _warm_engine()
+    before = breakdown()
+    start = time.perf_counter()
+    if method == 'joblib':
+        import joblib
+        scorer = compile_model(joblib.load(model_path))
+        transformer = FraudFeatureTransformer(ModelRegistry(root).metadata(name, version)['feature_schema']['names'])
+    else:
+        loaded = ModelRegistry(root).load(name, version, mmap=(method == 'mmap'))
+        scorer, transformer = loaded.scorer, loaded.transformer
+    load_seconds = time.perf_counter() - start
+    loaded = breakdown()
+    # Satu batch scoring menyentuh semua halaman array yang relevan -> RSS "setelah dipakai"
+    scorer.score(np.zeros((1024, transformer.n_features), dtype=np.float32))
+    used = breakdown()
+    return {
+        'method': method,
+        'load_seconds': load_seconds,
+        'rss_after_load_mb': loaded['rss'] - before['rss'],
+        'private_after_use_mb': used['private'] - before['private'],
+        'shared_after_use_mb': used['shared'] - before['shared'],
+    }
+
+def benchmark_load(name, version=None, model_path=None, root=REGISTRY_DIR, methods=('joblib', 'copy', 'mmap')):
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    registry = ModelRegistry(root)
+    version = registry.current(name) if version is None else version
+    model_path = model_path or os.path.join(registry.version_dir(name, version), 'model.pkl')
+    results = []
+    for method in methods:
+        # Satu proses 'spawn' per metode agar tidak ada import / cache yang terbawa
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results.append(pool.submit(_measure, method, name, version, model_path, root).result())
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Registry model fraud berversi dengan pemuatan memory-mapped")
+    parser.add_argument('--root', default=REGISTRY_DIR)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    reg = sub.add_parser('register', help="Daftarkan file model (.pkl) sebagai versi baru")
+    reg.add_argument('--model', default=MODEL_PATH)
+    reg.add_argument('--name', default=None, help="Default: nama file model tanpa ekstensi")
+    reg.add_argument('--data', default=None, help="Data training (untuk fingerprint)")
+    reg.add_argument('--compress', type=int, default=0, help="0 = tanpa kompresi (mmap), 1-9 = level kompresi")
+    reg.add_argument('--no-promote', action='store_true')
+
+    sub.add_parser('list', help="Daftar model & versi")
+
+    promote = sub.add_parser('promote', help="Jadikan versi tertentu versi aktif")
+    promote.add_argument('name')
+    promote.add_argument('version', type=int)
+
+    bench = sub.add_parser('bench', help="Bandingkan waktu muat & RSS: joblib vs registry (copy / mmap)")
+    bench.add_argument('name')
+    bench.add_argument('--version', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'register':
+        import joblib
+        if not os.path.exists(args.model):
+            print(f"[ERROR] Model tidak ditemukan di: {args.model}")
+            sys.exit(1)
+        model = joblib.load(args.model)
+        name = args.name or os.path.splitext(os.path.basename(args.model))[0]
+        version = registry.register(model, load_transformer(args.model, model), name, data_path=args.data,
+                                    compress=args.compress, source_path=args.model, promote=not args.no_promote)
+        print(f"[SUCCESS] {name} v{version} disimpan di: {registry.version_dir(name, version)}")
+    elif args.command == 'list':
+        for name in registry.names():
+            current = registry.current(name)
+            for version in registry.versions(name):
+                meta = registry.metadata(name, version)
+                metrics = ', '.join(f"{k}={v:.4f}" for k, v in meta['metrics'].items())
+                print(f"{'*' if version == current else ' '} {name} v{version:<3} {meta['created_at']} "
+                      f"{meta['model_class']:<24} {meta['storage']['bytes'] / 1024**2:7.1f} MB  {metrics}")
+    elif args.command == 'promote':
+        registry.promote(args.name, args.version)
+        print(f"[SUCCESS] {args.name} v{args.version} sekarang aktif")
+    else:
+        print(f"{'metode':>8} | {'muat (s)':>9} | {'RSS muat':>9} | {'private':>9} | {'shared':>9}")
+        for r in benchmark_load(args.name, args.version, root=args.root):
+            print(f"{r['method']:>8} | {r['load_seconds']:9.3f} | {r['rss_after_load_mb']:7.1f}MB | "
+                  f"{r['private_after_use_mb']:7.1f}MB | {r['shared_after_use_mb']:7.1f}MB")
+        print("-" * 30)
+        print("private = memori milik worker sendiri; shared = halaman mmap yang dibagi antar worker")
+
+if __name__ == "__main__":
+    main()
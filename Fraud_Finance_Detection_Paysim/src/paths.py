@@ -0,0 +1,31 @@
+import os
+
+# Lokasi file bersama untuk kelima tahap, kedua dashboard dan tool di 'src'.
+# Artefak olahan berada di 'Data_Processed/' (folder yang ikut di repo);
+# log mentah PaySim (tidak ikut di repo, ~470MB) diletakkan di 'data/raw/'.
+# File turunan yang bisa dibangun ulang (cache dashboard, manifest pipeline) ada di 'data/'.
+
+# Folder kode (notebooks/, src/)
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Akar semua data & artefak. FRAUD_DATA_ROOT memindahkannya ke workspace lain
+# (dipakai benchmarks/ agar data sintetis tidak menimpa artefak proyek)
+BASE_DIR = os.environ.get('FRAUD_DATA_ROOT') or PROJECT_DIR
+
+RAW_DATA_PATH = os.path.join(BASE_DIR, 'data', 'raw', 'PS_20174392719_1491204439457_log.csv')
+
+PROCESSED_DIR = os.path.join(BASE_DIR, 'Data_Processed')
+SAMPLE_PATH = os.path.join(PROCESSED_DIR, 'balanced_sample_20k.csv')
+FEATURES_PATH = os.path.join(PROCESSED_DIR, 'final_features_20k.csv')
+FULL_FEATURES_PATH = os.path.join(PROCESSED_DIR, 'full_features')
+
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+MODEL_PATH = os.path.join(MODELS_DIR, 'fraud_model.pkl')
+FULL_MODEL_PATH = os.path.join(MODELS_DIR, 'fraud_model_full.pkl')
+VELOCITY_STATE_PATH = os.path.join(MODELS_DIR, 'velocity_state.pkl')
+# Model berversi + metadata + array forest (lihat model_registry.py)
+REGISTRY_DIR = os.path.join(MODELS_DIR, 'registry')
+
+VIZ_DIR = os.path.join(BASE_DIR, 'visualizations')
+
+CACHE_DIR = os.path.join(BASE_DIR, 'data', 'cache')
+PIPELINE_DIR = os.path.join(BASE_DIR, 'data', 'pipeline')
@@ -0,0 +1,299 @@
+import os
+import sys
+import json
+import time
+import ast
+import hashlib
+import argparse
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from artifacts import resolve_artifact
+from features import transformer_path
+from paths import (BASE_DIR, PROJECT_DIR, RAW_DATA_PATH, SAMPLE_PATH, FEATURES_PATH, MODEL_PATH,
+                   VIZ_DIR, PIPELINE_DIR)
+
+# Orkestrator inkremental untuk kelima tahap di folder 'notebooks'.
+# Setiap tahap mendeklarasikan input, output dan parameter; kode yang dipakainya (modul src/)
+# diturunkan dari import skrip tahap secara transitif (lihat local_modules).
+# Fingerprint tahap = hash ISI file input + kode + parameter; bila sama dengan run terakhir
+# (dan output masih utuh), tahap dilewati. Tahap yang tidak saling bergantung (mis. EDA
+# dan training) dijalankan bersamaan di process pool. Durasi per tahap dicatat.
+#
+#   python pipeline.py                         -> jalankan semua tahap yang berubah
+#   python pipeline.py train --set train.n_estimators=100
+#   python pipeline.py --dry-run               -> tampilkan tahap yang akan dijalankan
+
+NOTEBOOK_DIR = os.path.join(PROJECT_DIR, 'notebooks')
+SRC_DIR = os.path.join(PROJECT_DIR, 'src')
+MANIFEST_PATH = os.path.join(PIPELINE_DIR, 'manifest.json')
+RUNS_PATH = os.path.join(PIPELINE_DIR, 'runs.jsonl')
+
+STAGES = {
+    'clean': {
+        'script': '1_Cleaning_Dataset.py', 'func': 'start_phase_1',
+        'params': {'n_samples': 20000, 'seed': 42, 'chunksize': 500_000, 'with_velocity': True},
+        'inputs': [RAW_DATA_PATH],
+        'outputs': [SAMPLE_PATH],
+        'deps': [],
+    },
+    'eda': {
+        'script': '2_Strategic_EDA.py', 'func': 'run_strategic_eda',
+        'params': {'chunksize': 500_000, 'n_workers': 1},
+        # Log mentah bila ada, sampel seimbang sebagai cadangan
+        'inputs': [RAW_DATA_PATH, SAMPLE_PATH],
+        'outputs': [os.path.join(VIZ_DIR, name) for name in
+                    ('1_fraud_by_type.png', '2_correlation_heatmap.png', '3_amount_distribution.png')],
+        'deps': ['clean'],
+    },
+    'features': {
+        'script': '3_Feature_Engineering.py', 'func': 'run_feature_engineering',
+        'params': {},
+        'inputs': [SAMPLE_PATH],
+        'outputs': [FEATURES_PATH],
+        'deps': ['clean'],
+    },
+    'train': {
+        'script': '4_Model_Training.py', 'func': 'run_model_training',
+        'params': {'n_estimators': 50, 'max_depth': None, 'min_samples_leaf': 1},
+        'inputs': [FEATURES_PATH],
+        'outputs': [MODEL_PATH, transformer_path(MODEL_PATH)],
+        'deps': ['features'],
+    },
+    'test': {
+        'script': '5_Model_Testing.py', 'func': 'run_prediction_test',
+        'params': {},
+        'inputs': [MODEL_PATH, transformer_path(MODEL_PATH), FEATURES_PATH],
+        'outputs': [],
+        'deps': ['train'],
+    },
+}
+
+# --- Fingerprint berbasis isi file ---
+def _resolve(path):
+    # Artefak tabel boleh berupa .feather/.parquet/.csv; file lain apa adanya
+    try:
+        return resolve_artifact(path)[0]
+    except FileNotFoundError:
+        return path if os.path.exists(path) else None
+
+class FileHasher:
+    # SHA-256 isi file. Hash di-memo per (ukuran, mtime) di manifest sehingga
+    # file besar yang tidak berubah (log mentah 470MB) tidak dibaca ulang setiap run.
+    def __init__(self, memo=None):
+        self.memo = memo or {}
+
+    def hash(self, path):
+        resolved = _resolve(path)
+        if resolved is None:
+            return None
+        stat = os.stat(resolved)
+        key = os.path.relpath(resolved, BASE_DIR)
+        cached = self.memo.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(resolved, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        self.memo[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+def local_modules(script):
+    # Semua modul src/ yang di-import skrip (termasuk import di dalam fungsi), ditelusuri transitif:
+    # mengubah velocity.py ikut mengubah fingerprint tahap yang memakainya lewat modul lain
+    found, queue = set(), [script]
+    while queue:
+        with open(queue.pop(), encoding='utf-8') as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                module = name.split('.')[0] + '.py'
+                path = os.path.join(SRC_DIR, module)
+                if module not in found and os.path.exists(path):
+                    found.add(module)
+                    queue.append(path)
+    return sorted(found)
+
+def stage_fingerprint(name, stage, hasher):
+    script = os.path.join(NOTEBOOK_DIR, stage['script'])
+    payload = {
+        'stage': name,
+        'params': stage['params'],
+        'script': hasher.hash(script),
+        'code': {module: hasher.hash(os.path.join(SRC_DIR, module)) for module in local_modules(script)},
+        'inputs': {os.path.relpath(p, BASE_DIR): hasher.hash(p) for p in stage['inputs']},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+def output_hashes(stage, hasher):
+    return {os.path.relpath(p, BASE_DIR): hasher.hash(p) for p in stage['outputs']}
+
+# --- Manifest ---
+def load_manifest(path=MANIFEST_PATH):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {'stages': {}, 'file_hashes': {}}
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+# --- Eksekusi satu tahap (di proses terpisah) ---
+def _run_stage(script, func, params):
+    os.environ.setdefault('MPLBACKEND', 'Agg')  # plt.show() tidak memblokir di worker
+    spec = importlib.util.spec_from_file_location(os.path.splitext(script)[0], os.path.join(NOTEBOOK_DIR, script))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    start = time.perf_counter()
+    getattr(module, func)(**params)
+    return time.perf_counter() - start
+
+def _with_dependencies(selected):
+    # Tahap yang diminta + semua tahap yang dibutuhkannya
+    needed, todo = set(), list(selected)
+    while todo:
+        name = todo.pop()
+        if name not in needed:
+            needed.add(name)
+            todo.extend(STAGES[name]['deps'])
+    return [name for name in STAGES if name in needed]
+
+def run_pipeline(selected=None, overrides=None, force=(), max_workers=2, dry_run=False):
+    manifest = load_manifest()
+    hasher = FileHasher(manifest.get('file_hashes'))
+    names = _with_dependencies(selected or list(STAGES))
+    stages = {name: dict(STAGES[name], params={**STAGES[name]['params'], **(overrides or {}).get(name, {})})
+              for name in names}
+
+    done, failed, timings = set(), set(), {}
+    pending = list(names)
+    running = {}
+    run_started = time.perf_counter()
+
+    def plan(name):
+        # 'skip' bila fingerprint & output sama dengan run terakhir; 'source' bila input
+        # tidak tersedia tetapi output sudah ada (mis. log mentah tidak ikut di repo)
+        stage = stages[name]
+        record = manifest['stages'].get(name, {})
+        if any(_resolve(p) is None for p in stage['outputs']):
+            return 'run'
+        if name not in force and record.get('fingerprint') == stage_fingerprint(name, stage, hasher) \
+                and record.get('outputs') == output_hashes(stage, hasher):
+            return 'skip'
+        if all(_resolve(p) is None for p in stage['inputs']):
+            return 'source'
+        return 'run'
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for name in list(pending):
+                if any(dep in failed for dep in stages[name]['deps']):
+                    print(f"[WARNING] {name}: dilewati karena tahap sebelumnya gagal")
+                    pending.remove(name)
+                    failed.add(name)
+                    continue
+                if not all(dep in done for dep in stages[name]['deps'] if dep in stages):
+                    continue
+                pending.remove(name)
+                action = plan(name)
+                if action in ('skip', 'source') or dry_run:
+                    label = {'skip': 'tidak berubah, dilewati', 'source': 'input tidak tersedia, memakai output yang ada',
+                             'run': 'akan dijalankan'}[action]
+                    print(f"[{name}] {label}")
+                    done.add(name)
+                    continue
+                print(f"[{name}] menjalankan {stages[name]['script']} {stages[name]['params']}")
+                running[pool.submit(_run_stage, stages[name]['script'], stages[name]['func'],
+                                    stages[name]['params'])] = name
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                stage = stages[name]
+                try:
+                    elapsed = future.result()
+                    missing = [p for p in stage['outputs'] if _resolve(p) is None]
+                    if missing:
+                        raise RuntimeError(f"output tidak dihasilkan: {missing}")
+                except Exception as e:
+                    print(f"[ERROR] {name}: {e}")
+                    failed.add(name)
+                    continue
+                timings[name] = elapsed
+                manifest['stages'][name] = {
+                    'fingerprint': stage_fingerprint(name, stage, hasher),
+                    'outputs': output_hashes(stage, hasher),
+                    'params': stage['params'],
+                    'seconds': round(elapsed, 3),
+                    'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                }
+                manifest['file_hashes'] = hasher.memo
+                save_manifest(manifest)
+                done.add(name)
+                print(f"[SUCCESS] {name} selesai dalam {elapsed:.2f}s")
+
+    total = time.perf_counter() - run_started
+    if not dry_run:
+        manifest['file_hashes'] = hasher.memo
+        save_manifest(manifest)
+        with open(RUNS_PATH, 'a') as f:
+            f.write(json.dumps({'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'total_seconds': round(total, 3),
+                                'stages': {k: round(v, 3) for k, v in timings.items()},
+                                'failed': sorted(failed)}) + '\n')
+
+    print("-" * 30)
+    for name in names:
+        status = 'FAILED' if name in failed else (f"{timings[name]:.2f}s" if name in timings else 'skipped')
+        print(f"{name:>10}: {status}")
+    print(f"{'total':>10}: {total:.2f}s")
+    print("-" * 30)
+    return timings, failed
+
+def _parse_overrides(items):
+    # --set train.n_estimators=100 -> {'train': {'n_estimators': 100}}
+    overrides = {}
+    for item in items:
+        key, _, raw = item.partition('=')
+        stage, _, param = key.partition('.')
+        if stage not in STAGES or not param:
+            raise ValueError(f"Format --set tidak valid: {item} (contoh: train.n_estimators=100)")
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            value = raw
+        overrides.setdefault(stage, {})[param] = value
+    return overrides
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline inkremental untuk tahap 1-5 deteksi fraud")
+    parser.add_argument('stages', nargs='*',
+                        help=f"Tahap yang dijalankan (default semua): {', '.join(STAGES)}")
+    parser.add_argument('--set', action='append', default=[], metavar='STAGE.PARAM=VALUE')
+    parser.add_argument('--force', action='append', default=[], metavar='STAGE', help="Jalankan ulang walau tidak berubah")
+    parser.add_argument('--workers', type=int, default=2, help="Jumlah tahap yang boleh berjalan bersamaan")
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args(argv)
+
+    unknown = [s for s in args.stages + args.force if s not in STAGES]
+    if unknown:
+        print(f"[ERROR] Tahap tidak dikenal: {unknown}")
+        sys.exit(1)
+    _, failed = run_pipeline(args.stages or None, _parse_overrides(args.set), set(args.force),
+                             args.workers, args.dry_run)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+import os
+import sys
+import time
+import argparse
+
+from artifacts import resolve_artifact
+from features import TYPE_CATEGORIES, TYPE_FEATURES, decode_types
+from paths import RAW_DATA_PATH, SAMPLE_PATH, FEATURES_PATH, FULL_FEATURES_PATH
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+
+# Query engine analitik langsung di atas artefak di disk (CSV mentah, Feather, Parquet).
+# Data tidak dimuat utuh ke pandas: hanya kolom yang dipakai dibaca (projection pushdown),
+# filter diterapkan saat scan (predicate pushdown), dan agregasi berjalan multi-thread.
+#
+# Backend:
+# - DuckDB (opsional, `pip install duckdb`): SQL penuh lewat QueryEngine.sql()
+# - Tanpa DuckDB: pyarrow.dataset + agregasi parsial per batch lalu digabung.
+#   QueryEngine.aggregate() berjalan di kedua backend dengan hasil yang sama.
+# Tabel fitur hanya menyimpan one-hot 'type_*': kolom 'type' tersedia sebagai kolom virtual
+# (di-decode dari type_*), jadi preset yang sama berjalan di tabel mentah maupun tabel fitur.
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# Nama tabel -> artefak. 'scored' diisi dari dashboard_cache bila diperlukan.
+DEFAULT_SOURCES = {
+    'raw': RAW_DATA_PATH,
+    'sample': SAMPLE_PATH,
+    'features': FEATURES_PATH,
+    'full_features': FULL_FEATURES_PATH,
+}
+
+AGG_FUNCS = ('sum', 'count', 'min', 'max', 'mean')
+FILTER_OPS = ('==', '!=', '<', '<=', '>', '>=', 'in')
+DATASET_FORMATS = {'feather': 'ipc', 'parquet': 'parquet', 'csv': 'csv'}
+
+def _sql_literal(value):
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    if isinstance(value, (list, tuple, set)):
+        return '(' + ', '.join(_sql_literal(v) for v in value) + ')'
+    return repr(value)
+
+def _sql_filter(filters):
+    clauses = []
+    for col, op, value in filters:
+        if op not in FILTER_OPS:
+            raise ValueError(f"Operator filter tidak dikenal: {op}")
+        clauses.append(f'"{col}" {"IN" if op == "in" else "=" if op == "==" else op} {_sql_literal(value)}')
+    return ' AND '.join(clauses)
+
+def _arrow_filter(filters):
+    import pyarrow.compute as pc
+
+    expr = None
+    for col, op, value in filters:
+        field = pc.field(col)
+        if op == 'in':
+            clause = field.isin(list(value))
+        elif op in FILTER_OPS:
+            clause = {'==': field == value, '!=': field != value, '<': field < value,
+                      '<=': field <= value, '>': field > value, '>=': field >= value}[op]
+        else:
+            raise ValueError(f"Operator filter tidak dikenal: {op}")
+        expr = clause if expr is None else expr & clause
+    return expr
+
+def _onehot_type_filters(filters):
+    # ('type', '==', 'TRANSFER') -> ('type_TRANSFER', '==', True); hanya ==, != dan in
+    out = []
+    for col, op, value in filters:
+        if col != 'type':
+            out.append((col, op, value))
+            continue
+        values = list(value) if op == 'in' else [value]
+        unknown = [v for v in values if v not in TYPE_CATEGORIES]
+        if unknown or op not in ('==', '!=', 'in'):
+            raise ValueError(f"Filter 'type' {op} {value!r} tidak didukung untuk tabel fitur (one-hot type_*)")
+        if op == '!=':
+            out.append((f'type_{value}', '==', False))
+        else:
+            # Tepat satu kolom one-hot bernilai True per baris: 'in' = bukan salah satu tipe lain
+            out.extend((f'type_{t}', '==', False) for t in TYPE_CATEGORIES if t not in values)
+    return out
+
+class QueryEngine:
+    def __init__(self, sources=None, threads=None, backend='auto'):
+        self.sources = dict(DEFAULT_SOURCES)
+        self.sources.update(sources or {})
+        self.threads = threads or os.cpu_count()
+        # backend: 'auto' (duckdb bila ada), 'duckdb', atau 'arrow'
+        if backend == 'auto':
+            backend = 'duckdb' if duckdb is not None else 'arrow'
+        if backend == 'duckdb' and duckdb is None:
+            raise ImportError("backend='duckdb' membutuhkan paket duckdb (pip install duckdb).")
+        self.backend = backend
+        self._con = None
+        self._registered = set()
+
+    def _resolve(self, name):
+        if name not in self.sources:
+            raise KeyError(f"Sumber tidak dikenal: {name} (tersedia: {sorted(self.sources)})")
+        return resolve_artifact(self.sources[name])
+
+    def dataset(self, name):
+        import pyarrow.dataset as ds
+        path, fmt = self._resolve(name)
+        return ds.dataset(path, format=DATASET_FORMATS[fmt])
+
+    def _decodes_type(self, name):
+        # True bila 'type' harus di-decode dari one-hot type_* (tabel fitur)
+        names = self.dataset(name).schema.names
+        return 'type' not in names and all(col in names for col in TYPE_FEATURES)
+
+    def columns(self, name):
+        names = self.dataset(name).schema.names
+        return names + ['type'] if self._decodes_type(name) else names
+
+    def _check_columns(self, source, needed):
+        # Validasi di awal: kolom yang tidak ada -> KeyError yang jelas, bukan error scan di tengah jalan
+        available = self.columns(source)
+        missing = [col for col in dict.fromkeys(needed) if col not in available]
+        if missing:
+            raise KeyError(f"Kolom {missing} tidak ada di sumber '{source}' (tersedia: {available})")
+
+    # --- Backend DuckDB ---
+    def connection(self):
+        if self._con is None:
+            self._con = duckdb.connect()
+            self._con.execute(f"SET threads TO {int(self.threads)}")
+        return self._con
+
+    def _register(self, name):
+        # View per sumber; DuckDB membaca file secara streaming dengan pushdown
+        con = self.connection()
+        if name in self._registered:
+            return
+        path, fmt = self._resolve(name)
+        if fmt == 'csv':
+            relation = f'read_csv_auto({_sql_literal(path)})'
+        elif fmt == 'parquet':
+            relation = f'read_parquet({_sql_literal(path)})'
+        else:
+            # Feather (Arrow IPC) dipindai sebagai pyarrow.dataset, filter & proyeksi tetap di-push down
+            relation = f'"{name}__arrow"'
+            con.register(f'{name}__arrow', self.dataset(name))
+        select = '*'
+        if self._decodes_type(name):
+            cases = ' '.join(f'WHEN "{col}" THEN {_sql_literal(t)}' for col, t in zip(TYPE_FEATURES, TYPE_CATEGORIES))
+            select = f'*, CASE {cases} END AS "type"'
+        con.execute(f'CREATE OR REPLACE VIEW "{name}" AS SELECT {select} FROM {relation}')
+        self._registered.add(name)
+
+    def sql(self, query, sources=None):
+        # SQL bebas; sumber yang dipakai harus disebut di 'sources' (default: semua yang filenya ada)
+        if self.backend != 'duckdb':
+            raise ImportError("QueryEngine.sql() membutuhkan duckdb; gunakan aggregate() tanpa duckdb.")
+        for name in (sources or self.available_sources()):
+            self._register(name)
+        return self.connection().execute(query).df()
+
+    def available_sources(self):
+        available = []
+        for name in self.sources:
+            try:
+                self._resolve(name)
+                available.append(name)
+            except FileNotFoundError:
+                pass
+        return available
+
+    # --- Agregasi terstruktur (kedua backend) ---
+    def aggregate(self, source, by=(), metrics=None, filters=(), step_window=None):
+        # metrics: {'nama_output': (kolom, fungsi)} dengan fungsi di AGG_FUNCS
+        # filters: [(kolom, operator, nilai)], operator di FILTER_OPS
+        # step_window: kelompokkan 'step' per jendela N step -> kolom 'window_start'
+        metrics = metrics or {'transactions': ('step', 'count')}
+        for col, func in metrics.values():
+            if func not in AGG_FUNCS:
+                raise ValueError(f"Fungsi agregasi tidak dikenal: {func}")
+        keys = (['window_start'] if step_window else []) + list(by)
+        self._check_columns(source, list(by) + [col for col, _ in metrics.values()]
+                            + [col for col, _, _ in filters] + (['step'] if step_window else []))
+
+        if self.backend == 'duckdb':
+            self._register(source)
+            select = [f'(("step" - 1) // {int(step_window)}) * {int(step_window)} + 1 AS window_start'] if step_window else []
+            select += [f'"{col}"' for col in by]
+            select += [f'{"avg" if func == "mean" else func}("{col}") AS "{name}"' for name, (col, func) in metrics.items()]
+            query = f'SELECT {", ".join(select)} FROM "{source}"'
+            if filters:
+                query += f' WHERE {_sql_filter(filters)}'
+            if keys:
+                order = ', '.join(f'"{k}"' if k != 'window_start' else k for k in keys)
+                query += f' GROUP BY {order} ORDER BY {order}'
+            df = self.connection().execute(query).df()
+        else:
+            df = self._aggregate_arrow(source, list(by), metrics, filters, step_window)
+
+        for col in by:
+            if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+                df[col] = df[col].astype(str)
+        return df
+
+    def _aggregate_arrow(self, source, by, metrics, filters, step_window):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        keys = (['window_start'] if step_window else []) + by
+        value_cols = sorted({col for col, _ in metrics.values()})
+        columns = sorted(set(by + value_cols + (['step'] if step_window else [])))
+        decode = self._decodes_type(source) and ('type' in columns or any(col == 'type' for col, _, _ in filters))
+        if decode:
+            # 'type' virtual: baca kolom type_* dan filter 'type' diterjemahkan ke kolom one-hot
+            columns = sorted(set(columns) - {'type'} | set(TYPE_FEATURES))
+            filters = _onehot_type_filters(filters)
+        scanner = self.dataset(source).scanner(columns=columns, filter=_arrow_filter(filters) if filters else None,
+                                               use_threads=True)
+
+        # Agregat parsial per batch (sum/count/min/max), lalu digabung sekali di akhir
+        partial_aggs = [(col, func) for col in value_cols for func in ('sum', 'count', 'min', 'max')]
+        partials = []
+        for batch in scanner.to_batches():
+            if batch.num_rows == 0:
+                continue
+            table = pa.Table.from_batches([batch])
+            if decode and 'type' in by:
+                codes = decode_types(table.select(TYPE_FEATURES).to_pandas())
+                table = table.append_column('type', pa.array(pd.Categorical.from_codes(codes, categories=TYPE_CATEGORIES)))
+            for col in by:
+                if pa.types.is_dictionary(table.schema.field(col).type):
+                    table = table.set_column(table.schema.get_field_index(col), col, table[col].cast(pa.string()))
+            if step_window:
+                step = pc.cast(table['step'], pa.int64())
+                window = pc.add(pc.multiply(pc.divide(pc.subtract(step, 1), step_window), step_window), 1)
+                table = table.append_column('window_start', window)
+            partials.append(table.group_by(keys).aggregate(partial_aggs))
+
+        merge_aggs = [(f'{col}_{func}', 'sum' if func in ('sum', 'count') else func)
+                      for col, func in partial_aggs]
+        if partials:
+            merged = pa.concat_tables(partials).group_by(keys).aggregate(merge_aggs).to_pandas()
+        else:
+            merged = pd.DataFrame(columns=keys + [f'{c}_{f}_{m}' for (c, f), (_, m) in zip(partial_aggs, merge_aggs)])
+
+        out = merged[keys].copy()
+        for name, (col, func) in metrics.items():
+            total = merged[f'{col}_sum_sum']
+            count = merged[f'{col}_count_sum']
+            out[name] = {
+                'sum': total,
+                'count': count,
+                'min': merged[f'{col}_min_min'],
+                'max': merged[f'{col}_max_max'],
+                'mean': total / count.where(count > 0),
+            }[func]
+        return out.sort_values(keys).reset_index(drop=True) if keys else out
+
+    # --- Preset ---
+    def fraud_amount_by_type_window(self, source='raw', window=24, label_col='isFraud'):
+        # "Nominal fraud per tipe transaksi per jendela 24 step"
+        return self.aggregate(
+            source, by=['type'], step_window=window,
+            metrics={'fraud_count': ('amount', 'count'), 'fraud_amount': ('amount', 'sum')},
+            filters=[(label_col, '==', 1)],
+        )
+
+PRESETS = {
+    'fraud-by-type-window': QueryEngine.fraud_amount_by_type_window,
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query SQL / agregat langsung di atas artefak fraud")
+    parser.add_argument('--source', action='append', default=[], metavar='NAME=PATH',
+                        help="Tambah/ganti sumber, mis. scored=data/cache/<key>/scored.feather")
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--backend', choices=('auto', 'duckdb', 'arrow'), default='auto')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sql_parser = sub.add_parser('sql', help="Jalankan SQL (butuh duckdb)")
+    sql_parser.add_argument('query')
+
+    preset_parser = sub.add_parser('preset', help="Jalankan query siap pakai")
+    preset_parser.add_argument('name', choices=sorted(PRESETS))
+    preset_parser.add_argument('--table', default='raw')
+    preset_parser.add_argument('--window', type=int, default=24)
+    preset_parser.add_argument('--label', default='isFraud', help="'isFraud' (label asli) atau 'prediction' (scored)")
+
+    sub.add_parser('sources', help="Daftar sumber yang tersedia")
+    parser.add_argument('--output', default=None, help="Simpan hasil ke CSV")
+    args = parser.parse_args(argv)
+
+    sources = dict(item.split('=', 1) for item in args.source)
+    engine = QueryEngine(sources, threads=args.threads, backend=args.backend)
+    print(f"Backend: {engine.backend} ({engine.threads} threads)")
+
+    if args.command == 'sources':
+        for name in engine.available_sources():
+            print(f"{name:>14}: {engine._resolve(name)[0]}")
+        return
+
+    start = time.perf_counter()
+    try:
+        if args.command == 'sql':
+            result = engine.sql(args.query)
+        else:
+            result = PRESETS[args.name](engine, args.table, args.window, args.label)
+    # ValueError mencakup pyarrow.lib.ArrowInvalid (mis. kolom tidak ada saat scan)
+    except (FileNotFoundError, KeyError, ImportError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    with pd.option_context('display.max_rows', 50, 'display.width', 120):
+        print(result)
+    print("-" * 30)
+    print(f"{len(result):,} baris hasil dalam {elapsed:.2f}s")
+    if args.output:
+        result.to_csv(args.output, index=False)
+        print(f"Hasil disimpan di: {args.output}")
+
+if __name__ == "__main__":
+    main()
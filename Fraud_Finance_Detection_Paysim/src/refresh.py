@@ -0,0 +1,209 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+from artifacts import iter_artifact_batches, resolve_artifact
+from fast_forest import compile_model
+from features import TARGET_COL, load_transformer
+from model_registry import ModelRegistry
+from velocity import VELOCITY_FEATURES
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+
+# Refresh inkremental model fraud dari jendela 'step' baru, tanpa mengulang Tahap 1-4.
+# - Hanya transaksi dengan step > step terakhir yang sudah dilatih yang dibaca
+#   (filter step didorong ke pembaca Feather/Parquet; Parquet melewati row group lama).
+# - Jendela baru dibagi berdasarkan waktu: step paling akhir (--holdout-steps) disisihkan untuk
+#   validasi, sisanya dipakai melatih pohon baru (semua fraud + sampel normal, rasio seperti Tahap 1).
+# - Forest tumbuh dengan warm_start (hanya pohon baru yang di-fit); pohon tertua dipensiunkan
+#   bila jumlah pohon melebihi --max-trees. Biaya refresh ~ volume data baru, bukan seluruh histori.
+# - Kandidat didaftarkan di registry tanpa dipromosikan; baru dipromosikan (dan disalin ke
+#   models/fraud_model.pkl) bila PR-AUC di jendela validasi tidak lebih buruk dari model aktif.
+# Step holdout belum dilatih, jadi ikut dibaca lagi pada refresh berikutnya.
+#
+#   python src/refresh.py --input Data_Processed/full_features --since-step 600
+#   python src/refresh.py --input data/new_hours.parquet      -> lanjut dari lineage versi aktif
+
+from paths import FULL_FEATURES_PATH, MODEL_PATH
+
+def load_window(path, since_step, batch_size=1_000_000):
+    # Baris dengan step > since_step; untuk artefak kolumnar filter dijalankan oleh pyarrow
+    resolved, fmt = resolve_artifact(path)
+    if fmt == 'csv':
+        frames = [batch[batch['step'] > since_step] for batch in iter_artifact_batches(resolved, batch_size=batch_size)]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    import pyarrow.dataset as ds
+    dataset = ds.dataset(resolved, format='ipc' if fmt == 'feather' else 'parquet')
+    return dataset.to_table(filter=ds.field('step') > since_step).to_pandas()
+
+def split_window(df, holdout_steps):
+    # Split berdasarkan waktu: 'holdout_steps' step terakhir untuk validasi
+    last_step = int(df['step'].max())
+    holdout = df['step'].to_numpy() > last_step - holdout_steps
+    return df[~holdout], df[holdout]
+
+def sample_training_rows(df, negatives_per_fraud=1.5, seed=42):
+    # Semua fraud + sampel acak transaksi normal, seperti balanced sample Tahap 1
+    labels = df[TARGET_COL].to_numpy()
+    fraud = np.flatnonzero(labels == 1)
+    normal = np.flatnonzero(labels == 0)
+    n_normal = min(len(normal), int(np.ceil(len(fraud) * negatives_per_fraud)))
+    rng = np.random.default_rng(seed)
+    rows = np.sort(np.concatenate([fraud, rng.choice(normal, n_normal, replace=False)]))
+    return df.iloc[rows]
+
+def pr_auc(scorer, X, y):
+    from sklearn.metrics import average_precision_score
+    probability, _ = scorer.score(X)
+    return average_precision_score(y, probability)
+
+def grow_forest(model, X, y, trees, max_trees):
+    # warm_start: estimators_ lama dipertahankan, hanya 'trees' pohon baru yang di-fit pada X, y
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + trees)
+    model.fit(X, y)
+    retired = max(0, len(model.estimators_) - max_trees)
+    if retired:
+        # estimators_ berurutan dari yang tertua: pensiunkan dari depan
+        model.estimators_ = model.estimators_[retired:]
+        model.n_estimators = len(model.estimators_)
+    model.set_params(warm_start=False)
+    return retired
+
+def retire_blocks(blocks, retired):
+    # blocks: [{'first_step', 'last_step', 'trees'}] dari yang tertua; kurangi 'retired' pohon dari depan
+    kept = []
+    for block in blocks:
+        take = min(retired, block['trees'])
+        retired -= take
+        if block['trees'] > take:
+            kept.append(dict(block, trees=block['trees'] - take))
+    return kept
+
+def refresh_model(input_path=FULL_FEATURES_PATH, model_path=MODEL_PATH, since_step=None, trees=10, max_trees=50,
+                  holdout_steps=12, negatives_per_fraud=1.5, tolerance=0.0, seed=42, registry=None):
+    if not os.path.exists(model_path):
+        print(f"[ERROR] Model tidak ditemukan di: {model_path}")
+        return None
+    try:
+        resolve_artifact(input_path)
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e}")
+        return None
+
+    start = time.perf_counter()
+    registry = registry or ModelRegistry()
+    match = registry.find_source(model_path)
+    if match is None:
+        # File model belum terdaftar (mis. hasil Tahap 4 lama): jadikan versi induk lebih dulu
+        import joblib
+        model = joblib.load(model_path)
+        name = os.path.splitext(os.path.basename(model_path))[0]
+        match = name, registry.register(model, load_transformer(model_path, model), name, source_path=model_path)
+        print(f"Model didaftarkan sebagai {match[0]} v{match[1]}")
+    name, parent = match
+    meta = registry.metadata(name, parent)
+    lineage = meta.get('lineage') or {}
+
+    # Model dari registry (array pohon lama di-mmap read-only; pohon baru ditambahkan di list)
+    model = registry.load_model(name, parent)
+    if not hasattr(model, 'estimators_'):
+        print(f"[ERROR] Refresh inkremental hanya untuk model forest ({meta['model_class']} tidak bisa "
+              f"memensiunkan bagian lama). Latih ulang lewat Tahap 4.")
+        return None
+    if since_step is None:
+        since_step = lineage.get('trained_through_step')
+    if since_step is None:
+        print(f"[ERROR] {name} v{parent} belum punya lineage refresh: tentukan --since-step "
+              f"(step terakhir yang sudah ada di data training model).")
+        return None
+
+    with_velocity = [f for f in meta['feature_schema']['names'] if f in VELOCITY_FEATURES]
+    df = load_window(input_path, since_step)
+    if with_velocity and not all(f in df.columns for f in with_velocity):
+        print(f"[ERROR] Model memakai fitur velocity {with_velocity} yang tidak ada di {input_path}. "
+              f"Jalankan Tahap 3 (run_full_feature_engineering) untuk tabel fitur lengkapnya.")
+        return None
+    if df.empty or df['step'].nunique() <= holdout_steps:
+        print(f"[WARNING] Data baru setelah step {since_step} kurang dari {holdout_steps + 1} step; "
+              f"refresh ditunda.")
+        return None
+
+    train_df, holdout_df = split_window(df, holdout_steps)
+    last_step = int(df['step'].max())
+    trained_through = last_step - holdout_steps
+    train_df = sample_training_rows(train_df, negatives_per_fraud, seed)
+    if train_df[TARGET_COL].nunique() < 2 or holdout_df[TARGET_COL].sum() == 0:
+        print("[WARNING] Jendela training / validasi tidak berisi kedua kelas (fraud & normal); refresh ditunda.")
+        return None
+    print(f"Jendela baru: step {since_step + 1}-{last_step} ({len(df):,} transaksi) | "
+          f"training {len(train_df):,} baris (sampel), validasi {len(holdout_df):,} baris")
+
+    # mmap=False: array writable seperti forest kandidat -> kernel numba cukup dikompilasi sekali
+    loaded = registry.load(name, parent, mmap=False)
+    transformer = loaded.transformer
+    X_holdout = transformer.transform(holdout_df)
+    y_holdout = holdout_df[TARGET_COL].to_numpy()
+
+    n_before = len(model.estimators_)
+    retired = grow_forest(model, transformer.transform(train_df), train_df[TARGET_COL].to_numpy(), trees, max_trees)
+
+    champion = pr_auc(loaded.scorer, X_holdout, y_holdout)
+    candidate = pr_auc(compile_model(model), X_holdout, y_holdout)
+    blocks = lineage.get('blocks') or [{'first_step': None, 'last_step': None, 'trees': n_before}]
+    blocks = retire_blocks(blocks + [{'first_step': since_step + 1, 'last_step': trained_through, 'trees': trees}], retired)
+
+    version = registry.register(
+        model, transformer, name,
+        metrics={'pr_auc': candidate, 'parent_pr_auc': champion},
+        promote=False,
+        # Referensi drift ikut dari induk: distribusi acuan tetap data training awal
+        drift_reference=registry.drift_reference(name, parent),
+        lineage={'parent_version': parent, 'trained_through_step': trained_through,
+                 'holdout_steps': [trained_through + 1, last_step],
+                 'retired_trees': retired, 'blocks': blocks},
+    )
+    promoted = candidate >= champion - tolerance
+    if promoted:
+        registry.promote(name, version)
+        registry.publish(name, version, model_path)
+    elapsed = time.perf_counter() - start
+
+    print("-" * 30)
+    print(f"{name} v{version}: +{trees} pohon, {retired} pohon tertua dipensiunkan -> {len(model.estimators_)} pohon "
+          f"({elapsed:.1f}s)")
+    print(f"PR-AUC validasi: v{parent} {champion:.4f} -> v{version} {candidate:.4f}")
+    if promoted:
+        print(f"[SUCCESS] v{version} dipromosikan dan disalin ke: {model_path}")
+    else:
+        print(f"[WARNING] v{version} tidak dipromosikan (PR-AUC turun lebih dari {tolerance}); v{parent} tetap aktif")
+    print("-" * 30)
+    return {'name': name, 'version': version, 'parent_version': parent, 'promoted': promoted,
+            'pr_auc': candidate, 'parent_pr_auc': champion, 'retired_trees': retired,
+            'n_trees': len(model.estimators_), 'trained_through_step': trained_through,
+            'rows': len(df), 'seconds': elapsed}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh inkremental model fraud dari jendela step baru")
+    parser.add_argument('--input', default=FULL_FEATURES_PATH, help="Tabel fitur / log dengan kolom 'step' & isFraud")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--since-step', type=int, default=None,
+                        help="Default: trained_through_step dari lineage versi aktif")
+    parser.add_argument('--trees', type=int, default=10, help="Pohon baru per refresh")
+    parser.add_argument('--max-trees', type=int, default=50, help="Batas ukuran forest; pohon tertua dipensiunkan")
+    parser.add_argument('--holdout-steps', type=int, default=12, help="Step terakhir yang disisihkan untuk validasi")
+    parser.add_argument('--negatives-per-fraud', type=float, default=1.5)
+    parser.add_argument('--tolerance', type=float, default=0.0, help="Penurunan PR-AUC yang masih boleh dipromosikan")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    result = refresh_model(args.input, args.model, args.since_step, args.trees, args.max_trees, args.holdout_steps,
+                           args.negatives_per_fraud, args.tolerance, args.seed)
+    if result is None:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
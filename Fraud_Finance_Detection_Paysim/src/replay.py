@@ -0,0 +1,279 @@
+import os
+import sys
+import time
+import queue
+import argparse
+import itertools
+import threading
+import numpy as np
+import pandas as pd
+
+from artifacts import iter_artifact_batches
+from drift import DriftMonitor, load_reference
+from model_registry import load_scorer
+from startup import warm_up_scorer
+from velocity import ACCOUNT_COLS, VELOCITY_FEATURES, VelocityState
+
+# Simulator replay transaksi PaySim berurutan 'step' untuk benchmark deteksi real-time.
+# Producer memutar transaksi per step dengan faktor percepatan (speedup), consumer
+# menjalankan jalur fitur + scoring yang sama dengan dashboard/service. Antrian
+# berukuran tetap memberi backpressure: bila scoring tertinggal, producer ikut melambat
+# dan keterlambatannya (lag) dicatat. Latensi end-to-end per event dicatat dalam
+# histogram berukuran tetap, jadi memori tidak tumbuh dengan volume (begitu pula
+# histogram drift per jendela step, bila model punya referensi drift).
+# Sumber dibaca per batch (iter_artifact_batches), jadi log mentah penuh tidak dimuat utuh ke RAM.
+# Sumber default = log mentah PaySim: berurutan 'step' dan menyimpan nameOrig/nameDest
+# (sampel seimbang tidak cocok: urutannya diacak dan ID akun dibuang).
+
+from paths import RAW_DATA_PATH as SOURCE_PATH, MODEL_PATH, VELOCITY_STATE_PATH
+
+STEP_SECONDS = 3600  # 1 step PaySim = 1 jam
+READ_BATCH_ROWS = 200_000
+_STOP = object()
+
+class LatencyHistogram:
+    # Bucket geometris 1 mikrodetik .. 100 detik (resolusi ~2%), bisa digabung (merge)
+    def __init__(self, low=1e-6, high=100.0, growth=1.02):
+        self.edges = np.geomspace(low, high, int(np.log(high / low) / np.log(growth)) + 1)
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)
+        self.total = 0
+        self.max = 0.0
+
+    def add(self, seconds, n=1):
+        self.counts[np.searchsorted(self.edges, seconds)] += n
+        self.total += n
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q):
+        if self.total == 0:
+            return 0.0
+        idx = int(np.searchsorted(np.cumsum(self.counts), q / 100 * self.total))
+        return min(float(self.edges[min(idx, len(self.edges) - 1)]), self.max)
+
+class ReplayStats:
+    # Agregat per step: jumlah event, jumlah & nominal yang ditandai fraud
+    # per_step ditulis oleh producer (lag) dan consumer (event) dari thread berbeda -> lock
+    def __init__(self, rolling_window=24):
+        self.rolling_window = rolling_window
+        self.per_step = {}
+        self.latency = LatencyHistogram()
+        self.events = 0
+        self.lock = threading.Lock()
+
+    def _row(self, step):
+        return self.per_step.setdefault(step, {'events': 0, 'flagged': 0, 'flagged_amount': 0.0, 'lag_s': 0.0})
+
+    def observe(self, step, amount, label, emitted_at):
+        now = time.perf_counter()
+        flagged = label == 1
+        with self.lock:
+            row = self._row(step)
+            row['events'] += len(label)
+            row['flagged'] += int(flagged.sum())
+            row['flagged_amount'] += float(amount[flagged].sum())
+        self.latency.add(now - emitted_at, len(label))
+        self.events += len(label)
+
+    def record_lag(self, step, lag):
+        with self.lock:
+            self._row(step)['lag_s'] = lag
+
+    def rolling(self, step):
+        # Jumlah fraud & nominal pada 'rolling_window' step terakhir (termasuk step ini)
+        with self.lock:
+            rows = [row for s, row in self.per_step.items() if step - self.rolling_window < s <= step]
+            return sum(r['flagged'] for r in rows), sum(r['flagged_amount'] for r in rows)
+
+    def to_frame(self):
+        with self.lock:
+            df = pd.DataFrame.from_dict(self.per_step, orient='index').sort_index()
+        df.index.name = 'step'
+        return df.reset_index()
+
+def _put(out_queue, item, stop):
+    # put() memblokir saat antrian penuh -> backpressure ke producer; tetap bisa dihentikan lewat 'stop'
+    while not stop.is_set():
+        try:
+            out_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+def _producer(chunks, out_queue, speedup, volume, batch_size, stats, stop):
+    # Error (sumber tidak berurutan, gagal baca) dikirim lewat antrian dan dilempar ulang oleh consumer
+    try:
+        _produce(chunks, out_queue, speedup, volume, batch_size, stats, stop)
+    except Exception as e:
+        _put(out_queue, e, stop)
+        return
+    _put(out_queue, _STOP, stop)
+
+def _produce(chunks, out_queue, speedup, volume, batch_size, stats, stop):
+    step_seconds = STEP_SECONDS / speedup if speedup else 0.0
+    first_step = last_step = None
+    start = time.perf_counter()
+
+    for chunk in chunks:
+        steps = chunk['step'].to_numpy(dtype=np.int64)
+        if len(steps) == 0:
+            continue
+        if (np.diff(steps) < 0).any() or (last_step is not None and steps[0] < last_step):
+            raise ValueError("Sumber replay harus berurutan menurut 'step' (mis. log mentah PaySim).")
+        if first_step is None:
+            first_step = int(steps[0])
+        last_step = int(steps[-1])
+
+        # Satu step bisa terbelah di dua batch baca: bagian keduanya memakai jadwal yang sama
+        bounds = np.r_[0, np.flatnonzero(np.diff(steps)) + 1, len(steps)]
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            step = int(steps[a])
+            due = start + (step - first_step) * step_seconds
+            wait = due - time.perf_counter()
+            if wait > 0 and stop.wait(wait):
+                return
+
+            group = chunk.iloc[a:b]
+            if volume > 1:
+                # Volume xN: setiap transaksi diulang N kali dalam step yang sama
+                group = group.iloc[np.repeat(np.arange(len(group)), volume)]
+
+            for i in range(0, len(group), batch_size):
+                if not _put(out_queue, (step, group.iloc[i:i + batch_size], time.perf_counter()), stop):
+                    return
+            if step_seconds:
+                # Lag: seberapa jauh producer tertinggal dari jadwal akibat backpressure
+                stats.record_lag(step, max(0.0, time.perf_counter() - due - step_seconds))
+
+def _consumer(in_queue, transformer, scorer, velocity_state, stats, report_every, drift=None):
+    last_reported = None
+    while True:
+        item = in_queue.get()
+        if item is _STOP:
+            break
+        if isinstance(item, Exception):
+            raise item
+        step, batch, emitted_at = item
+        if velocity_state is not None:
+            batch = pd.concat([batch, velocity_state.update(batch)], axis=1)
+        probability, label = scorer.score(transformer.transform(batch))
+        stats.observe(step, batch['amount'].to_numpy(), label, emitted_at)
+        if drift is not None:
+            drift.observe(batch, probability)
+
+        if report_every and step != last_reported and step % report_every == 0:
+            flagged, amount = stats.rolling(step)
+            print(f"step {step:>4} | events {stats.events:>10,} | fraud {stats.rolling_window}h: {flagged:>6,} "
+                  f"(${amount:,.0f}) | p99 {stats.latency.percentile(99)*1000:.2f} ms")
+            last_reported = step
+
+def _limit_rows(chunks, limit):
+    for chunk in chunks:
+        if limit <= 0:
+            return
+        yield chunk.iloc[:limit]
+        limit -= len(chunk)
+
+def run_replay(source_path=SOURCE_PATH, model_path=MODEL_PATH, speedup=0, volume=1,
+               batch_size=512, queue_size=64, report_every=24, output_path=None, limit=None,
+               velocity_state_path=VELOCITY_STATE_PATH):
+    # speedup: 3600 = 1 jam simulasi per detik; 0 = secepat mungkin
+    # limit: hanya N transaksi pertama (None = seluruh sumber)
+    scorer, transformer = load_scorer(model_path)
+
+    # Warm-up: kompilasi JIT (numba) terjadi di sini, bukan di event pertama
+    warm_up_scorer(scorer, transformer)
+
+    # Batch pertama dibaca di muka untuk memeriksa kolom; sisanya di-stream oleh producer
+    chunks = iter_artifact_batches(source_path, batch_size=READ_BATCH_ROWS)
+    first = next(chunks, None)
+    if first is None:
+        raise ValueError(f"Sumber replay kosong: {source_path}")
+    chunks = itertools.chain([first], chunks)
+    if limit is not None:
+        chunks = _limit_rows(chunks, limit)
+
+    velocity_state = None
+    if any(f in transformer.feature_names for f in VELOCITY_FEATURES) and not all(f in first.columns for f in VELOCITY_FEATURES):
+        if not all(c in first.columns for c in ACCOUNT_COLS):
+            raise ValueError("Model memakai fitur velocity, tetapi sumber data tidak punya nameOrig/nameDest.")
+        velocity_state = VelocityState()
+        if os.path.exists(velocity_state_path):
+            # State tersimpan (Tahap 3) hanya berlaku bila replay melanjutkan setelah step terakhirnya
+            saved = VelocityState.load(velocity_state_path)
+            first_step = int(first['step'].min())
+            if saved.current_step is not None and first_step < saved.current_step:
+                print(f"[WARNING] {velocity_state_path} sudah sampai step {saved.current_step}, sumber mulai step "
+                      f"{first_step}: replay memakai state velocity kosong.")
+            else:
+                velocity_state = saved
+
+    reference = load_reference(model_path)
+    drift = DriftMonitor(reference) if reference is not None else None
+    stats = ReplayStats()
+    channel = queue.Queue(maxsize=queue_size)
+    amount = 'all' if limit is None else f'{limit:,}'
+    print(f"Replaying {amount} transactions from {source_path} x{volume} "
+          f"({'as fast as possible' if not speedup else f'speed-up {speedup:g}x'})...")
+
+    start = time.perf_counter()
+    stop = threading.Event()
+    producer = threading.Thread(target=_producer, args=(chunks, channel, speedup, volume, batch_size, stats, stop),
+                                daemon=True)
+    producer.start()
+    try:
+        _consumer(channel, transformer, scorer, velocity_state, stats, report_every, drift)
+    finally:
+        # Consumer selesai atau gagal: producer tidak boleh tertahan selamanya di put()
+        stop.set()
+        producer.join()
+    elapsed = time.perf_counter() - start
+
+    per_step = stats.to_frame()
+    report = {
+        'events': stats.events,
+        'elapsed_s': round(elapsed, 3),
+        'events_per_s': round(stats.events / elapsed, 1) if elapsed > 0 else 0.0,
+        'latency_ms_p50': round(stats.latency.percentile(50) * 1000, 3),
+        'latency_ms_p99': round(stats.latency.percentile(99) * 1000, 3),
+        'latency_ms_max': round(stats.latency.max * 1000, 3),
+        'max_lag_s': round(float(per_step['lag_s'].max()), 3) if len(per_step) else 0.0,
+        'flagged': int(per_step['flagged'].sum()) if len(per_step) else 0,
+    }
+    if drift is not None:
+        report['drift_psi_max'] = drift.metrics()['drift_psi_total_max']
+
+    print("-" * 30)
+    for key, value in report.items():
+        print(f"{key:>15}: {value}")
+    print("-" * 30)
+    if output_path:
+        per_step.to_csv(output_path, index=False)
+        print(f"Per-step stats saved to: {output_path}")
+    return report, per_step
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay transaksi PaySim berurutan step melalui jalur scoring")
+    parser.add_argument('--source', default=SOURCE_PATH, help="Log berurutan 'step' (default: log mentah PaySim)")
+    parser.add_argument('--limit', type=int, default=None, help="Hanya N transaksi pertama")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--speedup', type=float, default=0, help="3600 = 1 jam simulasi per detik, 0 = secepat mungkin")
+    parser.add_argument('--volume', type=int, default=1, help="Faktor pengali volume (mis. 10, 100)")
+    parser.add_argument('--batch-size', type=int, default=512)
+    parser.add_argument('--queue-size', type=int, default=64)
+    parser.add_argument('--output', default=None, help="CSV untuk statistik per step")
+    args = parser.parse_args(argv)
+    try:
+        run_replay(args.source, args.model, args.speedup, args.volume, args.batch_size, args.queue_size,
+                   output_path=args.output, limit=args.limit)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
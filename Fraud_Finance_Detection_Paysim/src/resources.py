@@ -0,0 +1,44 @@
+import os
+import sys
+
+# Pengukuran memori proses (RSS) tanpa dependensi tambahan.
+# Puncak RSS diambil dari /proc (VmHWM) atau getrusage; RSS saat ini dari /proc (Linux).
+
+def peak_rss_mb():
+    # VmHWM milik address space proses ini; ru_maxrss di Linux ikut terwarisi lewat
+    # fork/exec dari proses induk yang besar, sehingga kurang tepat untuk proses anak
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return float('nan')  # Windows: modul 'resource' tidak tersedia
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux melaporkan KB, macOS melaporkan byte
+    return peak / 1024**2 if sys.platform == 'darwin' else peak / 1024
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 1024**2
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_mb()
+
+def rss_breakdown_mb():
+    # RSS dipecah menjadi halaman shared (file-backed: mmap, page cache yang dibagi antar
+    # proses) dan private (heap proses ini). Linux saja; platform lain -> shared = nan.
+    try:
+        with open('/proc/self/statm') as f:
+            fields = f.read().split()
+        page_mb = os.sysconf('SC_PAGE_SIZE') / 1024**2
+        rss, shared = int(fields[1]) * page_mb, int(fields[2]) * page_mb
+        return {'rss': rss, 'shared': shared, 'private': rss - shared}
+    except (OSError, ValueError, AttributeError, IndexError):
+        rss = peak_rss_mb()
+        return {'rss': rss, 'shared': float('nan'), 'private': rss}
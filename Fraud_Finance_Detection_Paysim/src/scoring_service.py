@@ -0,0 +1,376 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Layanan HTTP scoring fraud dengan micro-batching (asyncio, tanpa dependensi web tambahan).
+# - Model dimuat SEKALI per worker (process pool), bukan per request.
+# - Request yang datang bersamaan digabung menjadi satu batch selama max_wait_ms
+#   atau sampai max_batch_size baris, lalu di-score sekali di worker pool.
+# - /metrics menampilkan latensi p50/p99, throughput dan skor drift (PSI/KS) terhadap
+#   referensi training model; /drift memberi laporan per fitur (drift.py).
+#
+# Endpoint:
+#   POST /score        -> satu transaksi (objek JSON dengan field mentah PaySim)
+#   POST /score/batch  -> daftar transaksi (list JSON atau {"transactions": [...]})
+#   GET  /metrics      -> penghitung latensi & throughput (+ metrik drift)
+#   GET  /drift        -> PSI/KS per fitur: jendela step terakhir & total sejak start
+#   GET  /health       -> status + field wajib per transaksi (termasuk ID akun untuk model velocity)
+
+from drift import DriftMonitor, load_reference, report_records
+from features import TYPE_CATEGORIES
+from paths import MODEL_PATH, VELOCITY_STATE_PATH
+from velocity import ACCOUNT_COLS
+
+RAW_FIELDS = ['step', 'type', 'amount', 'oldbalanceOrg', 'newbalanceOrig', 'oldbalanceDest', 'newbalanceDest']
+NUMERIC_FIELDS = [f for f in RAW_FIELDS if f != 'type']
+
+# --- Worker pool: model dimuat sekali per proses ---
+_WORKER = {}
+
+def _init_worker(model_path):
+    # Dari registry: array forest di-mmap, semua worker berbagi satu salinan fisik
+    from model_registry import load_scorer
+    from startup import warm_up_scorer
+
+    _WORKER['scorer'], _WORKER['transformer'] = load_scorer(model_path)
+    # Request pertama tidak menanggung kompilasi JIT
+    warm_up_scorer(_WORKER['scorer'], _WORKER['transformer'])
+
+def _worker_ready():
+    return os.getpid()
+
+def _score_frame(df):
+    X = _WORKER['transformer'].transform(df)
+    probability, label = _WORKER['scorer'].score(X)
+    return probability.tolist(), label.astype(int).tolist()
+
+class RequestError(Exception):
+    pass
+
+def records_to_frame(records):
+    missing = sorted({f for r in records for f in RAW_FIELDS if f not in r})
+    if missing:
+        raise RequestError(f"Field wajib tidak ada: {missing}")
+    return pd.DataFrame.from_records(records)
+
+def validate_records(records, velocity_state=None):
+    # Validasi per request SEBELUM masuk antrean: request yang rusak ditolak sendiri,
+    # tidak ikut menggagalkan request lain yang di-batch bersamanya
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise RequestError(f"Transaksi #{i} harus objek JSON, bukan {type(record).__name__}")
+        required = RAW_FIELDS + (ACCOUNT_COLS if velocity_state is not None else [])
+        missing = [f for f in required if f not in record]
+        if missing:
+            raise RequestError(f"Transaksi #{i}: field wajib tidak ada: {missing}")
+        not_numeric = [f for f in NUMERIC_FIELDS if isinstance(record[f], bool) or not isinstance(record[f], (int, float))]
+        if not_numeric:
+            raise RequestError(f"Transaksi #{i}: field harus berupa angka: {not_numeric}")
+        if record['type'] not in TYPE_CATEGORIES:
+            raise RequestError(f"Transaksi #{i}: type tidak dikenal: {record['type']!r} (pilihan: {list(TYPE_CATEGORIES)})")
+        if velocity_state is not None and velocity_state.current_step is not None \
+                and record['step'] < velocity_state.current_step:
+            raise RequestError(f"Transaksi #{i}: step {record['step']} lebih awal dari step velocity "
+                               f"terakhir ({velocity_state.current_step})")
+
+# --- Metrik ---
+class ServiceMetrics:
+    # Latensi disimpan di ring buffer berukuran tetap (memori konstan)
+    def __init__(self, window=20000):
+        self.latencies_ms = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+
+    def observe_request(self, latency_ms, rows):
+        self.requests += 1
+        self.rows += rows
+        self.latencies_ms.append(latency_ms)
+
+    def observe_batch(self, size):
+        self.batches += 1
+        self.batch_sizes.append(size)
+
+    def snapshot(self):
+        uptime = time.perf_counter() - self.started
+        lat = np.asarray(self.latencies_ms) if self.latencies_ms else np.zeros(1)
+        return {
+            'uptime_s': round(uptime, 2),
+            'requests': self.requests,
+            'rows_scored': self.rows,
+            'batches': self.batches,
+            'errors': self.errors,
+            'throughput_rows_per_s': round(self.rows / uptime, 1) if uptime > 0 else 0.0,
+            'latency_ms_p50': round(float(np.percentile(lat, 50)), 3),
+            'latency_ms_p99': round(float(np.percentile(lat, 99)), 3),
+            'mean_batch_size': round(float(np.mean(self.batch_sizes)), 1) if self.batch_sizes else 0.0,
+        }
+
+# --- Micro-batcher ---
+class MicroBatcher:
+    def __init__(self, pool, max_batch_size=256, max_wait_ms=5.0, max_in_flight=2,
+                 velocity_state=None, metrics=None, drift=None):
+        self.pool = pool
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = asyncio.Queue()
+        self.in_flight = asyncio.Semaphore(max_in_flight)
+        self.velocity_state = velocity_state
+        # Batch velocity diproses satu per satu (update state -> scoring): bila scoring gagal,
+        # update batch itu di-rollback tanpa ikut membatalkan update batch lain
+        self.velocity_lock = asyncio.Lock()
+        self.metrics = metrics or ServiceMetrics()
+        # Histogram drift di proses utama: ukuran tetap, tidak menyimpan transaksi
+        self.drift = drift
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, records):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((records, future))
+        return await future
+
+    async def _collect(self):
+        # Ambil request pertama, lalu kumpulkan sisanya sampai batch penuh atau batas waktu habis
+        items = [await self.queue.get()]
+        size = len(items[0][0])
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            items.append(item)
+            size += len(item[0])
+        return items
+
+    async def _run(self):
+        while True:
+            items = await self._collect()
+            await self.in_flight.acquire()
+            asyncio.create_task(self._dispatch(items))
+
+    async def _dispatch(self, items):
+        try:
+            await self._resolve(items)
+        finally:
+            self.in_flight.release()
+
+    async def _resolve(self, items):
+        records = [r for recs, _ in items for r in recs]
+        loop = asyncio.get_running_loop()
+        try:
+            df = records_to_frame(records)
+            if self.velocity_state is None:
+                probability, label = await loop.run_in_executor(self.pool, _score_frame, df)
+            else:
+                async with self.velocity_lock:
+                    journal = []
+                    try:
+                        df = self._add_velocity(df, journal)
+                        probability, label = await loop.run_in_executor(self.pool, _score_frame, df)
+                    except BaseException:
+                        # State baru di-commit setelah scoring berhasil
+                        self.velocity_state.rollback(journal)
+                        raise
+        except Exception as e:
+            if len(items) > 1:
+                # Lolos validasi tapi batch tetap gagal (mis. step velocity sudah disalip request lain):
+                # ulangi per request agar hanya request penyebabnya yang menerima error.
+                # Update velocity batch yang gagal sudah di-rollback, jadi tidak ada yang dihitung dua kali.
+                for item in items:
+                    await self._resolve([item])
+                return
+            if not items[0][1].done():
+                items[0][1].set_exception(e)
+            return
+
+        self.metrics.observe_batch(len(records))
+        start = 0
+        for recs, future in items:
+            stop = start + len(recs)
+            if not future.done():
+                future.set_result(list(zip(probability[start:stop], label[start:stop])))
+            start = stop
+        # Dicatat setelah semua future dijawab: error di sini tidak menggagalkan request
+        if self.drift is not None:
+            try:
+                self.drift.observe(df, np.asarray(probability))
+            except Exception as e:
+                print(f"[WARNING] Drift batch ini tidak tercatat: {e}")
+
+    def _add_velocity(self, df, journal=None):
+        # State velocity hidup di proses utama (satu state untuk semua worker)
+        missing = [c for c in ACCOUNT_COLS if c not in df.columns]
+        if missing:
+            raise RequestError(f"Model memakai fitur velocity; field wajib tidak ada: {missing}")
+        order = np.argsort(df['step'].to_numpy(), kind='stable')
+        ordered = df.iloc[order]
+        try:
+            features = self.velocity_state.update(ordered, journal)
+        except ValueError as e:
+            raise RequestError(str(e))
+        return pd.concat([ordered, features], axis=1).loc[df.index]
+
+# --- HTTP minimal di atas asyncio streams ---
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+async def _write_response(writer, status, payload, keep_alive):
+    body = json.dumps(payload).encode()
+    head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode()
+    writer.write(head + body)
+    await writer.drain()
+
+class ScoringServer:
+    def __init__(self, batcher, metrics):
+        self.batcher = batcher
+        self.metrics = metrics
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                keep_alive = headers.get('connection', '').lower() != 'close'
+
+                status, payload = await self.route(method, path, body)
+                await _write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        if path == '/health':
+            # Field wajib per transaksi & step terakhir state velocity (dipakai load_generator.py)
+            velocity_state = self.batcher.velocity_state
+            return 200, {'status': 'ok', 'velocity': velocity_state is not None,
+                         'required_fields': RAW_FIELDS + (ACCOUNT_COLS if velocity_state is not None else []),
+                         'velocity_step': velocity_state.current_step if velocity_state is not None else None}
+        if path == '/metrics':
+            snapshot = self.metrics.snapshot()
+            if self.batcher.drift is not None:
+                snapshot.update(self.batcher.drift.metrics())
+            return 200, snapshot
+        if path == '/drift':
+            if self.batcher.drift is None:
+                return 404, {'error': 'Model tidak punya referensi drift; latih ulang model (Tahap 4)'}
+            drift = self.batcher.drift
+            return 200, {'window': drift.latest_window, 'window_steps': drift.window_steps,
+                         'latest_window': report_records(drift.report()),
+                         'total': report_records(drift.report('total'))}
+        if path not in ('/score', '/score/batch'):
+            return 404, {'error': f'Endpoint tidak dikenal: {path}'}
+        if method != 'POST':
+            return 405, {'error': 'Gunakan POST'}
+
+        start = time.perf_counter()
+        try:
+            data = json.loads(body or b'null')
+            if path == '/score':
+                if not isinstance(data, dict):
+                    raise RequestError("Body /score harus objek JSON satu transaksi")
+                records = [data]
+            else:
+                records = data.get('transactions') if isinstance(data, dict) else data
+                if not isinstance(records, list) or not records:
+                    raise RequestError("Body /score/batch harus list transaksi yang tidak kosong")
+            validate_records(records, self.batcher.velocity_state)
+            results = await self.batcher.submit(records)
+        except (RequestError, KeyError, ValueError) as e:
+            self.metrics.errors += 1
+            return 400, {'error': str(e)}
+        except Exception as e:
+            self.metrics.errors += 1
+            return 500, {'error': str(e)}
+
+        self.metrics.observe_request((time.perf_counter() - start) * 1000, len(records))
+        scored = [{'probability': p, 'is_fraud': int(l)} for p, l in results]
+        return 200, scored[0] if path == '/score' else {'results': scored}
+
+async def serve(host='127.0.0.1', port=8000, model_path=MODEL_PATH, workers=2,
+                max_batch_size=256, max_wait_ms=5.0, velocity_state_path=VELOCITY_STATE_PATH):
+    from model_registry import load_scorer
+    from velocity import VELOCITY_FEATURES, VelocityState
+
+    # Cek model & kebutuhan fitur velocity di proses utama sebelum worker dibuat
+    _, transformer = load_scorer(model_path)
+    velocity_state = None
+    if any(f in transformer.feature_names for f in VELOCITY_FEATURES):
+        velocity_state = (VelocityState.load(velocity_state_path)
+                          if os.path.exists(velocity_state_path) else VelocityState())
+
+    reference = load_reference(model_path)
+    if reference is None:
+        print("[WARNING] Model tidak punya referensi drift; /drift dan metrik drift tidak aktif.")
+    drift = DriftMonitor(reference) if reference is not None else None
+
+    metrics = ServiceMetrics()
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path,))
+    # Warm-up: semua worker dibuat & model dimuat sebelum port dibuka, bukan saat request pertama
+    start = time.perf_counter()
+    for future in [pool.submit(_worker_ready) for _ in range(workers)]:
+        future.result()
+    print(f"[SUCCESS] Worker pool siap dalam {time.perf_counter() - start:.2f}s")
+    batcher = MicroBatcher(pool, max_batch_size, max_wait_ms, max_in_flight=workers,
+                           velocity_state=velocity_state, metrics=metrics, drift=drift)
+    batcher.start()
+    server = await asyncio.start_server(ScoringServer(batcher, metrics).handle, host, port)
+
+    print(f"[SUCCESS] Scoring service berjalan di http://{host}:{port} "
+          f"(workers={workers}, max_batch={max_batch_size}, max_wait={max_wait_ms}ms)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP scoring service untuk model fraud PaySim")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0, help="Anggaran latensi untuk mengumpulkan batch")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.model):
+        print(f"[ERROR] Model tidak ditemukan di: {args.model}")
+        sys.exit(1)
+    try:
+        asyncio.run(serve(args.host, args.port, args.model, args.workers, args.max_batch, args.max_wait_ms))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
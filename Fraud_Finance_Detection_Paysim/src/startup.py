@@ -0,0 +1,184 @@
+import os
+import sys
+import time
+import argparse
+import importlib
+import threading
+import subprocess
+from concurrent.futures import Future
+
+# Utilitas cold start untuk dashboard Streamlit dan CLI tahap 1-5.
+# - lazy_import     : modul berat (pandas, joblib, plotly, sklearn) baru di-import saat pertama dipakai,
+#                     sehingga pengecekan file yang gagal / render pertama tidak menunggu import tsb.
+# - StartupProfile  : penanda waktu (import selesai, render pertama, data siap) sejak awal proses/skrip
+# - warm_up         : memuat model & data di thread latar; hasilnya diambil saat benar-benar dibutuhkan
+# - python startup.py profile [modul ...] -> profil waktu import (python -X importtime) per entry point
+#
+# Modul ini sendiri hanya memakai standard library agar selalu murah untuk di-import pertama.
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+NOTEBOOK_DIR = os.path.join(os.path.dirname(SRC_DIR), 'notebooks')
+
+# Waktu import (detik) modul yang dimuat lewat lazy_import, diisi saat pertama dipakai
+IMPORT_TIMES = {}
+
+class LazyModule:
+    # Proxy modul: `pd = lazy_import('pandas')` lalu `pd.DataFrame(...)` seperti biasa
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            name = self.__dict__['_name']
+            start = time.perf_counter()
+            module = importlib.import_module(name)
+            if name not in IMPORT_TIMES:
+                IMPORT_TIMES[name] = time.perf_counter() - start
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+def lazy_import(name):
+    # Bila modul sudah pernah di-import (mis. oleh modul lain), langsung kembalikan aslinya
+    return sys.modules.get(name) or LazyModule(name)
+
+def process_uptime():
+    # Detik sejak proses dimulai (Linux, dari /proc); platform lain: sejak modul ini di-import
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.perf_counter() - _MODULE_START
+
+_MODULE_START = time.perf_counter()
+
+class StartupProfile:
+    # Penanda waktu relatif terhadap awal skrip (rerun Streamlit) dan terhadap awal proses
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.process_offset = process_uptime()
+        self.marks = []
+
+    def mark(self, label):
+        self.marks.append((label, time.perf_counter() - self.start))
+        return self.marks[-1][1]
+
+    def report(self):
+        rows = [{'milestone': label, 'seconds': round(t, 3)} for label, t in self.marks]
+        rows += [{'milestone': f'import {name}', 'seconds': round(t, 3)} for name, t in IMPORT_TIMES.items()]
+        rows.append({'milestone': 'process uptime at script start', 'seconds': round(self.process_offset, 3)})
+        return rows
+
+    def print_report(self):
+        print("-" * 30)
+        for row in self.report():
+            print(f"{row['milestone']:>32}: {row['seconds']:.3f}s")
+        print("-" * 30)
+
+def warm_up(func, *args, **kwargs):
+    # Jalankan func di thread daemon; Future.result() menunggu (atau melempar error-nya)
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=f'warm-up:{getattr(func, "__name__", "task")}', daemon=True).start()
+    return future
+
+def warm_up_scorer(scorer, transformer):
+    # Satu baris nol: kompilasi JIT numba & page-in array forest terjadi di sini, bukan di request pertama
+    import numpy as np
+    scorer.score(np.zeros((1, transformer.n_features), dtype=np.float32))
+    return scorer
+
+def path_stamp(*paths):
+    # Penanda murah (hanya os.stat) untuk mendeteksi file data/model yang berubah.
+    # Yang di-stat adalah file yang benar-benar dibaca (final_features_20k.csv -> .feather bila ada):
+    # ukuran + mtime_ns berubah saat artefak ditulis ulang, walau jalur logis & foldernya tidak
+    from artifacts import resolve_artifact
+
+    stamp = []
+    for path in paths:
+        try:
+            path = resolve_artifact(path)[0]
+        except FileNotFoundError:
+            pass
+        try:
+            info = os.stat(path)
+            stamp.append((path, info.st_size, info.st_mtime_ns))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+# --- Profil waktu import (proses baru per target, python -X importtime) ---
+DEFAULT_TARGETS = ['dashboard_cache', 'explorer', 'query_engine', 'model_registry', 'scoring_service',
+                   'replay', '1_Cleaning_Dataset', '2_Strategic_EDA', '3_Feature_Engineering',
+                   '4_Model_Training', '5_Model_Testing']
+
+def _import_statement(target):
+    # Skrip tahap (notebooks/) di-import lewat runpy tanpa menjalankan blok __main__
+    script = os.path.join(NOTEBOOK_DIR, f'{target}.py')
+    if os.path.exists(script):
+        return f"import runpy; runpy.run_path({script!r}, run_name='profile')"
+    return f"import {target}"
+
+def profile_imports(target, top=10):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([SRC_DIR, os.environ.get('PYTHONPATH', '')]),
+               MPLBACKEND='Agg')
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', _import_statement(target)],
+                            capture_output=True, text=True, env=env, cwd=SRC_DIR)
+    wall = time.perf_counter() - start
+
+    # Baris '-X importtime': "import time: <self us> | <kumulatif us> | <indentasi><nama>".
+    # Yang dibandingkan: import langsung oleh target (level 1 untuk modul, level 0 untuk skrip tahap)
+    depth = 0 if _import_statement(target).startswith('import runpy') else 1
+    heaviest = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        if level == depth:
+            heaviest.append((name.strip(), int(cumulative_us) / 1e6))
+    heaviest = sorted(heaviest, key=lambda item: -item[1])[:top]
+    error = None
+    if result.returncode != 0:
+        error = (result.stderr.strip().splitlines() or ['?'])[-1]
+    return {'target': target, 'wall_seconds': wall, 'heaviest': heaviest, 'error': error}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profil cold start: waktu import per entry point")
+    sub = parser.add_subparsers(dest='command', required=True)
+    prof = sub.add_parser('profile', help="Waktu import per modul src/ atau skrip tahap (proses baru)")
+    prof.add_argument('targets', nargs='*', default=DEFAULT_TARGETS)
+    prof.add_argument('--top', type=int, default=5, help="Jumlah import terberat yang ditampilkan per target")
+    args = parser.parse_args(argv)
+
+    for target in args.targets:
+        result = profile_imports(target, args.top)
+        status = f"  [ERROR] {result['error']}" if result['error'] else ''
+        print(f"{target:>24}: {result['wall_seconds']:.2f}s{status}")
+        for name, seconds in result['heaviest']:
+            print(f"{'':>26}{seconds:7.3f}s  {name}")
+    print("-" * 30)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import numpy as np
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+
+# Statistik streaming satu-lintasan untuk EDA di seluruh log PaySim (6.3 juta baris).
+# Setiap chunk menghasilkan statistik parsial yang bisa digabung (merge), jadi chunk
+# boleh diproses paralel lalu dikombinasikan; memori tidak bergantung pada jumlah baris.
+# - CountTable      : hitungan eksak (mis. type x isFraud)
+# - MomentStats     : n, rata-rata, variansi, kovarians & korelasi (rumus gabung Chan/Welford)
+# - QuantileSketch  : kuantil dengan galat relatif terbatas (bucket logaritmik, gaya DDSketch)
+
+from paths import RAW_DATA_PATH as RAW_PATH
+
+NUMERIC_COLUMNS = ['step', 'amount', 'oldbalanceOrg', 'newbalanceOrig', 'oldbalanceDest',
+                   'newbalanceDest', 'isFraud', 'isFlaggedFraud']
+
+class CountTable:
+    # Hitungan eksak per kombinasi kunci; dict {tuple kunci: jumlah} mudah digabung
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self.counts = {}
+
+    def update(self, df):
+        for key, count in df.groupby(self.keys, observed=True).size().items():
+            key = tuple(k.item() if hasattr(k, 'item') else k for k in (key if isinstance(key, tuple) else (key,)))
+            self.counts[key] = self.counts.get(key, 0) + int(count)
+        return self
+
+    def merge(self, other):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        return self
+
+    def to_frame(self, name='count'):
+        rows = [key + (count,) for key, count in sorted(self.counts.items())]
+        return pd.DataFrame(rows, columns=self.keys + [name])
+
+class MomentStats:
+    # Momen orde 1-2 untuk beberapa kolom sekaligus: mean vektor + matriks co-moment
+    # (jumlah perkalian simpangan). Per chunk dihitung langsung terhadap mean chunk,
+    # lalu digabung dengan rumus paralel Chan et al. (stabil secara numerik)
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.n = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+
+    def _combine(self, n_b, mean_b, comoment_b):
+        if n_b == 0:
+            return self
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.comoment = self.comoment + comoment_b + np.outer(delta, delta) * (self.n * n_b / n)
+        self.mean = self.mean + delta * (n_b / n)
+        self.n = n
+        return self
+
+    def update(self, df):
+        X = df[self.columns].to_numpy(dtype=np.float64)
+        if len(X) == 0:
+            return self
+        mean_b = X.mean(axis=0)
+        centered = X - mean_b
+        return self._combine(len(X), mean_b, centered.T @ centered)
+
+    def merge(self, other):
+        return self._combine(other.n, other.mean, other.comoment)
+
+    def variance(self, ddof=1):
+        return np.diag(self.comoment) / max(self.n - ddof, 1)
+
+    def covariance(self, ddof=1):
+        return pd.DataFrame(self.comoment / max(self.n - ddof, 1), index=self.columns, columns=self.columns)
+
+    def correlation(self):
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = self.comoment / np.outer(std, std)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+class QuantileSketch:
+    # Sketsa kuantil dengan galat relatif 'relative_accuracy' (1% default):
+    # nilai x > 0 masuk bucket ceil(log_gamma(x)), gamma = (1+a)/(1-a).
+    # Nilai negatif disimpan di store terpisah (|x|), nol dihitung tersendiri.
+    # Jumlah bucket ~ log(max/min)/log(gamma) -> beberapa ribu, berapapun jumlah datanya.
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _add_to(self, store, values):
+        keys, counts = np.unique(np.ceil(np.log(values) / self._log_gamma).astype(np.int64), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return self
+        self._add_to(self.positive, values[values > 0])
+        self._add_to(self.negative, -values[values < 0])
+        self.zeros += int((values == 0).sum())
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        return self
+
+    def merge(self, other):
+        for mine, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in theirs.items():
+                mine[key] = mine.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return np.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return max(-self._value(key), self.min)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return min(self._value(key), self.max)
+        return self.max
+
+    def boxplot_stats(self, label=None, whis=1.5):
+        # Statistik untuk matplotlib Axes.bxp (tanpa outlier individual: memori tetap terbatas)
+        q1, med, q3 = (self.quantile(q) for q in (0.25, 0.5, 0.75))
+        iqr = q3 - q1
+        return {
+            'label': label, 'med': med, 'q1': q1, 'q3': q3,
+            'whislo': max(self.min, q1 - whis * iqr),
+            'whishi': min(self.max, q3 + whis * iqr),
+            'fliers': [],
+        }
+
+class EDAStats:
+    # Gabungan statistik yang dibutuhkan 2_Strategic_EDA untuk satu sumber data
+    def __init__(self, numeric_columns=None, relative_accuracy=0.01):
+        self.numeric_columns = numeric_columns
+        self.relative_accuracy = relative_accuracy
+        self.type_counts = CountTable(['type', 'isFraud'])
+        self.moments = None
+        self.amount_sketch = {}
+
+    def update(self, chunk):
+        if self.moments is None:
+            columns = self.numeric_columns or [c for c in NUMERIC_COLUMNS if c in chunk.columns]
+            self.moments = MomentStats(columns)
+        self.type_counts.update(chunk)
+        self.moments.update(chunk)
+        for label, values in chunk.groupby('isFraud', observed=True)['amount']:
+            sketch = self.amount_sketch.setdefault(int(label), QuantileSketch(self.relative_accuracy))
+            sketch.update(values.to_numpy())
+        return self
+
+    def merge(self, other):
+        self.type_counts.merge(other.type_counts)
+        if self.moments is None:
+            self.moments = other.moments
+        elif other.moments is not None:
+            self.moments.merge(other.moments)
+        for label, sketch in other.amount_sketch.items():
+            if label in self.amount_sketch:
+                self.amount_sketch[label].merge(sketch)
+            else:
+                self.amount_sketch[label] = sketch
+        return self
+
+    @property
+    def n_rows(self):
+        return self.moments.n if self.moments is not None else 0
+
+def _chunk_stats(chunk):
+    return EDAStats().update(chunk)
+
+def compute_eda_stats(path=RAW_PATH, chunksize=500_000, n_workers=1):
+    # Satu lintasan atas file; n_workers > 1 -> statistik per chunk dihitung di process pool
+    # lalu digabung (jumlah chunk yang sedang diproses dibatasi agar RAM tetap terbatas)
+    from artifacts import iter_artifact_batches, load_table, resolve_artifact
+
+    # Hanya kolom yang dipakai yang dibaca (nameOrig/nameDest dilewati)
+    resolved, fmt = resolve_artifact(path)
+    available = pd.read_csv(resolved, nrows=0).columns if fmt == 'csv' else load_table(resolved).schema.names
+    usecols = [c for c in ['type'] + NUMERIC_COLUMNS if c in available]
+    chunks = iter_artifact_batches(resolved, columns=usecols, batch_size=chunksize)
+    stats = EDAStats()
+
+    if n_workers <= 1:
+        for chunk in chunks:
+            stats.update(chunk)
+        return stats
+
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(_chunk_stats, chunk))
+            if len(pending) >= 2 * n_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stats.merge(future.result())
+        for future in pending:
+            stats.merge(future.result())
+    return stats
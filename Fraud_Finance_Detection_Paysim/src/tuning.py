@@ -0,0 +1,221 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from artifacts import load_artifact
+from features import FraudFeatureTransformer, TARGET_COL, save_transformer
+from paths import FEATURES_PATH, MODELS_DIR
+from startup import lazy_import
+
+joblib = lazy_import('joblib')
+
+# Tuning hyperparameter + cross-validation berbasis waktu untuk model fraud.
+# - Fold dipisah menurut 'step' (expanding window): train selalu di jam-jam lebih awal
+#   daripada validasi, jadi tidak ada kebocoran dari masa depan.
+# - Matriks fitur ditulis sekali ke file .npy dan dibuka worker dengan mmap (tidak di-pickle).
+# - Konfigurasi yang jelas kalah dihentikan lebih awal setelah tiap fold.
+# - Hasil per (konfigurasi, fold) ditulis ke JSONL sehingga run yang terputus bisa dilanjutkan;
+#   kuncinya memuat hash isi matriks fitur, jadi data yang berubah tidak memakai skor lama.
+
+DATA_PATH = FEATURES_PATH
+TUNING_DIR = os.path.join(MODELS_DIR, 'tuning')
+RESULTS_PATH = os.path.join(TUNING_DIR, 'results.jsonl')
+BEST_MODEL_PATH = os.path.join(MODELS_DIR, 'fraud_model_tuned.pkl')
+
+# Ruang pencarian (grid). random_search() mengambil sampel acak dari kombinasi ini.
+SEARCH_SPACE = {
+    'random_forest': {
+        'n_estimators': [50, 100, 200],
+        'max_depth': [None, 12, 20],
+        'min_samples_leaf': [1, 5],
+        'max_features': ['sqrt', 0.5],
+    },
+    'hist_gradient_boosting': {
+        'learning_rate': [0.05, 0.1, 0.2],
+        'max_leaf_nodes': [15, 31, 63],
+        'max_iter': [100, 300],
+        'l2_regularization': [0.0, 1.0],
+    },
+}
+
+def build_model(name, params, n_jobs=1):
+    from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+    if name == 'random_forest':
+        return RandomForestClassifier(random_state=42, n_jobs=n_jobs, **params)
+    if name == 'hist_gradient_boosting':
+        return HistGradientBoostingClassifier(random_state=42, class_weight='balanced', **params)
+    raise ValueError(f"Model tidak dikenal: {name}")
+
+def grid_search():
+    configs = []
+    for name, space in SEARCH_SPACE.items():
+        keys = sorted(space)
+        for values in itertools.product(*(space[k] for k in keys)):
+            configs.append((name, dict(zip(keys, values))))
+    return configs
+
+def random_search(n_configs=12, seed=42):
+    configs = grid_search()
+    rng = np.random.default_rng(seed)
+    pick = rng.choice(len(configs), size=min(n_configs, len(configs)), replace=False)
+    return [configs[i] for i in sorted(pick)]
+
+def config_id(name, params, folds=None, data=None):
+    # Batas fold + fingerprint data ikut di-hash: hasil lama dari data/split yang berbeda tidak dipakai ulang
+    payload = json.dumps({'model': name, 'params': params, 'folds': folds, 'data': data}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+def time_folds(steps, n_folds=4):
+    # Batas step untuk expanding-window CV: blok 0..k untuk train, blok k+1 untuk validasi.
+    # Batas diambil dari kuantil baris agar tiap blok berisi jumlah transaksi yang mirip.
+    edges = np.unique(np.quantile(steps, np.linspace(0, 1, n_folds + 2)[1:-1]).astype(int))
+    bounds = list(edges) + [int(steps.max())]
+    return [(int(bounds[k]), int(bounds[k + 1])) for k in range(len(bounds) - 1)]
+
+# --- Worker (berjalan di process pool) ---
+_SHARED = {}
+
+def _open_shared(paths):
+    # Setiap worker membuka memmap sekali; halaman memori dibagi oleh OS antar proses
+    if _SHARED.get('paths') != paths:
+        _SHARED['paths'] = paths
+        _SHARED['X'] = np.load(paths['X'], mmap_mode='r')
+        _SHARED['y'] = np.load(paths['y'], mmap_mode='r')
+        _SHARED['steps'] = np.load(paths['steps'], mmap_mode='r')
+    return _SHARED['X'], _SHARED['y'], _SHARED['steps']
+
+def _evaluate(task):
+    from sklearn.metrics import average_precision_score
+
+    X, y, steps = _open_shared(task['paths'])
+    train_end, val_end = task['fold_bounds']
+    train = np.flatnonzero(steps <= train_end)
+    val = np.flatnonzero((steps > train_end) & (steps <= val_end))
+
+    start = time.perf_counter()
+    model = build_model(task['model'], task['params'])
+    model.fit(X[train], y[train])
+    prob = model.predict_proba(X[val])[:, 1]
+    score = average_precision_score(y[val], prob) if y[val].any() else float('nan')
+
+    return {
+        'config_id': task['config_id'], 'model': task['model'], 'params': task['params'],
+        'fold': task['fold'], 'pr_auc': float(score), 'fit_seconds': time.perf_counter() - start,
+        'n_train': int(len(train)), 'n_val': int(len(val)),
+    }
+
+# --- Penyimpanan hasil (bisa dilanjutkan) ---
+def load_results(path=RESULTS_PATH):
+    results = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    results[(row['config_id'], row['fold'])] = row
+    return results
+
+def _append_result(row, path=RESULTS_PATH):
+    with open(path, 'a') as f:
+        f.write(json.dumps(row, default=str) + '\n')
+
+def _mean_scores(results, ids):
+    scores = {}
+    for (cid, _), row in results.items():
+        if cid in ids and not np.isnan(row['pr_auc']):
+            scores.setdefault(cid, []).append(row['pr_auc'])
+    return {cid: float(np.mean(v)) for cid, v in scores.items()}
+
+def prepare_shared_arrays(data_path=DATA_PATH, workdir=TUNING_DIR):
+    # Transformasi fitur sekali, lalu simpan sebagai .npy untuk di-mmap oleh worker
+    df = load_artifact(data_path)
+    transformer = FraudFeatureTransformer().fit(df)
+    os.makedirs(workdir, exist_ok=True)
+    paths = {name: os.path.join(workdir, f'{name}.npy') for name in ('X', 'y', 'steps')}
+    arrays = {'X': transformer.transform(df), 'y': df[TARGET_COL].to_numpy(dtype=np.int8),
+              'steps': df['step'].to_numpy(dtype=np.int32)}
+    # Fingerprint = isi array yang benar-benar dilatih (data input + daftar fitur transformer)
+    digest = hashlib.sha1(json.dumps(transformer.feature_names).encode())
+    for name, values in arrays.items():
+        np.save(paths[name], values)
+        digest.update(np.ascontiguousarray(values).view(np.uint8).ravel())
+    return paths, transformer, digest.hexdigest()[:16]
+
+def run_tuning(configs=None, n_folds=4, n_workers=None, prune_margin=0.05,
+               data_path=DATA_PATH, results_path=RESULTS_PATH, model_path=BEST_MODEL_PATH):
+    configs = configs if configs is not None else random_search()
+    print(f"Preparing shared feature matrix from: {data_path}")
+    paths, transformer, fingerprint = prepare_shared_arrays(data_path)
+    steps = np.load(paths['steps'], mmap_mode='r')
+    folds = time_folds(np.asarray(steps), n_folds)
+    print(f"{len(configs)} konfigurasi x {len(folds)} fold (split berdasarkan step): {folds}")
+
+    by_id = {config_id(name, params, folds, fingerprint): (name, params) for name, params in configs}
+    results = load_results(results_path)
+    reused = sum(1 for cid, _ in results if cid in by_id)
+    if reused:
+        print(f"Melanjutkan run sebelumnya: {reused} hasil fold untuk data ini sudah tersimpan.")
+
+    alive = set(by_id)
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        for fold, bounds in enumerate(folds):
+            tasks = [{'paths': paths, 'config_id': cid, 'model': by_id[cid][0], 'params': by_id[cid][1],
+                      'fold': fold, 'fold_bounds': bounds}
+                     for cid in sorted(alive) if (cid, fold) not in results]
+            for row in pool.map(_evaluate, tasks):
+                results[(row['config_id'], row['fold'])] = row
+                _append_result(row, results_path)
+
+            # Early stopping: buang konfigurasi yang rata-ratanya jauh di bawah yang terbaik
+            means = _mean_scores(results, alive)
+            if means:
+                best = max(means.values())
+                pruned = {cid for cid, m in means.items() if m < best - prune_margin}
+                alive -= pruned
+                print(f"Fold {fold + 1}/{len(folds)}: best PR-AUC={best:.4f}, "
+                      f"{len(pruned)} konfigurasi dihentikan, {len(alive)} tersisa")
+
+    # Pemenang: rata-rata PR-AUC tertinggi di antara konfigurasi yang menyelesaikan semua fold
+    complete = {cid for cid in alive if all((cid, f) in results for f in range(len(folds)))}
+    means = _mean_scores(results, complete)
+    if not means:
+        print("[ERROR] Tidak ada konfigurasi yang menyelesaikan semua fold.")
+        return None
+
+    best_id = max(means, key=means.get)
+    name, params = by_id[best_id]
+    print(f"Konfigurasi terbaik: {name} {params} (mean PR-AUC={means[best_id]:.4f})")
+
+    X = np.load(paths['X'], mmap_mode='r')
+    y = np.load(paths['y'], mmap_mode='r')
+    model = build_model(name, params, n_jobs=-1)
+    model.fit(X, y)
+
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    joblib.dump(model, model_path)
+    save_transformer(transformer, model_path)
+    metrics = {
+        'config_id': best_id, 'model': name, 'params': params,
+        'cv_pr_auc_mean': means[best_id],
+        'cv_pr_auc_folds': [results[(best_id, f)]['pr_auc'] for f in range(len(folds))],
+        'folds': folds, 'data_fingerprint': fingerprint, 'feature_names': transformer.feature_names,
+    }
+    metrics_path = os.path.splitext(model_path)[0] + '_metrics.json'
+    with open(metrics_path, 'w') as f:
+        json.dump(metrics, f, indent=2, default=str)
+
+    print("-" * 30)
+    print(f"[SUCCESS] Tuning selesai! Model terbaik disimpan di: {model_path}")
+    print(f"Metrik disimpan di: {metrics_path}")
+    print("-" * 30)
+    return metrics
+
+if __name__ == "__main__":
+    # python tuning.py [n_configs]
+    n_configs = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    run_tuning(random_search(n_configs))
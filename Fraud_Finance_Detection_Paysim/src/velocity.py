@@ -0,0 +1,259 @@
+import os
+from collections import deque
+import numpy as np
+from startup import lazy_import
+
+pd = lazy_import('pandas')
+joblib = lazy_import('joblib')
+
+# Fitur perilaku per akun (velocity) yang dihitung dalam satu pass berurutan 'step'.
+# State disimpan dalam array NumPy yang diindeks oleh ID akun ber-kode integer
+# (bukan dict string Python), sehingga memori = O(jumlah akun + event 7 hari terakhir).
+# Objek state yang sama dipakai offline (full log) dan online (scoring), jadi fiturnya identik.
+
+# Jendela dalam satuan step (1 step = 1 jam simulasi). Jendela w mencakup step (s - w, s].
+WINDOWS = {'1h': 1, '24h': 24, '7d': 168}
+DEST_WINDOW = '24h'
+
+COUNT_FEATURES = [f'orig_txn_count_{w}' for w in WINDOWS]
+AMOUNT_FEATURES = [f'orig_amount_sum_{w}' for w in WINDOWS]
+VELOCITY_FEATURES = COUNT_FEATURES + AMOUNT_FEATURES + [
+    'orig_steps_since_prev',
+    f'dest_fanin_{DEST_WINDOW}',
+    'dest_fanin_total',
+]
+
+# Nilai 'orig_steps_since_prev' untuk akun yang belum pernah bertransaksi
+NO_PREVIOUS = -1
+
+ACCOUNT_COLS = ['nameOrig', 'nameDest']
+
+# Prefix ID PaySim: 'C' (customer) dan 'M' (merchant), disimpan di bit ke-40
+_PREFIX_BITS = {'C': 0, 'M': 1}
+_PREFIX_SHIFT = 40
+
+def encode_account_ids(names):
+    # 'C1231006815' -> int64 (angka | prefix << 40), tervektorisasi tanpa loop Python
+    s = pd.Series(names, copy=False).astype(str)
+    prefix = s.str[0]
+    unknown = ~prefix.isin(list(_PREFIX_BITS))
+    if unknown.any():
+        raise ValueError(f"Prefix ID akun tidak dikenal: {sorted(set(prefix[unknown]))}")
+    number = s.str[1:].astype('int64').to_numpy()
+    flag = prefix.map(_PREFIX_BITS).to_numpy(dtype=np.int64)
+    return number | (flag << _PREFIX_SHIFT)
+
+class AccountIndex:
+    # Pemetaan kode akun -> slot padat (0..n-1) memakai array kunci terurut + searchsorted.
+    # Slot tidak pernah berubah setelah diberikan, sehingga array state cukup ditambah di ujung.
+    def __init__(self):
+        self._keys = np.empty(0, dtype=np.int64)
+        self._slots = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def lookup(self, codes, insert=True):
+        uniq, inverse = np.unique(codes, return_inverse=True)
+        pos = np.searchsorted(self._keys, uniq)
+        found = pos < len(self._keys)
+        found[found] = self._keys[pos[found]] == uniq[found]
+
+        slots = np.full(len(uniq), -1, dtype=np.int64)
+        slots[found] = self._slots[pos[found]]
+
+        new = ~found
+        if insert and new.any():
+            new_slots = np.arange(len(self._keys), len(self._keys) + new.sum(), dtype=np.int64)
+            slots[new] = new_slots
+            self._keys = np.insert(self._keys, pos[new], uniq[new])
+            self._slots = np.insert(self._slots, pos[new], new_slots)
+        return slots[inverse]
+
+def _exclusive_group_totals(keys, values):
+    # Untuk tiap baris: jumlah baris sebelumnya (dan total values-nya) dengan key yang sama
+    # di dalam batch. Menjaga urutan transaksi dalam satu step tanpa loop per baris.
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    starts = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+    group_id = np.cumsum(starts) - 1
+    first = np.flatnonzero(starts)
+
+    positions = np.arange(len(keys))
+    prior_count = np.empty(len(keys), dtype=np.int64)
+    prior_count[order] = positions - first[group_id]
+
+    prior_sum = None
+    if values is not None:
+        cumsum = np.cumsum(values[order])
+        inclusive = cumsum - np.r_[0.0, cumsum][first][group_id]
+        prior_sum = np.empty(len(keys), dtype=np.float64)
+        prior_sum[order] = inclusive - values[order]
+    return prior_count, prior_sum
+
+class VelocityState:
+    # State inkremental: jumlah & total nominal per akun pengirim untuk tiap jendela,
+    # step transaksi terakhir, dan fan-in akun penerima. Event yang keluar jendela
+    # dikurangkan saat step maju (sliding window tepat, bukan aproksimasi).
+    # Jurnal undo update() yang sedang berjalan (lihat rollback); None = tidak dicatat
+    _journal = None
+
+    def __init__(self, initial_capacity=1 << 16):
+        self.index = AccountIndex()
+        self.current_step = None
+        self._windows = np.array(list(WINDOWS.values()), dtype=np.int64)
+        self._dest_window = WINDOWS[DEST_WINDOW]
+        self._alloc(initial_capacity)
+        # Event per grup step: (step, slot pengirim, nominal, slot penerima)
+        self._events = deque()
+        self._expired = np.zeros(len(self._windows) + 1, dtype=np.int64)
+
+    def _alloc(self, capacity):
+        self.capacity = capacity
+        self.counts = np.zeros((capacity, len(WINDOWS)), dtype=np.int32)
+        self.sums = np.zeros((capacity, len(WINDOWS)), dtype=np.float64)
+        self.last_step = np.full(capacity, NO_PREVIOUS, dtype=np.int32)
+        self.dest_window = np.zeros(capacity, dtype=np.int32)
+        self.dest_total = np.zeros(capacity, dtype=np.int32)
+
+    def _ensure_capacity(self, needed):
+        if needed <= self.capacity:
+            return
+        new_capacity = self.capacity
+        while new_capacity < needed:
+            new_capacity *= 2
+        old = (self.counts, self.sums, self.last_step, self.dest_window, self.dest_total)
+        n = self.capacity
+        self._alloc(new_capacity)
+        self.counts[:n], self.sums[:n], self.last_step[:n], self.dest_window[:n], self.dest_total[:n] = old
+
+    def _record(self, orig=None, dest=None):
+        # Simpan nilai lama baris yang akan diubah in-place (hanya saat update() diberi jurnal)
+        if self._journal is None:
+            return
+        if orig is not None:
+            self._journal.append(('orig', orig, self.counts[orig].copy(), self.sums[orig].copy(),
+                                  self.last_step[orig].copy()))
+        if dest is not None:
+            self._journal.append(('dest', dest, self.dest_window[dest].copy(), self.dest_total[dest].copy()))
+
+    def _advance(self, step):
+        # Kurangi event yang sudah keluar dari tiap jendela, lalu buang event paling tua
+        if self.current_step is not None and step < self.current_step:
+            raise ValueError(f"Data harus berurutan menurut 'step' (step {step} setelah {self.current_step}).")
+        self.current_step = step
+
+        limits = list(zip(range(len(self._windows)), self._windows)) + [(len(self._windows), self._dest_window)]
+        for w_idx, width in limits:
+            while self._expired[w_idx] < len(self._events) and self._events[self._expired[w_idx]][0] <= step - width:
+                _, orig, amount, dest = self._events[self._expired[w_idx]]
+                if w_idx < len(self._windows):
+                    self._record(orig=orig)
+                    np.subtract.at(self.counts[:, w_idx], orig, 1)
+                    np.subtract.at(self.sums[:, w_idx], orig, amount)
+                    # Hilangkan sisa pembulatan float ketika akun tidak punya event lagi di jendela
+                    empty = orig[self.counts[orig, w_idx] == 0]
+                    self.sums[empty, w_idx] = 0.0
+                else:
+                    self._record(dest=dest)
+                    np.subtract.at(self.dest_window, dest, 1)
+                self._expired[w_idx] += 1
+
+        drop = int(self._expired.min())
+        for _ in range(drop):
+            self._events.popleft()
+        self._expired -= drop
+
+    def _update_group(self, step, orig, dest, amount, out):
+        self._advance(step)
+
+        prior_count, prior_sum = _exclusive_group_totals(orig, amount)
+        n_w = len(self._windows)
+        out[:, :n_w] = self.counts[orig] + prior_count[:, None]
+        out[:, n_w:2 * n_w] = self.sums[orig] + prior_sum[:, None]
+
+        last = self.last_step[orig]
+        since_prev = np.where(last == NO_PREVIOUS, NO_PREVIOUS, step - last)
+        since_prev[prior_count > 0] = 0
+        out[:, 2 * n_w] = since_prev
+
+        prior_dest, _ = _exclusive_group_totals(dest, None)
+        out[:, 2 * n_w + 1] = self.dest_window[dest] + prior_dest
+        out[:, 2 * n_w + 2] = self.dest_total[dest] + prior_dest
+
+        # Commit transaksi grup ini ke state
+        self._record(orig=orig, dest=dest)
+        for w_idx in range(n_w):
+            np.add.at(self.counts[:, w_idx], orig, 1)
+            np.add.at(self.sums[:, w_idx], orig, amount)
+        self.last_step[orig] = step
+        np.add.at(self.dest_window, dest, 1)
+        np.add.at(self.dest_total, dest, 1)
+        self._events.append((step, orig, amount, dest))
+
+    def update(self, df, journal=None):
+        # Hitung fitur velocity untuk batch (berurutan 'step') lalu perbarui state.
+        # Fitur setiap transaksi hanya memakai transaksi sebelumnya (tanpa kebocoran).
+        # journal: list kosong -> diisi catatan undo, sehingga rollback(journal) bisa membatalkan
+        # update ini (mis. scoring batch gagal setelah state diperbarui)
+        steps = df['step'].to_numpy(dtype=np.int64)
+        if len(steps) == 0:
+            return pd.DataFrame(columns=VELOCITY_FEATURES, index=df.index, dtype=np.float32)
+        if (np.diff(steps) < 0).any():
+            raise ValueError("Batch harus berurutan menurut 'step'.")
+
+        if journal is not None:
+            # Atribut yang diganti (bukan diubah in-place) cukup disimpan referensinya; deque event
+            # hanya berisi satu entri per step dalam jendela terpanjang, jadi salinannya murah
+            journal.append(('state', self.current_step, deque(self._events), self._expired.copy(),
+                            self.index._keys, self.index._slots, self.capacity,
+                            (self.counts, self.sums, self.last_step, self.dest_window, self.dest_total)))
+        self._journal = journal
+        try:
+            orig = self.index.lookup(encode_account_ids(df['nameOrig']))
+            dest = self.index.lookup(encode_account_ids(df['nameDest']))
+            self._ensure_capacity(len(self.index))
+            amount = df['amount'].to_numpy(dtype=np.float64)
+
+            out = np.empty((len(df), len(VELOCITY_FEATURES)), dtype=np.float64)
+            bounds = np.r_[0, np.flatnonzero(np.diff(steps)) + 1, len(steps)]
+            for a, b in zip(bounds[:-1], bounds[1:]):
+                self._update_group(int(steps[a]), orig[a:b], dest[a:b], amount[a:b], out[a:b])
+        finally:
+            self._journal = None
+
+        return pd.DataFrame(out.astype(np.float32), columns=VELOCITY_FEATURES, index=df.index)
+
+    def rollback(self, journal):
+        # Kembalikan state persis ke sebelum update(df, journal), termasuk update yang gagal di tengah.
+        # Hanya benar bila tidak ada update lain sesudahnya (pemanggil men-serialisasi update)
+        if not journal:
+            return
+        for entry in reversed(journal[1:]):
+            if entry[0] == 'orig':
+                _, orig, counts, sums, last_step = entry
+                self.counts[orig], self.sums[orig], self.last_step[orig] = counts, sums, last_step
+            else:
+                _, dest, dest_window, dest_total = entry
+                self.dest_window[dest], self.dest_total[dest] = dest_window, dest_total
+        _, self.current_step, self._events, self._expired, self.index._keys, self.index._slots, \
+            self.capacity, arrays = journal[0]
+        self.counts, self.sums, self.last_step, self.dest_window, self.dest_total = arrays
+        journal.clear()
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        joblib.dump(self, path)
+        return path
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
+
+def add_velocity_features(chunks, state=None):
+    # Generator: terima chunk log mentah (berurutan 'step', berisi nameOrig/nameDest),
+    # kembalikan chunk yang sama dengan kolom velocity tambahan.
+    state = state if state is not None else VelocityState()
+    for chunk in chunks:
+        features = state.update(chunk)
+        yield pd.concat([chunk, features], axis=1)
@@ -0,0 +1,50 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import batch_scoring
+from artifacts import load_artifact
+from fast_forest import compile_model
+from features import FraudFeatureTransformer, add_engineered_columns
+
+def _paysim_csv(path):
+    # 6 PAYMENT lalu 6 TRANSFER: dengan batch 4, batch pertama tidak berisi TRANSFER
+    n = 12
+    df = pd.DataFrame({
+        'step': np.arange(1, n + 1),
+        'type': ['PAYMENT'] * 6 + ['TRANSFER'] * 6,
+        'amount': np.linspace(100.0, 1200.0, n),
+        'nameOrig': [f'C{i}' for i in range(n)],
+        'oldbalanceOrg': np.full(n, 5000.0),
+        'newbalanceOrig': np.full(n, 4000.0),
+        'nameDest': [f'M{i}' for i in range(n)],
+        'oldbalanceDest': np.zeros(n),
+        'newbalanceDest': np.zeros(n),
+        'isFraud': [0] * 6 + [1] * 6,
+        'isFlaggedFraud': 0,
+    })
+    df.to_csv(path, index=False)
+    return df
+
+def test_score_shard_keeps_type_missing_from_first_batch(tmp_path):
+    source = _paysim_csv(tmp_path / 'log.csv')
+    train = add_engineered_columns(source.drop(columns=['nameOrig', 'nameDest']))
+    transformer = FraudFeatureTransformer().fit(train)
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(transformer.transform(train), train['isFraud'])
+
+    batch_scoring._WORKER.clear()
+    batch_scoring._WORKER.update(scorer=compile_model(model), transformer=transformer)
+    path, fmt, shards = batch_scoring.plan_shards(str(tmp_path / 'log.csv'))
+    assert fmt == 'csv' and len(shards) == 1
+
+    result = batch_scoring.score_shard(0, path, fmt, *shards[0], str(tmp_path), batch_size=4)
+    scored = load_artifact(str(tmp_path / result['path']))
+
+    assert result['rows'] == len(source)
+    assert scored['type'].isna().sum() == 0
+    assert scored['type'].astype(str).tolist() == source['type'].tolist()
@@ -0,0 +1,168 @@
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from feature_engineering import PROCESSED_DIR, OUTPUT_PATH as FINAL_PATH, engineer_features, parse_dates, read_table
+from cleaning import normalise_labels
+
+# Cube agregat attrition (gaya OLAP) di atas dimensi HR.
+# - Satu lintasan groupby membangun "sel dasar": satu baris per kombinasi dimensi + periode
+#   snapshot, berisi ukuran yang bisa dijumlah (headcount, exits, jumlah gaji/kepuasan/...).
+# - Roll-up & slice apa pun (per Department, per RecruitmentSource x Sex, dst.) dihitung dari
+#   sel dasar yang kecil, bukan dari data mentah -> milidetik, berapapun jumlah karyawan.
+# - Rata-rata = jumlah / n, jadi hasil roll-up selalu tepat (bukan rata-rata dari rata-rata).
+# - update(df, period): snapshot HR bulanan baru mengganti sel periode itu saja (idempoten).
+#
+#   python scripts/attrition_cube.py build --period 2019-01
+#   python scripts/attrition_cube.py query --by Department --where Sex=F
+
+CUBE_PATH = os.path.join(PROCESSED_DIR, "attrition_cube.pkl")
+
+DIMENSIONS = ['Department', 'RecruitmentSource', 'Salary_Group', 'Sex', 'RaceDesc', 'ManagerName', 'Tenure_Band']
+TENURE_EDGES = [0, 1, 2, 5, 10, np.inf]
+TENURE_BANDS = ['<1', '1-2', '2-5', '5-10', '10+']
+# Ukuran aditif; pasangan *_sum / *_n dipakai untuk rata-rata
+MEASURES = ['headcount', 'exits', 'salary_sum', 'salary_n', 'satisfaction_sum', 'satisfaction_n',
+            'tenure_sum', 'tenure_n', 'performance_sum', 'performance_n']
+
+def cube_frame(df, as_of=None):
+    # Baris karyawan -> kolom dimensi + ukuran per baris (siap di-groupby)
+    if 'Tenure' not in df.columns or 'Salary_Group' not in df.columns:
+        df = engineer_features(df, as_of=as_of)
+
+    frame = pd.DataFrame({dim: normalise_labels(df[dim]) for dim in DIMENSIONS if dim != 'Tenure_Band'})
+    frame['Tenure_Band'] = pd.cut(df['Tenure'].to_numpy(dtype=float), TENURE_EDGES, labels=TENURE_BANDS, right=False)
+
+    # Keluar = tanggal terminasi terisi ('Active' / kosong -> masih bekerja)
+    frame['headcount'] = 1
+    frame['exits'] = parse_dates(df['DateofTermination']).notna().to_numpy().astype(np.int64)
+    for name, col in (('salary', 'Salary'), ('satisfaction', 'EmpSatisfaction'),
+                      ('tenure', 'Tenure'), ('performance', 'PerformanceScore_Map')):
+        values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+        frame[f'{name}_sum'] = np.nan_to_num(values)
+        frame[f'{name}_n'] = (~np.isnan(values)).astype(np.int64)
+    return frame
+
+def build_cells(df, period, as_of=None):
+    frame = cube_frame(df, as_of)
+    cells = frame.groupby(DIMENSIONS, observed=True, dropna=False, sort=False)[MEASURES].sum().reset_index()
+    # Sel disimpan dengan label teks biasa: tabelnya kecil, dan kategori antar periode bisa berbeda
+    for dim in DIMENSIONS:
+        cells[dim] = cells[dim].astype(object)
+    cells.insert(0, 'period', str(period))
+    return cells
+
+def add_ratios(table):
+    table['attrition_rate'] = table['exits'] / table['headcount'].replace(0, np.nan)
+    for name in ('salary', 'satisfaction', 'tenure', 'performance'):
+        table[f'mean_{name}'] = table[f'{name}_sum'] / table[f'{name}_n'].replace(0, np.nan)
+    return table
+
+class AttritionCube:
+    def __init__(self, cells=None):
+        self.cells = cells if cells is not None else pd.DataFrame(columns=['period', *DIMENSIONS, *MEASURES])
+
+    @classmethod
+    def from_frame(cls, df, period, as_of=None):
+        return cls(build_cells(df, period, as_of))
+
+    @property
+    def periods(self):
+        return sorted(self.cells['period'].unique())
+
+    def update(self, df, period, as_of=None):
+        # Snapshot baru (atau kiriman ulang periode yang sama) mengganti sel periode tsb.
+        new_cells = build_cells(df, period, as_of)
+        kept = self.cells[self.cells['period'] != str(period)]
+        self.cells = pd.concat([kept, new_cells], ignore_index=True) if len(kept) else new_cells
+        return self
+
+    def _select(self, where=None, period=None):
+        # period: None -> snapshot terakhir, 'all' -> semua periode, str/list -> periode tertentu
+        cells = self.cells
+        if period is None and len(cells):
+            period = self.periods[-1]
+        if period is not None and period != 'all':
+            cells = cells[cells['period'].isin([period] if isinstance(period, str) else period)]
+        for dim, value in (where or {}).items():
+            values = [value] if isinstance(value, str) or not hasattr(value, '__iter__') else list(value)
+            cells = cells[cells[dim].isin(values)]
+        return cells
+
+    def rollup(self, by=(), where=None, period=None):
+        # Agregasi ke dimensi `by` (boleh kosong = total), setelah slice `where` {dim: nilai/list}
+        cells = self._select(where, period)
+        by = [by] if isinstance(by, str) else list(by)
+        if by:
+            table = cells.groupby(by, dropna=False, sort=True)[MEASURES].sum().reset_index()
+        else:
+            table = cells[MEASURES].sum().to_frame().T
+        return add_ratios(table)
+
+    def total(self, where=None, period=None):
+        return self.rollup((), where, period).iloc[0]
+
+    def save(self, path=CUBE_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.cells.to_pickle(path)
+        return path
+
+    @classmethod
+    def load(cls, path=CUBE_PATH):
+        return cls(pd.read_pickle(path))
+
+def _parse_where(items):
+    # ["Sex=F", "Department=Production,Sales"] -> {'Sex': 'F', 'Department': ['Production', 'Sales']}
+    where = {}
+    for item in items or []:
+        dim, _, value = item.partition('=')
+        values = value.split(',')
+        where[dim] = values if len(values) > 1 else values[0]
+    return where
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cube agregat attrition HR (roll-up & slice cepat)")
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help="Bangun / perbarui cube dari satu snapshot HR")
+    build.add_argument('--input', default=FINAL_PATH)
+    build.add_argument('--period', default=pd.Timestamp.now().strftime('%Y-%m'), help="Label snapshot, mis. 2019-01")
+    build.add_argument('--cube', default=CUBE_PATH)
+    build.add_argument('--rebuild', action='store_true', help="Abaikan cube lama (default: tambahkan/ganti periode ini)")
+    query = sub.add_parser('query', help="Roll-up / slice dari cube")
+    query.add_argument('--by', nargs='*', default=[], choices=['period', *DIMENSIONS])
+    query.add_argument('--where', nargs='*', default=[], help="Slice, mis. Sex=F Department=Production,Sales")
+    query.add_argument('--period', default=None, help="Default: snapshot terakhir; 'all' untuk semua periode")
+    query.add_argument('--cube', default=CUBE_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        if not os.path.exists(args.input):
+            print(f"[ERROR] File input tidak ditemukan: {args.input}")
+            return
+        df = read_table(args.input)
+        cube = AttritionCube() if args.rebuild or not os.path.exists(args.cube) else AttritionCube.load(args.cube)
+        start = time.perf_counter()
+        cube.update(df, args.period)
+        elapsed = time.perf_counter() - start
+        cube.save(args.cube)
+        print(f"--- Cube diperbarui: periode {args.period}, {len(df):,} baris -> "
+              f"{len(cube.cells):,} sel ({elapsed:.2f}s) ---")
+        print(f"Periode tersedia: {', '.join(cube.periods)}")
+        print(f"Disimpan di: {args.cube}")
+        return
+
+    if not os.path.exists(args.cube):
+        print(f"[ERROR] Cube belum ada: {args.cube}. Jalankan 'build' terlebih dahulu.")
+        return
+    cube = AttritionCube.load(args.cube)
+    start = time.perf_counter()
+    table = cube.rollup(args.by, _parse_where(args.where), args.period)
+    elapsed = time.perf_counter() - start
+    columns = [*args.by, 'headcount', 'exits', 'attrition_rate', 'mean_salary', 'mean_satisfaction', 'mean_tenure']
+    print(table[columns].round(3).to_string(index=False))
+    print(f"({elapsed * 1000:.1f} ms dari {len(cube.cells):,} sel)")
+
+if __name__ == "__main__":
+    main()
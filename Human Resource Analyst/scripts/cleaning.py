@@ -0,0 +1,169 @@
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from feature_engineering import PROJECT_DIR, CATEGORICAL_COLUMNS, CLEANED_PATH, parse_dates, read_table, write_table
+
+# Cleaning export HRIS mentah (HRDataset_v14.csv) -> tabel bertipe untuk feature engineering:
+#   python scripts/cleaning.py [--input ...] [--output data/processed/HRDataset_Cleaned.parquet]
+# - CSV dibaca per chunk; kolom teks langsung dibaca sebagai category, jadi tiap nilai unik
+#   disimpan sekali ("Production       " muncul ribuan kali, tapi hanya satu entri kamus).
+# - Normalisasi (trim spasi, ejaan beda huruf besar/kecil) dikerjakan pada KAMUS kategori,
+#   bukan per baris; kode baris dipetakan ulang dengan satu operasi take.
+# - Tanggal diparse dengan format eksplisit per nilai unik (DOB 2 digit tahun: 07/10/83).
+# - Duplikat EmpID dibuang lewat hash 64-bit (baris terakhir di export yang dipakai).
+
+RAW_PATH = os.path.join(PROJECT_DIR, "data", "raw", "HRDataset_v14.csv")
+OUTPUT_PATH = CLEANED_PATH
+
+KEY_COLUMN = 'EmpID'
+# Kode numerik yang hanya mengulang kolom deskripsi (MaritalDesc, Sex, EmploymentStatus, ...)
+DROP_COLUMNS = ['EmpID', 'MarriedID', 'MaritalStatusID', 'GenderID', 'EmpStatusID', 'DeptID', 'PerfScoreID']
+
+TEXT_COLUMNS = ['Employee_Name']
+# Format asli HRIS; DOB memakai tahun 2 digit
+DATE_COLUMNS = {
+    'DOB': "%m/%d/%y",
+    'DateofHire': "%m/%d/%Y",
+    'DateofTermination': "%m/%d/%Y",   # kosong = karyawan masih aktif
+    'LastPerformanceReview_Date': "%m/%d/%Y",
+}
+# Tipe numerik nullable: export bulanan bisa berisi sel kosong tanpa mengubah tipe kolom
+NUMERIC_TYPES = {
+    'FromDiversityJobFairID': 'Int8', 'Salary': 'Int32', 'Termd': 'Int8', 'PositionID': 'Int16',
+    'Zip': 'Int32', 'ManagerID': 'Int16', 'EngagementSurvey': 'Float32', 'EmpSatisfaction': 'Int8',
+    'SpecialProjectsCount': 'Int8', 'DaysLateLast30': 'Int8', 'Absences': 'Int16',
+}
+
+# --- Kamus kategori ---
+def build_dictionary(labels, counts=None, fold_case=False):
+    # Label unik mentah -> (indeks label kanonik per label, daftar label kanonik).
+    # fold_case: 'no' / 'No' digabung ke ejaan yang paling sering muncul
+    clean = pd.Index(labels.astype(str)).str.strip()
+    if fold_case and len(clean):
+        keys = clean.str.casefold()
+        weight = counts if counts is not None else np.ones(len(clean), dtype=np.int64)
+        spelling = (pd.DataFrame({'key': keys, 'label': clean, 'n': weight})
+                    .groupby(['key', 'label'], sort=False)['n'].sum().reset_index()
+                    .sort_values('n', ascending=False, kind='stable').drop_duplicates('key'))
+        clean = pd.Index(keys.map(dict(zip(spelling['key'], spelling['label']))))
+    categories = clean.unique()
+    return categories.get_indexer(clean), categories
+
+def normalise_labels(values, fold_case=False, changes=None):
+    # Trim spasi (dan gabung ejaan) sekali per nilai unik, bukan per baris.
+    # changes: list opsional yang diisi pasangan (label mentah, label bersih) yang berubah
+    codes, uniques = pd.factorize(pd.Series(values))
+    uniques = pd.Index(uniques)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    mapping, categories = build_dictionary(uniques, counts, fold_case)
+    if changes is not None:
+        changes.extend((raw, categories[i]) for raw, i in zip(uniques.astype(str), mapping) if raw != categories[i])
+    # Indeks -1 (NaN) menunjuk ke -1 tambahan di ujung mapping
+    return pd.Categorical.from_codes(np.append(mapping, -1)[codes], categories=categories)
+
+# --- Baca per chunk ---
+def iter_export(path, chunksize=100_000):
+    if os.path.splitext(path)[1].lower() in ('.parquet', '.feather'):
+        yield read_table(path)
+        return
+    header = pd.read_csv(path, nrows=0).columns
+    text = [c for c in header if c in CATEGORICAL_COLUMNS or c in TEXT_COLUMNS or c in DATE_COLUMNS]
+    yield from pd.read_csv(path, chunksize=chunksize, dtype={c: 'category' for c in text})
+
+def concat_chunks(chunks):
+    # Gabung chunk tanpa kembali ke object: kamus kategori antar chunk disatukan (union)
+    if len(chunks) == 1:
+        return chunks[0].reset_index(drop=True)
+    df = pd.concat(chunks, ignore_index=True)
+    for col in chunks[0].columns:
+        if isinstance(chunks[0][col].dtype, pd.CategoricalDtype):
+            df[col] = pd.api.types.union_categoricals([c[col] for c in chunks])
+    return df
+
+def deduplicate(df, key=KEY_COLUMN):
+    # Hash 64-bit per kunci (angka maupun teks), lalu duplicated() pada array uint64
+    hashes = pd.util.hash_pandas_object(df[key], index=False).to_numpy()
+    duplicated = pd.Index(hashes).duplicated(keep='last')
+    return df[~duplicated].reset_index(drop=True), int(duplicated.sum())
+
+# --- Cleaning ---
+def parse_dob(values, as_of):
+    # %y memetakan 00-68 ke 20xx: tanggal lahir setelah as_of dimundurkan 100 tahun
+    dob = parse_dates(values, formats=(DATE_COLUMNS['DOB'],))
+    return dob.where(dob <= as_of, dob - pd.DateOffset(years=100))
+
+def clean_frame(df, as_of=None, report=None):
+    # report: dict opsional yang diisi ringkasan (duplikat, label yang dinormalisasi, tanggal invalid)
+    as_of = pd.Timestamp.now() if as_of is None else pd.Timestamp(as_of)
+    report = report if report is not None else {}
+
+    df, report['duplicates'] = deduplicate(df) if KEY_COLUMN in df.columns else (df, 0)
+    df = df.drop(columns=[c for c in DROP_COLUMNS if c in df.columns])
+
+    report['labels'] = {}
+    for col in CATEGORICAL_COLUMNS + TEXT_COLUMNS:
+        if col in df.columns:
+            changes = []
+            df[col] = normalise_labels(df[col], fold_case=col in CATEGORICAL_COLUMNS, changes=changes)
+            if changes:
+                report['labels'][col] = changes
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('string')
+
+    report['invalid_dates'] = {}
+    for col, fmt in DATE_COLUMNS.items():
+        if col not in df.columns:
+            continue
+        filled = df[col].notna()
+        df[col] = parse_dob(df[col], as_of) if col == 'DOB' else parse_dates(df[col], formats=(fmt,))
+        invalid = int((filled & df[col].isna()).sum())
+        if invalid:
+            report['invalid_dates'][col] = invalid
+
+    for col, dtype in NUMERIC_TYPES.items():
+        if col in df.columns:
+            values = pd.to_numeric(df[col], errors='coerce')
+            df[col] = values.round() if dtype.startswith('Int') else values
+            df[col] = df[col].astype(dtype)
+    return df
+
+def clean_export(path, as_of=None, chunksize=100_000, report=None):
+    report = report if report is not None else {}
+    chunks = list(iter_export(path, chunksize))
+    report['rows_read'] = sum(len(c) for c in chunks)
+    return clean_frame(concat_chunks(chunks), as_of=as_of, report=report)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cleaning export HRIS (HRDataset_v14.csv) ke tabel bertipe")
+    parser.add_argument('--input', default=RAW_PATH, help="CSV / parquet / feather mentah")
+    parser.add_argument('--output', default=OUTPUT_PATH, help="Format mengikuti ekstensi (.parquet, .feather, .csv)")
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--as-of', default=None, help="Tanggal acuan untuk abad DOB 2 digit (default: hari ini)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        print(f"[ERROR] File input tidak ditemukan: {args.input}")
+        return
+
+    report = {}
+    start = time.perf_counter()
+    df = clean_export(args.input, as_of=args.as_of, chunksize=args.chunksize, report=report)
+    elapsed = time.perf_counter() - start
+    write_table(df, args.output)
+
+    print("--- Cleaning Selesai ---")
+    print(f"{report['rows_read']:,} baris dibaca, {report['duplicates']:,} duplikat EmpID dibuang -> "
+          f"{len(df):,} baris ({elapsed:.2f}s)")
+    for col, changes in report['labels'].items():
+        examples = ', '.join(f"{raw!r} -> {clean!r}" for raw, clean in changes[:3])
+        print(f"[SUCCESS] {col}: {len(changes)} label dinormalisasi ({examples})")
+    for col, invalid in report['invalid_dates'].items():
+        print(f"[WARNING] {col}: {invalid:,} tanggal tidak sesuai format {DATE_COLUMNS[col]} -> kosong")
+    print(f"Disimpan di: {args.output}")
+
+if __name__ == "__main__":
+    main()
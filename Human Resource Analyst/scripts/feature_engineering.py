@@ -0,0 +1,145 @@
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# Feature engineering HR (Tenure, Age, PerformanceScore_Map, Salary_Group), bisa di-import
+# atau dijalankan dari CLI untuk file HRIS mana pun:
+#   python scripts/feature_engineering.py [--input ...] [--output ...] [--as-of 2024-01-01]
+# Semua langkah vektor (tanpa apply per baris); tanggal diparse dengan format eksplisit,
+# sekali per nilai unik (riwayat karyawan berisi banyak tanggal yang berulang).
+
+# 1. Path relatif terhadap folder proyek (bukan working directory)
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROCESSED_DIR = os.path.join(PROJECT_DIR, "data", "processed")
+INPUT_PATH = os.path.join(PROCESSED_DIR, "HRDataset_Cleaned.csv")
+# Output bertipe dari scripts/cleaning.py; dipakai lebih dulu bila sudah ada
+CLEANED_PATH = os.path.join(PROCESSED_DIR, "HRDataset_Cleaned.parquet")
+OUTPUT_PATH = os.path.join(PROCESSED_DIR, "HRDataset_Final.csv")
+
+# Format tanggal yang dicoba berurutan (ISO hasil cleaning, lalu format asli HRIS m/d/Y)
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y")
+
+# Mapping: Exceeds (4), Fully Meets (3), Needs Improvement (2), PIP (1)
+PERF_MAPPING = {
+    'Exceeds': 4,
+    'Fully Meets': 3,
+    'Needs Improvement': 2,
+    'PIP': 1
+}
+SALARY_GROUPS = ['Low', 'Medium', 'High']
+
+# Kolom teks berkardinalitas rendah -> category (RAM kecil, groupby cepat di EDA)
+CATEGORICAL_COLUMNS = ['Position', 'State', 'Sex', 'MaritalDesc', 'CitizenDesc', 'HispanicLatino',
+                       'RaceDesc', 'TermReason', 'EmploymentStatus', 'Department', 'ManagerName',
+                       'RecruitmentSource', 'PerformanceScore']
+
+def parse_dates(values, formats=DATE_FORMATS):
+    # Parse per nilai unik lalu disebar lagi lewat kode kategori; nilai non-tanggal
+    # (mis. 'Active' di DateofTermination) menjadi NaT
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    uniques = pd.Series(uniques, dtype=object)
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype='datetime64[ns]')
+    for fmt in formats:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(uniques[missing], format=fmt, errors='coerce')
+    result = parsed.to_numpy()[codes]
+    result[codes < 0] = np.datetime64('NaT')
+    return pd.Series(result, index=getattr(values, 'index', None))
+
+def tenure_years(hire, termination, as_of):
+    # 2. Masa kerja (tahun): sampai tanggal terminasi, atau sampai as_of untuk karyawan aktif
+    end = termination.fillna(as_of)
+    return ((end - hire).dt.days / 365.25).round(2)
+
+def age_years(dob, as_of):
+    # 3. Umur pada as_of: selisih tahun, dikurangi 1 bila ulang tahun tahun itu belum lewat
+    before_birthday = (dob.dt.month > as_of.month) | ((dob.dt.month == as_of.month) & (dob.dt.day > as_of.day))
+    return (as_of.year - dob.dt.year - before_birthday.astype(int)).astype('Int16')
+
+def salary_quartiles(salary):
+    q = salary.quantile([0.25, 0.75])
+    return float(q[0.25]), float(q[0.75])
+
+def salary_groups(salary, quartiles):
+    # 5. Low: < persentil 25, Medium: 25-75 (inklusif), High: > persentil 75; gaji kosong -> NaN
+    low, high = quartiles
+    s = salary.to_numpy(dtype=float)
+    codes = np.select([np.isnan(s), s < low, s <= high], [-1, 0, 1], default=2)
+    return pd.Categorical.from_codes(codes, categories=SALARY_GROUPS, ordered=True)
+
+def engineer_features(df, as_of=None, quartiles=None):
+    # as_of default: saat ini (seperti versi awal); quartiles bisa diberikan agar
+    # snapshot baru memakai batas Salary_Group yang sama dengan data referensi
+    as_of = pd.Timestamp.now() if as_of is None else pd.Timestamp(as_of)
+    df = df.copy()
+
+    df['DOB'] = parse_dates(df['DOB'])
+    df['DateofHire'] = parse_dates(df['DateofHire'])
+    termination = parse_dates(df['DateofTermination'])
+
+    df['Tenure'] = tenure_years(df['DateofHire'], termination, as_of)
+    df['Age'] = age_years(df['DOB'], as_of)
+    # 4. PerformanceScore_Map (Skala Angka 1-4)
+    df['PerformanceScore_Map'] = df['PerformanceScore'].map(PERF_MAPPING).astype('Int8')
+    df['Salary_Group'] = salary_groups(df['Salary'], quartiles or salary_quartiles(df['Salary']))
+
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+def read_table(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.parquet':
+        return pd.read_parquet(path)
+    if ext == '.feather':
+        return pd.read_feather(path)
+    return pd.read_csv(path)
+
+def write_table(df, path):
+    # Format mengikuti ekstensi; .parquet/.feather menyimpan dtype (category, tanggal) apa adanya
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.parquet':
+        df.to_parquet(path, index=False)
+    elif ext == '.feather':
+        df.reset_index(drop=True).to_feather(path)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Feature engineering dataset HR (Tenure, Age, Salary_Group)")
+    parser.add_argument('--input', default=None, help="CSV / parquet / feather hasil cleaning (default: "
+                        "HRDataset_Cleaned.parquet bila ada, selain itu HRDataset_Cleaned.csv)")
+    parser.add_argument('--output', default=OUTPUT_PATH, help="Format mengikuti ekstensi (.csv, .parquet, .feather)")
+    parser.add_argument('--as-of', default=None, help="Tanggal acuan Tenure & Age (default: hari ini)")
+    args = parser.parse_args(argv)
+    if args.input is None:
+        args.input = CLEANED_PATH if os.path.exists(CLEANED_PATH) else INPUT_PATH
+
+    if not os.path.exists(args.input):
+        print(f"[ERROR] File input tidak ditemukan: {args.input}")
+        return
+
+    # 1. Load data yang sudah dibersihkan pada Tahap 1
+    df = read_table(args.input)
+    start = time.perf_counter()
+    df = engineer_features(df, as_of=args.as_of)
+    elapsed = time.perf_counter() - start
+
+    # 6. Simpan kembali sebagai data final untuk EDA
+    write_table(df, args.output)
+
+    print("--- Feature Engineering Selesai ---")
+    print(f"Kolom baru berhasil ditambahkan: Tenure, Age, PerformanceScore_Map, Salary_Group "
+          f"({len(df):,} baris, {elapsed:.2f}s)")
+    print(f"Disimpan di: {args.output}")
+    print(df[['Employee_Name', 'Tenure', 'Age', 'PerformanceScore_Map', 'Salary_Group']].head())
+
+if __name__ == "__main__":
+    main()